@@ -10,7 +10,7 @@ from app_pkg.routes import bp
 from app_pkg.errors import register_error_handlers
 from app_pkg.logger import setup_logger
 from config import Config
-from services.initialize_memory import initialize_memory
+from services.warmup import start_warmup
 
 
 def create_app() -> Flask:
@@ -33,8 +33,9 @@ def create_app() -> Flask:
     # Register error handlers
     register_error_handlers(app)
     
-    # Initialize services
-    initialize_memory()
+    # Load the embedder and build the FAQ index in the background;
+    # /ready turns true once both are warm
+    start_warmup()
     
-    app.logger.info("Application initialized successfully")
+    app.logger.info("Application initialized successfully (warm-up running)")
     return app
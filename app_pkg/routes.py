@@ -3,17 +3,28 @@
 This module defines all HTTP endpoints and their handlers, utilizing the error
 handling and logging systems for robust operation.
 """
-from flask import Blueprint, jsonify, request, send_from_directory, current_app
+from flask import Blueprint, Response, jsonify, request, send_from_directory, current_app
 import json
 import os
 from typing import Any
 
 from app_pkg.logger import setup_logger
 from app_pkg.errors import InvalidInputError, ResourceNotFoundError
-from config import FAQ_PATH, SERVICE_FOR_SERVICE_PATH, HOURLY_SERVICES_SHIFT_PATH , USER_DATA_PATH , SESSION_HISTORY_PATH , SAVE_ADDRESS_PATH , FIXED_PACKAGE_PATH
+from config import SERVICE_FOR_SERVICE_PATH, HOURLY_SERVICES_SHIFT_PATH , USER_DATA_PATH , SESSION_HISTORY_PATH , SAVE_ADDRESS_PATH , FIXED_PACKAGE_PATH
 from services.get_best_answer import get_best_answer
+from services.reply_stream import stream_reply
+from services.faq_duplicates import faq_duplicates
 from services.pretty_log_question_answer import pretty_log_question_answer
 from services.state import get_session_history, clear_session_history
+from services.warmup import readiness
+from services import faq_store, response_cache
+from services.qa_writer import QA_WRITER
+from services.preprocess_message import stats as langid_stats
+from services.nlp.greetings import stats as small_talk_stats
+from services.moderation import MODERATOR
+from services.stage_executor import STAGES
+from services.llm_gateway import LLM
+from services.query_embedding import QUERY_CACHE, EMBED_BATCHER
 
 # Set up route-specific logger
 logger = setup_logger(__name__)
@@ -33,18 +44,16 @@ def upload_faq() -> Any:
         JSON response with success/error message
     """
     if request.method == "GET":
-        if not os.path.exists(FAQ_PATH):
-            logger.warning("FAQ file not found")
-            raise ResourceNotFoundError("❌ لا يوجد بيانات بعد.")
-            
         try:
-            with open(FAQ_PATH, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            logger.info("FAQ data retrieved successfully")
-            return jsonify(data)
+            data = faq_store.load_all()
         except Exception as e:
-            logger.error(f"Error reading FAQ file: {str(e)}", exc_info=True)
+            logger.error(f"Error reading FAQ store: {str(e)}", exc_info=True)
             raise
+        if not data:
+            logger.warning("FAQ store is empty")
+            raise ResourceNotFoundError("❌ لا يوجد بيانات بعد.")
+        logger.info("FAQ data retrieved successfully")
+        return jsonify(data)
 
     # Handle POST request
     data = request.json
@@ -57,8 +66,7 @@ def upload_faq() -> Any:
         raise InvalidInputError("البيانات يجب أن تكون قائمة (list) من العناصر.")
 
     try:
-        with open(FAQ_PATH, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        faq_store.replace_all(data)
 
         # Reinitialize in-memory index
         from services.initialize_memory import initialize_memory
@@ -72,15 +80,27 @@ def upload_faq() -> Any:
         raise
 
 
-@bp.route("/chat", methods=["POST"])
-def chat() -> Any:
-    """Handle chat messages and return appropriate responses.
-    
-    Expects a JSON payload with a 'message' field containing the user's input.
-    
+@bp.route("/faq_duplicates", methods=["GET"])
+def faq_duplicates_report() -> Any:
+    """Report near-duplicate FAQ questions.
+
+    Query parameters:
+        threshold: minimum token overlap score (default 0.6)
+
     Returns:
-        JSON response containing the chatbot's reply
+        JSON list of {question, duplicate_of, score}
     """
+    try:
+        threshold = float(request.args.get("threshold", 0.6))
+    except ValueError:
+        raise InvalidInputError("threshold يجب أن يكون رقماً.")
+    report = faq_duplicates(threshold)
+    logger.info(f"FAQ duplicate report: {len(report)} pairs")
+    return jsonify(report)
+
+
+def _chat_message() -> str:
+    """The non-empty 'message' field of the JSON payload of a chat request."""
     if not request.is_json:
         logger.warning("Non-JSON payload received")
         raise InvalidInputError("يجب أن تكون البيانات بتنسيق JSON.")
@@ -90,12 +110,24 @@ def chat() -> Any:
         logger.warning("Missing message field in request")
         raise InvalidInputError("الرجاء إدخال الرسالة في حقل 'message'.")
 
+    user_input = data.get("message", "").strip()
+    if not user_input:
+        logger.warning("Empty message received")
+        raise InvalidInputError("الرجاء إدخال رسالة غير فارغة.")
+    return user_input
+
+
+@bp.route("/chat", methods=["POST"])
+def chat() -> Any:
+    """Handle chat messages and return appropriate responses.
+    
+    Expects a JSON payload with a 'message' field containing the user's input.
+    
+    Returns:
+        JSON response containing the chatbot's reply
+    """
+    user_input = _chat_message()
     try:
-        user_input = data.get("message", "").strip()
-        if not user_input:
-            logger.warning("Empty message received")
-            raise InvalidInputError("الرجاء إدخال رسالة غير فارغة.")
-            
         logger.info(f"Processing chat request: {user_input[:50]}...")
         reply = get_best_answer(user_input)
         pretty_log_question_answer(user_input, reply)
@@ -108,6 +140,71 @@ def chat() -> Any:
         raise
 
 
+def _sse(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+@bp.route("/chat/stream", methods=["POST"])
+def chat_stream() -> Any:
+    """Handle a chat message like /chat, streaming the reply as Server-Sent Events.
+
+    Events: ``delta`` ({"text": ...}) for each part of the reply as soon as it
+    is ready, then ``done`` ({"reply": ...}) with the full reply, or ``error``.
+
+    Returns:
+        text/event-stream response
+    """
+    user_input = _chat_message()
+    logger.info(f"Processing streamed chat request: {user_input[:50]}...")
+
+    def events():
+        try:
+            for event, text in stream_reply(get_best_answer, user_input):
+                if event == "delta":
+                    yield _sse("delta", {"text": text})
+                else:
+                    pretty_log_question_answer(user_input, text)
+                    yield _sse("done", {"reply": text})
+        except Exception as e:
+            logger.error(f"Error processing streamed chat request: {str(e)}", exc_info=True)
+            yield _sse("error", {"error": "حدث خطأ أثناء معالجة الرسالة."})
+
+    return Response(events(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@bp.route("/ready", methods=["GET"])
+def ready() -> Any:
+    """Readiness probe: 200 once the embedder and FAQ index are warm, else 503.
+
+    Returns:
+        JSON response with the warm-up status
+    """
+    status = readiness()
+    return jsonify(status), 200 if status["ready"] else 503
+
+
+@bp.route("/metrics", methods=["GET"])
+def metrics() -> Any:
+    """Cache hit rates and batching counters of the answer pipeline.
+
+    Returns:
+        JSON response with one entry per cache
+    """
+    return jsonify({
+        "response_cache": response_cache.stats(),
+        "query_embedding_cache": QUERY_CACHE.stats(),
+        "embedding_batcher": EMBED_BATCHER.stats(),
+        "qa_writer": QA_WRITER.stats(),
+        "langid": langid_stats(),
+        "small_talk": small_talk_stats(),
+        "moderation": MODERATOR.stats(),
+        "stages": STAGES.stats(),
+        "llm": LLM.stats(),
+        "llm_breaker": LLM.breaker.stats(),
+    })
+
+
 @bp.route('/favicon.ico')
 def favicon():
     return send_from_directory('static', 'favicon.ico')
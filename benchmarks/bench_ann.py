@@ -0,0 +1,78 @@
+"""Recall@k versus latency of the IVF backend on synthetic corpora.
+
+Usage:
+    python benchmarks/bench_ann.py [--sizes 100000 300000] [--dim 384]
+
+Question embeddings are clustered by topic, so the synthetic corpus is a
+mixture of Gaussian blobs around random unit centres rather than uniform
+noise (on which no coarse quantizer can beat brute force).
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.nlp.ann import IVFIndex  # noqa: E402
+from services.nlp.similarity import VectorIndex, l2_normalize  # noqa: E402
+
+TOP_K = 5
+NPROBES = (1, 2, 4, 8, 16, 32, 64)
+
+
+def synthetic_corpus(n: int, dim: int, topics: int, noise: float, rng) -> np.ndarray:
+    centres = l2_normalize(rng.standard_normal((topics, dim)))
+    labels = rng.integers(0, topics, size=n)
+    return l2_normalize(centres[labels] + noise * rng.standard_normal((n, dim)) / np.sqrt(dim))
+
+
+def per_query_ms(index, queries) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query, TOP_K)
+    return (time.perf_counter() - start) * 1e3 / len(queries)
+
+
+def run(sizes, dim: int, n_queries: int, noise: float) -> None:
+    rng = np.random.default_rng(0)
+    print(f"dim={dim} k={TOP_K} queries={n_queries} noise={noise}")
+    for n in sizes:
+        corpus = synthetic_corpus(n, dim, topics=max(n // 100, 10), noise=noise, rng=rng)
+        # queries are perturbed corpus rows, like paraphrases of stored questions
+        picks = rng.choice(n, n_queries, replace=False)
+        queries = l2_normalize(corpus[picks] + 0.5 * noise * rng.standard_normal((n_queries, dim)) / np.sqrt(dim))
+
+        exact = VectorIndex()
+        exact.build(corpus)
+        _, truth = exact.search(queries, TOP_K)
+        exact_ms = per_query_ms(exact, queries)
+
+        ivf = IVFIndex()
+        start = time.perf_counter()
+        ivf.build(corpus)
+        build_s = time.perf_counter() - start
+
+        print(f"\nn={n}  nlist={len(ivf._lists)}  build={build_s:.1f}s  exact={exact_ms:.2f} ms/query")
+        print(f"{'nprobe':>7} | {'recall@5':>8} | {'ms/query':>8} | speedup")
+        for nprobe in NPROBES:
+            if nprobe > len(ivf._lists):
+                break
+            ivf.nprobe = nprobe
+            _, ids = ivf.search(queries, TOP_K)
+            recall = np.mean([len(set(a) & set(b)) / TOP_K for a, b in zip(ids, truth)])
+            ms = per_query_ms(ivf, queries)
+            print(f"{nprobe:>7} | {recall:>8.3f} | {ms:>8.3f} | {exact_ms / ms:>6.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 300_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=1.0)
+    args = parser.parse_args()
+    run(args.sizes, args.dim, args.queries, args.noise)
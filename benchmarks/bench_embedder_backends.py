@@ -0,0 +1,136 @@
+"""Parity, latency and memory of the embedder backends (state.EMBEDDER_BACKEND).
+
+Usage:
+    python benchmarks/bench_embedder_backends.py [--backends torch onnx torch-int8]
+
+Each backend runs in its own process so peak RSS is measured in isolation.
+The FAQ questions are encoded with every backend and compared with the
+float32 "torch" reference:
+
+* vector cos   - cosine between the two embeddings of the same text
+* sim max err  - largest change of any query x question cosine similarity
+* top1 / top5  - agreement of the nearest question (and top-5 set) per query
+
+"onnx" needs ``pip install optimum[onnxruntime]``; backends that fail to
+load are reported and skipped.
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+QUERIES = ["ما هي الخدمات المتاحة؟", "كم سعر الباقة الشهرية", "مرحبا", "اريد الذهاب لموقع الشركة",
+           "هل يوجد عاملات بنظام الساعات", "what services do you offer", "كيف اقدر احجز"]
+
+
+def _faq_questions():
+    with open(os.path.join(ROOT, "faq_data.json"), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [qa["question"] for topic in data for qa in topic.get("questions", [])
+            if isinstance(qa, dict) and qa.get("question")]
+
+
+def child(backend: str, out_path: str, repeats: int) -> None:
+    from services.state import load_embedder
+
+    start = time.perf_counter()
+    model = load_embedder(backend=backend)
+    load_s = time.perf_counter() - start
+
+    questions = _faq_questions()
+    start = time.perf_counter()
+    corpus = model.encode(questions, show_progress_bar=False, normalize_embeddings=True)
+    batch_s = time.perf_counter() - start
+
+    model.encode(QUERIES, show_progress_bar=False)  # warm-up
+    latencies = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        model.encode([QUERIES[i % len(QUERIES)]], show_progress_bar=False)
+        latencies.append(time.perf_counter() - start)
+    queries = model.encode(QUERIES, show_progress_bar=False, normalize_embeddings=True)
+
+    np.savez(out_path, corpus=np.asarray(corpus, np.float32), queries=np.asarray(queries, np.float32))
+    print(json.dumps({
+        "load_s": load_s,
+        "batch_ms_per_text": batch_s * 1e3 / max(len(questions), 1),
+        "p50_ms": statistics.median(latencies) * 1e3,
+        "p95_ms": sorted(latencies)[int(0.95 * (len(latencies) - 1))] * 1e3,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def _run_backend(backend: str, repeats: int, tmp: str):
+    out_path = os.path.join(tmp, f"{backend}.npz")
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child", backend, "--out", out_path, "--repeats", str(repeats)],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        print(f"{backend}: failed to run\n{proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+        return None
+    stats = json.loads(proc.stdout.strip().splitlines()[-1])
+    arrays = np.load(out_path)
+    return stats, arrays["corpus"], arrays["queries"]
+
+
+def _parity(ref, other, k: int = 5):
+    ref_corpus, ref_queries = ref
+    corpus, queries = other
+    vector_cos = np.sum(ref_corpus * corpus, axis=1)
+    ref_sims, sims = ref_queries @ ref_corpus.T, queries @ corpus.T
+    k = min(k, sims.shape[1])
+    ref_top = np.argsort(-ref_sims, axis=1)[:, :k]
+    top = np.argsort(-sims, axis=1)[:, :k]
+    return {
+        "cos_min": float(vector_cos.min()),
+        "cos_mean": float(vector_cos.mean()),
+        "sim_max_err": float(np.abs(ref_sims - sims).max()),
+        "top1": float(np.mean(ref_top[:, 0] == top[:, 0])),
+        "top5": float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, top)])),
+    }
+
+
+def main(backends, repeats: int) -> None:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            result = _run_backend(backend, repeats, tmp)
+            if result is not None:
+                results[backend] = result
+
+    ref = results.get("torch")
+    print(f"{'backend':>10} | {'load s':>6} | {'p50 ms':>6} | {'p95 ms':>6} | {'ms/text':>7} | {'RSS MB':>6} | "
+          f"{'vector cos':>14} | {'sim max err':>11} | {'top1':>5} | {'top5':>5}")
+    for backend, (stats, corpus, queries) in results.items():
+        row = (f"{backend:>10} | {stats['load_s']:>6.1f} | {stats['p50_ms']:>6.1f} | {stats['p95_ms']:>6.1f} | "
+               f"{stats['batch_ms_per_text']:>7.2f} | {stats['rss_mb']:>6.0f}")
+        if ref is not None:
+            p = _parity(ref[1:], (corpus, queries))
+            row += (f" | {p['cos_min']:.4f}/{p['cos_mean']:.4f} | {p['sim_max_err']:>11.4f} | "
+                    f"{p['top1']:>5.2f} | {p['top5']:>5.2f}")
+        print(row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "torch-int8"])
+    parser.add_argument("--repeats", type=int, default=200, help="single-query encodes per backend")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.out, args.repeats)
+    else:
+        main(args.backends, args.repeats)
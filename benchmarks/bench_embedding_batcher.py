@@ -0,0 +1,94 @@
+"""Throughput of EmbeddingBatcher versus one encode call per request.
+
+Usage:
+    python benchmarks/bench_embedding_batcher.py [--requests 64]
+    python benchmarks/bench_embedding_batcher.py --simulate
+
+By default this loads the real all-MiniLM-L6-v2 model. ``--simulate``
+replaces it with a model whose cost is ``fixed + per_item * batch`` ms,
+serialized like a CPU model that already uses every core per call; use it
+where the model cannot be downloaded.
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.embedding_batcher import EmbeddingBatcher  # noqa: E402
+
+CLIENTS = (1, 8, 32)
+QUERIES = ["ما هي الخدمات المتاحة؟", "كم سعر الباقة الشهرية", "مرحبا", "اريد الذهاب لموقع الشركة"]
+
+
+class SimulatedModel:
+    def __init__(self, fixed_ms: float, per_item_ms: float) -> None:
+        self.fixed = fixed_ms / 1000.0
+        self.per_item = per_item_ms / 1000.0
+        self._lock = threading.Lock()
+
+    def encode(self, texts, **_):
+        with self._lock:
+            time.sleep(self.fixed + self.per_item * len(texts))
+        return np.zeros((len(texts), 384), dtype=np.float32)
+
+
+def _drive(encode_one, clients: int, per_client: int):
+    latencies = []
+    lock = threading.Lock()
+
+    def client(seed: int) -> None:
+        for i in range(per_client):
+            start = time.perf_counter()
+            encode_one(QUERIES[(seed + i) % len(QUERIES)] + f" {seed}-{i}")
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return (
+        clients * per_client / elapsed,
+        statistics.median(latencies) * 1e3,
+        latencies[int(0.95 * (len(latencies) - 1))] * 1e3,
+    )
+
+
+def run(model, total_requests: int, wait_ms: float) -> None:
+    print(f"{'clients':>7} | {'mode':>8} | {'req/s':>8} | {'p50 ms':>7} | {'p95 ms':>7} | avg batch")
+    for clients in CLIENTS:
+        per_client = max(total_requests // clients, 2)
+        direct = _drive(lambda text: model.encode([text], show_progress_bar=False), clients, per_client)
+        batcher = EmbeddingBatcher(lambda texts: model.encode(texts, show_progress_bar=False), max_wait_ms=wait_ms)
+        batched = _drive(lambda text: batcher.encode([text]), clients, per_client)
+        print(f"{clients:>7} | {'direct':>8} | {direct[0]:>8.1f} | {direct[1]:>7.1f} | {direct[2]:>7.1f} | 1.0")
+        print(f"{clients:>7} | {'batched':>8} | {batched[0]:>8.1f} | {batched[1]:>7.1f} | {batched[2]:>7.1f} | "
+              f"{batcher.stats()['avg_batch']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=256, help="requests per client count")
+    parser.add_argument("--wait-ms", type=float, default=5.0)
+    parser.add_argument("--simulate", action="store_true")
+    parser.add_argument("--fixed-ms", type=float, default=8.0, help="simulated per-call cost")
+    parser.add_argument("--per-item-ms", type=float, default=0.6, help="simulated per-text cost")
+    args = parser.parse_args()
+
+    if args.simulate:
+        model = SimulatedModel(args.fixed_ms, args.per_item_ms)
+    else:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer("all-MiniLM-L6-v2")
+    run(model, args.requests, args.wait_ms)
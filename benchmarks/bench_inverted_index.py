@@ -0,0 +1,99 @@
+"""Build and lookup cost of the FAQ token index at realistic corpus sizes.
+
+Usage:
+    python benchmarks/bench_inverted_index.py [--sizes 1000 10000 30000] [--queries 200]
+
+The corpus is synthetic: Arabic-letter questions of 4-10 words and one to
+three answers of 5-20 words, with word lengths of 2-12 letters drawn from a
+Zipf-like vocabulary. Queries are 1-3 tokens of at least 4 letters cut from
+stored words, as filter_answers_by_query sends them. For each size this
+prints the time to build the index (it runs under INDEX_LOCK on every
+initialize_memory and /upload_faq), its number of keys, one clone() plus
+add() (a learned write), and the match latency against the corpus scan
+filter_answers_by_query used to run.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.nlp.inverted_index import InvertedIndex  # noqa: E402
+from services.normalize_ar import normalize_ar  # noqa: E402
+
+LETTERS = "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
+
+
+def synthetic_corpus(n, vocab, rng):
+    words = ["".join(rng.choice(list(LETTERS), rng.integers(2, 13))) for _ in range(vocab)]
+    weights = 1.0 / np.arange(1, vocab + 1)
+    weights /= weights.sum()
+
+    def text(low, high):
+        return " ".join(words[i] for i in rng.choice(vocab, rng.integers(low, high + 1), p=weights))
+
+    rows = [(text(4, 10), [text(5, 20) for _ in range(rng.integers(1, 4))]) for _ in range(n)]
+    return rows, words
+
+
+def scan(rows, tokens):
+    # the substring scan filter_answers_by_query ran before the index
+    matches = []
+    for question, answers in rows:
+        for answer in answers:
+            text = normalize_ar(answer)
+            if all(tok in text for tok in tokens):
+                matches.append(answer)
+    return matches
+
+
+def run(sizes, vocab, n_queries):
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>7} | {'build s':>7} | {'keys':>9} | {'ms/write':>8} | {'ms/match':>8} | {'scan ms':>8}")
+    for n in sizes:
+        rows, words = synthetic_corpus(n, vocab, rng)
+        long_words = [w for w in words if len(w) >= 4]
+        queries = []
+        for _ in range(n_queries):
+            tokens = []
+            for word in rng.choice(long_words, rng.integers(1, 4)):
+                start = rng.integers(0, len(word) - 3)
+                tokens.append(word[start:rng.integers(start + 4, len(word) + 1)])
+            queries.append(tokens)
+
+        index = InvertedIndex(normalize_ar)
+        start = time.perf_counter()
+        index.build([q for q, _ in rows], [a for _, a in rows])
+        build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        written = index
+        for i in range(20):
+            written = written.clone()
+            written.add(*rows[i])
+        write_ms = (time.perf_counter() - start) * 1e3 / 20
+
+        start = time.perf_counter()
+        for tokens in queries:
+            index.match(tokens)
+        match_ms = (time.perf_counter() - start) * 1e3 / n_queries
+
+        start = time.perf_counter()
+        for tokens in queries[:20]:
+            scan(rows, tokens)
+        scan_ms = (time.perf_counter() - start) * 1e3 / 20
+        print(f"{n:>7} | {build_s:>7.2f} | {len(index._postings):>9} | {write_ms:>8.3f} | {match_ms:>8.3f} | "
+              f"{scan_ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 30_000])
+    parser.add_argument("--vocab", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    run(args.sizes, args.vocab, args.queries)
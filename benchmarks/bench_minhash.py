@@ -0,0 +1,92 @@
+"""Duplicate lookup on FAQ writes: MinHash LSH versus the linear scan.
+
+Usage:
+    python benchmarks/bench_minhash.py [--sizes 1000 10000 50000] [--bands 32 16]
+
+The corpus is synthetic: questions of 3-8 tokens drawn from a Zipf-like
+vocabulary, queries are stored questions with one token dropped and one
+added. For each size this prints the lookup latency of the scan
+save_or_update_qa used to run (token_overlap_score against every row) and of
+the LSH (candidates, then the same score on them), the share of rows the LSH
+had to verify, its recall of the first match the scan finds, and the cost of
+one learned write on the LSH (clone() plus add(), as IndexSnapshot does).
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.nlp.minhash import MinHashLSH  # noqa: E402
+from services.token_overlap_score import token_overlap_score  # noqa: E402
+
+THRESHOLD = 0.6
+
+
+def synthetic_corpus(n, vocab, rng):
+    weights = 1.0 / np.arange(1, vocab + 1)
+    weights /= weights.sum()
+    return [[f"w{i}" for i in rng.choice(vocab, rng.integers(3, 9), replace=False, p=weights)]
+            for _ in range(n)]
+
+
+def scan(corpus, query):
+    for row, tokens in enumerate(corpus):
+        if token_overlap_score(query, tokens) >= THRESHOLD:
+            return row
+    return None
+
+
+def lsh_find(lsh, corpus, query):
+    for row in lsh.candidates(query):
+        if token_overlap_score(query, corpus[row]) >= THRESHOLD:
+            return row
+    return None
+
+
+def run(sizes, vocab: int, n_queries: int, bands_list) -> None:
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        corpus = synthetic_corpus(n, vocab, rng)
+        picks = rng.choice(n, n_queries, replace=False)
+        queries = [corpus[i][1:] + ["new_token"] for i in picks]
+
+        start = time.perf_counter()
+        truth = [scan(corpus, q) for q in queries]
+        scan_ms = (time.perf_counter() - start) * 1e3 / n_queries
+        print(f"\nn={n} vocab={vocab}")
+        print(f"{'method':>10} | {'build s':>7} | {'ms/lookup':>9} | {'verified':>8} | {'recall':>6} | ms/write")
+        print(f"{'scan':>10} | {'-':>7} | {scan_ms:>9.3f} | {1.0:>8.1%} | {1.0:>6.3f} | -")
+
+        for bands in bands_list:
+            lsh = MinHashLSH(bands=bands)
+            start = time.perf_counter()
+            lsh.build(corpus)
+            build_s = time.perf_counter() - start
+            start = time.perf_counter()
+            found = [lsh_find(lsh, corpus, q) for q in queries]
+            lsh_ms = (time.perf_counter() - start) * 1e3 / n_queries
+            verified = np.mean([len(lsh.candidates(q)) for q in queries]) / n
+            hits = [f is not None for f, t in zip(found, truth) if t is not None]
+            start = time.perf_counter()
+            written = lsh
+            for q in queries:
+                written = written.clone()
+                written.add(q)
+            write_ms = (time.perf_counter() - start) * 1e3 / n_queries
+            print(f"{f'lsh b={bands}':>10} | {build_s:>7.2f} | {lsh_ms:>9.3f} | {verified:>8.1%} | "
+                  f"{np.mean(hits):>6.3f} | {write_ms:.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 50_000])
+    parser.add_argument("--vocab", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--bands", type=int, nargs="+", default=[32, 16])
+    args = parser.parse_args()
+    run(args.sizes, args.vocab, args.queries, args.bands)
@@ -0,0 +1,80 @@
+"""Memory and recall of the int8 / PCA question index versus float32.
+
+Usage:
+    python benchmarks/bench_quantized_index.py [--sizes 100000] [--pca 0 192 128 64]
+
+For each configuration this prints the index memory scaled to 100k
+questions, recall@5 against the exact float32 index both on compressed
+scores alone and after the float32 rerank of the best 5 * rerank rows, and
+the per-query latency. The corpus is the clustered synthetic one from
+bench_ann.py; real MiniLM embeddings are more compressible, so PCA numbers
+here are pessimistic.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_ann import synthetic_corpus  # noqa: E402
+from services.nlp.quantized import QuantizedIndex  # noqa: E402
+from services.nlp.similarity import VectorIndex, l2_normalize  # noqa: E402
+
+TOP_K = 5
+
+
+def recall(ids, truth) -> float:
+    return float(np.mean([len(set(a) & set(b)) / TOP_K for a, b in zip(ids, truth)]))
+
+
+def per_query_ms(index, queries) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query, TOP_K)
+    return (time.perf_counter() - start) * 1e3 / len(queries)
+
+
+def run(sizes, dim: int, n_queries: int, noise: float, pca_dims, rerank: int) -> None:
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        corpus = synthetic_corpus(n, dim, topics=max(n // 100, 10), noise=noise, rng=rng)
+        picks = rng.choice(n, n_queries, replace=False)
+        queries = l2_normalize(corpus[picks] + 0.5 * noise * rng.standard_normal((n_queries, dim)) / np.sqrt(dim))
+
+        exact = VectorIndex()
+        exact.build(corpus)
+        _, truth = exact.search(queries, TOP_K)
+        scale = 100_000 / n
+        print(f"\nn={n} dim={dim} rerank={rerank}")
+        print(f"{'index':>12} | {'MB/100k':>7} | {'recall@5':>8} | {'reranked':>8} | {'ms/query':>8}")
+        print(f"{'float32':>12} | {exact.matrix.nbytes * scale / 1e6:>7.1f} | {1.0:>8.3f} | {'-':>8} | "
+              f"{per_query_ms(exact, queries):>8.2f}")
+
+        def fetch(ids):
+            return corpus[ids]
+
+        for pca_dim in pca_dims:
+            index = QuantizedIndex(pca_dim=pca_dim or None, rerank=rerank)
+            index.build(corpus)
+            _, raw_ids = index.search(queries, TOP_K)
+            index.fetch = fetch
+            _, ids = index.search(queries, TOP_K)
+            name = f"int8/pca{pca_dim}" if pca_dim else "int8"
+            print(f"{name:>12} | {index.nbytes * scale / 1e6:>7.1f} | {recall(raw_ids, truth):>8.3f} | "
+                  f"{recall(ids, truth):>8.3f} | {per_query_ms(index, queries):>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=1.0)
+    parser.add_argument("--pca", type=int, nargs="+", default=[0, 192, 128, 64], help="0 = no PCA")
+    parser.add_argument("--rerank", type=int, default=4)
+    args = parser.parse_args()
+    run(args.sizes, args.dim, args.queries, args.noise, args.pca, args.rerank)
@@ -0,0 +1,106 @@
+"""Microbenchmarks of the Arabic normalization pipeline.
+
+Usage:
+    python benchmarks/bench_text_processing.py [--repeat 20]
+
+Compares the previous regex implementations of remove_diacritics,
+normalize_ar and tokens_from_text (re.sub per call, re-looked-up from the re
+module's pattern cache each time) with services/nlp/text_processing.py, on
+the texts of faq_data.json plus a set of user-like messages. "cold" clears
+the memo cache before every pass, so it measures the translate table alone;
+"warm" is the steady state of a running server.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from keyWords import ARABIC_STOPWORDS  # noqa: E402
+from services.nlp import text_processing as tp  # noqa: E402
+
+MESSAGES = ["ما هي الخدمات المتاحة؟", "كم سعر الباقة الشهرية لعاملة فلبينية", "مرحبا", "أريد حجز زيارة مسائية",
+            "هل يوجد عاملات بنظام الساعات في حي النرجس", "١٢٫٥", "Hello, what are your prices?"]
+
+
+def legacy_remove_diacritics(text):
+    return re.sub(r'[\u0610-\u061A\u064B-\u065F\u06D6-\u06ED]', '', text)
+
+
+def legacy_normalize_ar(text):
+    t = text.lower()
+    t = legacy_remove_diacritics(t)
+    t = re.sub(r'[^\u0600-\u06FF\s0-9٠١٢٣٤٥٦٧٨٩\.٫]', ' ', t)
+    return re.sub(r'\s+', ' ', t).strip()
+
+
+def legacy_tokens_from_text(text):
+    t = legacy_normalize_ar(text)
+    return [w for w in t.split() if w and w not in ARABIC_STOPWORDS]
+
+
+def corpus_texts():
+    with open(os.path.join(ROOT, "faq_data.json"), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    texts = []
+    for topic in data:
+        for qa in topic.get("questions", []):
+            texts.append(qa.get("question", ""))
+            answers = qa.get("answers", [])
+            texts.extend(answers if isinstance(answers, list) else [answers])
+    return [t for t in texts if t] + MESSAGES
+
+
+def per_text_us(fn, texts, repeat, before_pass=None) -> float:
+    total = 0.0
+    for _ in range(repeat):
+        if before_pass:
+            before_pass()
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        total += time.perf_counter() - start
+    return total * 1e6 / (repeat * len(texts))
+
+
+def per_text_us_batch(fn, texts, repeat, before_pass=None) -> float:
+    total = 0.0
+    for _ in range(repeat):
+        if before_pass:
+            before_pass()
+        start = time.perf_counter()
+        fn(texts)
+        total += time.perf_counter() - start
+    return total * 1e6 / (repeat * len(texts))
+
+
+def run(repeat: int) -> None:
+    texts = corpus_texts()
+    chars = sum(map(len, texts)) / len(texts)
+    print(f"{len(texts)} texts, {chars:.0f} chars on average, {repeat} passes")
+    print(f"{'function':>18} | {'legacy us':>9} | {'cold us':>8} | {'warm us':>8} | warm speedup")
+    rows = [
+        ("remove_diacritics", legacy_remove_diacritics, tp.remove_diacritics, False),
+        ("normalize_ar", legacy_normalize_ar, tp.normalize, False),
+        ("tokens_from_text", legacy_tokens_from_text, tp.tokenize, False),
+        ("normalize_many", lambda ts: [legacy_normalize_ar(t) for t in ts], tp.normalize_many, True),
+        ("tokenize_many", lambda ts: [legacy_tokens_from_text(t) for t in ts], tp.tokenize_many, True),
+    ]
+    for name, legacy, new, batch in rows:
+        measure = per_text_us_batch if batch else per_text_us
+        legacy_us = measure(legacy, texts, repeat)
+        cold_us = measure(new, texts, repeat, before_pass=tp.clear_caches)
+        measure(new, texts, 1)
+        warm_us = measure(new, texts, repeat)
+        print(f"{name:>18} | {legacy_us:>9.2f} | {cold_us:>8.2f} | {warm_us:>8.2f} | {legacy_us / warm_us:>6.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    run(args.repeat)
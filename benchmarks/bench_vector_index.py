@@ -0,0 +1,68 @@
+"""Benchmark VectorIndex against the previous sklearn NearestNeighbors path.
+
+Usage:
+    python benchmarks/bench_vector_index.py [--dim 384] [--queries 200]
+
+Vectors are random unit vectors of the MiniLM dimension; the numbers only
+depend on corpus size and dimension, not on the text behind the vectors.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.nlp.similarity import VectorIndex, l2_normalize  # noqa: E402
+
+TOP_K = 5
+SIZES = (1_000, 10_000, 100_000)
+
+
+def _timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def run(dim: int, n_queries: int) -> None:
+    from sklearn.neighbors import NearestNeighbors
+
+    rng = np.random.default_rng(0)
+    print(f"dim={dim} k={TOP_K} queries={n_queries}")
+    print(f"{'n':>8} | {'backend':>8} | {'build ms':>9} | {'1-query ms':>10} | {'batch ms/q':>10} | top-k agree")
+    for n in SIZES:
+        corpus = l2_normalize(rng.standard_normal((n, dim)))
+        queries = l2_normalize(rng.standard_normal((n_queries, dim)))
+
+        nn = NearestNeighbors(n_neighbors=TOP_K, metric="cosine")
+        _, nn_build = _timed(lambda: nn.fit(corpus))
+        _, nn_single = _timed(lambda: nn.kneighbors(queries[:1], n_neighbors=TOP_K), repeat=20)
+        (_, nn_ids), nn_batch = _timed(lambda: nn.kneighbors(queries, n_neighbors=TOP_K))
+
+        index = VectorIndex()
+        _, vi_build = _timed(lambda: index.build(corpus))
+        _, vi_single = _timed(lambda: index.search(queries[:1], TOP_K), repeat=20)
+        (_, vi_ids), vi_batch = _timed(lambda: index.search(queries, TOP_K))
+
+        agree = float(np.mean([set(a) == set(b) for a, b in zip(nn_ids, vi_ids)]))
+        for name, build, single, batch in (
+            ("sklearn", nn_build, nn_single, nn_batch),
+            ("numpy", vi_build, vi_single, vi_batch),
+        ):
+            print(
+                f"{n:>8} | {name:>8} | {build * 1e3:>9.2f} | {single * 1e3:>10.3f} | "
+                f"{batch * 1e3 / n_queries:>10.3f} | {agree:.3f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    run(args.dim, args.queries)
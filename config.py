@@ -8,7 +8,7 @@ import os
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
 # File paths
-FAQ_PATH = os.path.join(BASE_DIR, "faq.json")
+FAQ_PATH = os.path.join(BASE_DIR, "faq_data.json")
 USER_DATA_PATH = os.path.join(BASE_DIR, "user_data.json")
 USER_HISTORY_PATH = os.path.join(BASE_DIR, "user_history.json")
 USER_STATE_PATH = os.path.join(BASE_DIR, "user_state.json")
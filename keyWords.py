@@ -45,3 +45,21 @@ SERVICSE_KEYWORDS = [
     
 ]
 
+
+# معجم الألفاظ المسيئة لفحص السلامة المحلي (services/moderation.py)، يُطبَّع بنفس طريقة الرسائل.
+# كلمات مثل "كلب" و"حمار" و"وسخ" ترد في أسئلة عادية (حيوانات أليفة، تنظيف) فلا تُعد إساءة إلا بصيغة النداء
+ARABIC_OFFENSIVE_WORDS = {
+    "يا كلب", "يا حمار", "يا حيوان", "يا غبي", "يا غبية", "يا حقير", "يا حقيرة", "يا وسخ", "يا زبالة", "يا تافه",
+    "يا متخلف", "يا بهيم", "يا جزمة", "يا خنزير", "يا واطي", "يا نذل",
+    "ابن الكلب", "بنت الكلب", "ابن الحرام", "ابن الزنا", "يلعن", "يلعنك", "يلعن ابوك", "لعنة الله عليك", "الله يلعنك",
+    "تبا لك", "انقلع", "اخرس", "انطم", "كل زق", "كل خرا", "زق", "خرا",
+    "حقير", "منيوك", "منيك", "شرموط", "شرموطة", "شرموطه", "عرص", "معرص", "قحبة", "قحبه", "خول", "كس", "كسمك",
+    "كس امك", "طيز", "زب", "زبي", "نيك", "انيك", "متناك", "لوطي",
+    "سأقتلك", "ساقتلك", "بقتلك", "راح اقتلك", "اذبحك",
+}
+ENGLISH_OFFENSIVE_WORDS = {
+    "fuck", "fucking", "fucked", "fucker", "motherfucker", "fuck you", "fck", "fuk", "stfu", "wtf",
+    "shit", "bullshit", "bitch", "bastard", "asshole", "dickhead", "cunt", "whore", "slut", "retard",
+    "dumbass", "moron", "you idiot", "you stupid", "piss off", "go to hell", "son of a bitch", "screw you",
+    "kill you", "i will kill you",
+}
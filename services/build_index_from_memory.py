@@ -1,10 +1,9 @@
-from .state import QUESTIONS, NN_MODEL, EMBEDDER, TOP_K
+from .state import new_vector_index
+from .embedding_cache import encode_questions
 
 
-def build_index_from_memory():
-    global NN_MODEL 
-    if not QUESTIONS:
-        return
-    embeddings = EMBEDDER.encode(QUESTIONS, show_progress_bar=False)
-    NN_MODEL = NN_MODEL.__class__(n_neighbors=min(len(QUESTIONS), TOP_K), metric="cosine")
-    NN_MODEL.fit(embeddings)
+def build_index_from_memory(questions):
+    # يُبنى فهرس متجهات جديد جانباً ثم يُنشر ضمن لقطة الفهرس (IndexSnapshot)
+    vectors = new_vector_index()
+    vectors.build(encode_questions(list(questions)))
+    return vectors
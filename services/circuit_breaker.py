@@ -0,0 +1,78 @@
+"""Circuit breaker in front of Gemini.
+
+After ``failure_threshold`` consecutive failures (errors, timeouts or calls
+that used more than ``slow_call_ratio`` of their timeout) the breaker opens: calls are refused at once
+and callers take their local path (Arabic as the language, the FAQ answer
+untranslated, packages formatted locally) instead of waiting on a failing
+service. After ``reset_seconds`` one probe call is let through (half-open);
+its outcome closes the breaker or opens it again.
+"""
+
+from typing import Any, Dict, Optional
+import logging
+import threading
+import time
+
+LOGGER = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, slow_call_ratio: float = 0.9,
+                 reset_seconds: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.slow_call_ratio = slow_call_ratio
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """True if a call may go out now; counts the refusals."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self._probing):
+                self._probing = self.state == HALF_OPEN
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok: bool, elapsed: float, timeout: float) -> None:
+        """Report the outcome of an allowed call that had ``timeout`` seconds."""
+        failed = not ok or elapsed > self.slow_call_ratio * timeout
+        with self._lock:
+            self._probing = False
+            if not failed:
+                self.state, self.failures = CLOSED, 0
+                return
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.state, self._opened_at = OPEN, time.monotonic()
+                self.opened += 1
+                LOGGER.warning("⚠️ تم إيقاف استدعاءات Gemini مؤقتاً بعد %s إخفاقات متتالية", self.failures)
+
+    def release(self) -> None:
+        """End an allowed call whose outcome says nothing about the service
+        (e.g. the caller's own deadline ran out); a half-open breaker lets
+        the next call probe instead."""
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = round(max(self.reset_seconds - (time.monotonic() - self._opened_at), 0.0), 1)
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.opened,
+                "rejected_calls": self.rejected,
+                "retry_in_s": retry_in,
+            }
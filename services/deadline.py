@@ -0,0 +1,31 @@
+"""Per-request time budget for remote calls.
+
+get_best_answer opens a deadline of REQUEST_DEADLINE_S seconds; every
+Gemini call made for the request (services/llm_gateway.py) gets what is left
+of it as its timeout instead of waiting indefinitely. The deadline lives in a
+context variable, so the stages started by services/stage_executor.py, which
+run in the request's context, draw from the same budget.
+"""
+
+from contextlib import contextmanager
+from typing import Iterator, Optional
+import contextvars
+import time
+
+_DEADLINE: "contextvars.ContextVar[Optional[float]]" = contextvars.ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(seconds: float) -> Iterator[None]:
+    """Give the code in the block ``seconds`` for its remote calls."""
+    token = _DEADLINE.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current request (None outside a request)."""
+    deadline = _DEADLINE.get()
+    return None if deadline is None else deadline - time.monotonic()
@@ -0,0 +1,95 @@
+"""Micro-batching front end for the sentence embedder.
+
+Under a threaded server every /chat request used to call the embedder with
+a batch of one. EmbeddingBatcher queues those calls, lets a single worker
+thread collect whatever arrives within a short window (or until ``max_batch``
+texts are pending), runs one batched encode, and hands each caller its rows.
+The window is skipped while traffic is sequential, so a single client sees no
+added latency.
+"""
+
+from concurrent.futures import Future
+from typing import Callable, List, Sequence, Tuple
+import logging
+import queue
+import threading
+import time
+
+import numpy as np
+
+LOGGER = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """Collects concurrent ``encode`` calls into batched model calls."""
+
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray],
+                 max_batch: int = 32, max_wait_ms: float = 5.0) -> None:
+        self.encode_fn = encode_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.items = 0
+        self._last_callers = 0
+        self._queue: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Encode ``texts`` as part of the next batch; blocks until done."""
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((list(texts), future))
+        return future.result()
+
+    def _collect(self) -> List[Tuple[List[str], Future]]:
+        batch = [self._queue.get()]
+        pending = len(batch[0][0])
+        # a lone caller on an idle server should not pay the batching window:
+        # only wait when the previous batch shows concurrent traffic
+        wait = self.max_wait if self._last_callers > 1 or not self._queue.empty() else 0.0
+        deadline = time.monotonic() + wait
+        while pending < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            pending += len(item[0])
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            texts = [text for item_texts, _ in batch for text in item_texts]
+            try:
+                vectors = np.asarray(self.encode_fn(texts), dtype=np.float32)
+            except Exception as exc:
+                LOGGER.warning("⚠️ فشل ترميز دفعة من %s نص: %s", len(texts), exc)
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+
+            self.batches += 1
+            self.items += len(texts)
+            self._last_callers = len(batch)
+            offset = 0
+            for item_texts, future in batch:
+                future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
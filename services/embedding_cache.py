@@ -0,0 +1,210 @@
+"""Persistent cache of FAQ question embeddings stored in qa.db.
+
+Each row of the ``qa`` table holds the float32 embedding of one question,
+keyed by a hash of the normalized question text and the embedder model key
+(model name plus inference backend).
+Rebuilding the index therefore only encodes questions that are new or whose
+text changed since the last build.
+
+The schema is checked once per process. load_question_vectors runs on every
+int8 rerank, so each thread keeps one read connection open for it instead of
+connecting per query.
+"""
+
+from typing import Dict, List, Sequence
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import unicodedata
+
+import numpy as np
+
+from .normalize_ar import normalize_ar
+from .state import get_embedder, EMBEDDER_MODEL_KEY, QA_DB_PATH
+
+LOGGER = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+# Databases whose schema was already checked by this process
+_READY_PATHS = set()
+_READY_LOCK = threading.Lock()
+# Per-thread read connection of load_question_vectors (``conn`` and ``path``)
+_READERS = threading.local()
+
+
+_ARABIC_BLOCKS = ((0x0600, 0x06FF), (0x0750, 0x077F), (0x08A0, 0x08FF), (0xFB50, 0xFDFF), (0xFE70, 0xFEFF))
+
+
+class _OtherScriptTable(dict):
+    """``str.translate`` table keeping letters, marks and digits outside the
+    Arabic blocks (Latin with accents, Cyrillic, CJK, Devanagari, ...), which
+    normalize_ar drops; everything else becomes a space."""
+
+    def __missing__(self, cp: int) -> str:
+        char = chr(cp)
+        keep = unicodedata.category(char)[0] in "LMN" and not any(lo <= cp <= hi for lo, hi in _ARABIC_BLOCKS)
+        self[cp] = value = char if keep else " "
+        return value
+
+
+_OTHER_SCRIPT_TABLE = _OtherScriptTable()
+
+# normalized_key() of a text without letters or digits (emoji, punctuation)
+EMPTY_KEY = "\x1f"
+
+
+def normalized_key(text: str) -> str:
+    """Return the normalized form of ``text`` used as a cache key.
+
+    normalize_ar drops non-Arabic letters, so the words of every other script
+    (NFKC, case-folded) are appended separately to keep English, accented or
+    Cyrillic questions from colliding on an empty key. For Arabic and ASCII
+    text the key is unchanged, so stored embeddings stay valid. Texts with
+    neither give EMPTY_KEY, which callers must not cache on.
+    """
+    other = " ".join(unicodedata.normalize("NFKC", text).casefold().translate(_OTHER_SCRIPT_TABLE).split())
+    return f"{normalize_ar(text)}\x1f{other}"
+
+
+def question_hash(question: str) -> str:
+    """Return a stable hash of the normalized form of ``question``."""
+    return hashlib.sha1(normalized_key(question).encode("utf-8")).hexdigest()
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(QA_DB_PATH, timeout=10)
+    if QA_DB_PATH not in _READY_PATHS:
+        with _READY_LOCK:
+            if QA_DB_PATH not in _READY_PATHS:
+                _create_schema(conn)
+                _READY_PATHS.add(QA_DB_PATH)
+    return conn
+
+
+def _read_connection() -> sqlite3.Connection:
+    conn = getattr(_READERS, "conn", None)
+    if conn is None or _READERS.path != QA_DB_PATH:
+        if conn is not None:
+            conn.close()
+        conn = _READERS.conn = _connect()
+        _READERS.path = QA_DB_PATH
+    return conn
+
+
+def _drop_read_connection() -> None:
+    conn = getattr(_READERS, "conn", None)
+    _READERS.conn = None
+    if conn is not None:
+        conn.close()
+
+
+def _create_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS qa (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            question TEXT,
+            embedding BLOB,
+            answer TEXT
+        )
+        """
+    )
+    # qa.db was created before the cache existed: add the key columns in place
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(qa)")}
+    for name, decl in (("q_hash", "TEXT"), ("model", "TEXT"), ("dim", "INTEGER")):
+        if name not in columns:
+            conn.execute(f"ALTER TABLE qa ADD COLUMN {name} {decl}")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_qa_hash_model ON qa(q_hash, model)")
+    conn.commit()
+
+
+def _load_cached(conn: sqlite3.Connection, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+    cached = {}
+    for start in range(0, len(keys), _QUERY_CHUNK):
+        chunk = keys[start:start + _QUERY_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        rows = conn.execute(
+            f"SELECT q_hash, embedding, dim FROM qa WHERE model = ? AND q_hash IN ({placeholders})",
+            [EMBEDDER_MODEL_KEY, *chunk],
+        )
+        for q_hash, blob, dim in rows:
+            vec = np.frombuffer(blob, dtype=np.float32)
+            if vec.shape[0] == dim:
+                cached[q_hash] = vec
+    return cached
+
+
+def _store(conn: sqlite3.Connection, entries: Dict[str, str], vectors: np.ndarray) -> None:
+    rows = [
+        (question, vec.tobytes(), q_hash, EMBEDDER_MODEL_KEY, int(vec.shape[0]))
+        for (q_hash, question), vec in zip(entries.items(), vectors)
+    ]
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO qa (question, embedding, q_hash, model, dim) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(q_hash, model) DO UPDATE SET
+                question = excluded.question, embedding = excluded.embedding, dim = excluded.dim
+            """,
+            rows,
+        )
+
+
+def encode_questions(questions: List[str]) -> np.ndarray:
+    """Return float32 embeddings for ``questions``, encoding only cache misses."""
+    if not questions:
+        return np.zeros((0, 0), dtype=np.float32)
+    keys = [question_hash(q) for q in questions]
+
+    try:
+        conn = _connect()
+    except sqlite3.Error as exc:
+        LOGGER.warning("⚠️ تعذر فتح ذاكرة التضمينات %s: %s", QA_DB_PATH, exc)
+        return np.asarray(get_embedder().encode(questions, show_progress_bar=False), dtype=np.float32)
+
+    try:
+        cached = _load_cached(conn, list(dict.fromkeys(keys)))
+        # one entry per distinct key, so duplicated questions are encoded once
+        missing = {}
+        for key, question in zip(keys, questions):
+            if key not in cached and key not in missing:
+                missing[key] = question
+
+        if missing:
+            vectors = np.asarray(
+                get_embedder().encode(list(missing.values()), show_progress_bar=False),
+                dtype=np.float32,
+            )
+            try:
+                _store(conn, missing, vectors)
+            except sqlite3.Error as exc:
+                LOGGER.warning("⚠️ تعذر حفظ التضمينات في %s: %s", QA_DB_PATH, exc)
+            cached.update(zip(missing.keys(), vectors))
+
+        LOGGER.info("🧠 التضمينات: %s من الذاكرة، %s جديدة", len(keys) - len(missing), len(missing))
+        return np.vstack([cached[key] for key in keys]).astype(np.float32, copy=False)
+    finally:
+        conn.close()
+
+
+def load_question_vectors(questions: List[str]) -> np.ndarray:
+    """Return the stored float32 embeddings of already indexed ``questions``.
+
+    Used by the compressed index to rerank candidates in full precision;
+    anything missing from qa.db falls back to encode_questions.
+    """
+    keys = [question_hash(q) for q in questions]
+    try:
+        cached = _load_cached(_read_connection(), list(dict.fromkeys(keys)))
+    except sqlite3.Error as exc:
+        LOGGER.warning("⚠️ تعذر قراءة التضمينات من %s: %s", QA_DB_PATH, exc)
+        # يُعاد فتح الاتصال في المرة القادمة
+        _drop_read_connection()
+        cached = {}
+    if len(cached) < len(set(keys)):
+        return encode_questions(questions)
+    return np.vstack([cached[key] for key in keys]).astype(np.float32, copy=False)
@@ -0,0 +1,19 @@
+from .state import get_index
+
+
+def faq_duplicates(threshold=0.6):
+    """Report near-duplicate questions in the whole corpus.
+
+    Uses the MinHash LSH of the current snapshot, so only candidate pairs are
+    scored. Each entry names a question, the question it duplicates and their
+    token_overlap_score (measured against the duplicated question's tokens).
+    """
+    index = get_index()
+    report = []
+    for row, other, score in index.duplicate_pairs(threshold):
+        report.append({
+            "question": index.questions[row],
+            "duplicate_of": index.questions[other],
+            "score": round(score, 3),
+        })
+    return report
@@ -0,0 +1,94 @@
+"""Incremental updates of the in-memory FAQ index.
+
+initialize_memory() rebuilds everything from faq.db (faq_store.py). The helpers here
+apply a single change instead: they derive a new IndexSnapshot that differs
+in one row, encode at most one question, and publish it. Every actual change
+gets a new version, which invalidates cached replies (response_cache.py).
+
+A snapshot is published with its BM25 scorer already fitted, so the writer
+pays for the fit and not the next /chat request.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+import threading
+
+from .embedding_cache import encode_questions
+from .state import get_index, publish_index
+
+# Serializes writers (full rebuilds and incremental updates); readers never
+# take it, they use whichever snapshot get_index() returned
+INDEX_LOCK = threading.RLock()
+
+
+def _publish(snapshot) -> None:
+    # الكتابة تتحمل كلفة ملاءمة BM25 بدلاً من أول طلب يقرأ اللقطة
+    if not snapshot.token_scorer.fitted:
+        snapshot.token_scorer.fit()
+    publish_index(snapshot)
+
+
+def find_question(question: str) -> Optional[int]:
+    """Return the row index of ``question`` or None if it is not indexed."""
+    return get_index().find(question)
+
+
+def add_qa(question: str, answer: str) -> int:
+    """Append one Q&A pair to the index and return its row index."""
+    vector = encode_questions([question])[0]
+    with INDEX_LOCK:
+        index = get_index()
+        _publish(index.with_added(question, answer, vector))
+        return len(index)
+
+
+def update_qa(idx: int, question: Optional[str] = None, answer: Optional[str] = None) -> None:
+    """Replace the question and/or answer stored at row ``idx``.
+
+    Changing only the answer does not touch the embeddings, and a call that
+    changes nothing is a no-op.
+    """
+    vector = None
+    if question is not None and question != get_index().questions[idx]:
+        vector = encode_questions([question])[0]
+    with INDEX_LOCK:
+        index = get_index()
+        if vector is None:
+            question = None
+        if answer is not None and answer == index.answers[idx]:
+            answer = None
+        if question is None and answer is None:
+            return
+        _publish(index.with_updated(idx, question=question, answer=answer, vector=vector))
+
+
+def remove_qa(idx: int) -> None:
+    """Drop row ``idx``; rows after it shift down by one."""
+    with INDEX_LOCK:
+        _publish(get_index().with_removed(idx))
+
+
+def apply_qa_batch(changes: Sequence[Tuple[str, List[str]]]) -> None:
+    """Apply several ``(question, answers)`` changes and publish once.
+
+    A question that is not indexed is added, an indexed one gets the new
+    answers, and an empty answer list removes it. New questions are encoded
+    in one batch, and the index is cloned once for all of the changes
+    (IndexSnapshot.with_changes).
+    """
+    indexed = get_index()
+    new_questions = [q for q, answers in changes if answers and indexed.find(q) is None]
+    vectors = dict(zip(new_questions, encode_questions(new_questions))) if new_questions else {}
+    with INDEX_LOCK:
+        index = get_index()
+        indexed = {q: index.find(q) is not None for q, _ in changes}
+        rows = []
+        for question, answers in changes:
+            answer = "\n".join(answers) if answers else None
+            vector = None
+            if answer is not None and not indexed[question]:
+                vector = vectors[question] if question in vectors else encode_questions([question])[0]
+            indexed[question] = answer is not None
+            rows.append((question, answer, vector))
+        snapshot = index.with_changes(rows)
+        if snapshot is not index:
+            _publish(snapshot)
@@ -0,0 +1,175 @@
+"""FAQ corpus stored in faq.db.
+
+Every reader and writer of the FAQ goes through this module; faq_data.json
+is only the seed imported into an empty database. Each row of the ``faq``
+table is one Q&A pair:
+
+* ``question``: unique-indexed, so an upsert is a single indexed write;
+* ``topic``: indexed, the topic the pair is listed under;
+* ``answers``: the answer lines as a JSON array;
+* ``answer``: the same lines joined by newlines, as the table stored before.
+
+Rows keep insertion order through their id, so load_faq_data() returns topics
+and questions in the order they were added. The ``meta`` table holds a
+``version`` counter that every write bumps in the same transaction, and the
+writers return the version they produced. initialize_memory.py compares it
+with the version the live index was built from, so a write made by another
+process (another worker, or a script editing faq.db) is picked up. The
+database runs in WAL mode, so readers never block on a writer.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+from .state import FAQ_DB_PATH, FAQ_PATH
+
+LOGGER = logging.getLogger(__name__)
+
+# Databases whose schema was already checked by this process; the lock keeps
+# two threads from creating the schema and importing the seed at once
+_READY_PATHS = set()
+_READY_LOCK = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(FAQ_DB_PATH, timeout=10)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if FAQ_DB_PATH not in _READY_PATHS:
+        with _READY_LOCK:
+            if FAQ_DB_PATH not in _READY_PATHS:
+                _create_schema(conn)
+                _import_seed(conn)
+                _READY_PATHS.add(FAQ_DB_PATH)
+    return conn
+
+
+def _create_schema(conn: sqlite3.Connection) -> None:
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS faq (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            question TEXT,
+            answer TEXT
+        )
+        """
+    )
+    # faq.db predates the store: add the new columns in place
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(faq)")}
+    for name in ("topic", "answers"):
+        if name not in columns:
+            conn.execute(f"ALTER TABLE faq ADD COLUMN {name} TEXT")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_faq_question ON faq(question)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_faq_topic ON faq(topic)")
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+    conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0)")
+    conn.commit()
+
+
+def _bump_version(conn: sqlite3.Connection) -> int:
+    conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+    return _current_version(conn)
+
+
+def _upsert(conn: sqlite3.Connection, question: str, answers: Sequence[str], topic: Optional[str]) -> None:
+    conn.execute(
+        """
+        INSERT INTO faq (question, answer, answers, topic) VALUES (?, ?, ?, ?)
+        ON CONFLICT(question) DO UPDATE SET
+            answer = excluded.answer, answers = excluded.answers,
+            topic = COALESCE(excluded.topic, faq.topic)
+        """,
+        (question, "\n".join(answers), json.dumps(list(answers), ensure_ascii=False), topic),
+    )
+
+
+def _current_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+
+def _import_seed(conn: sqlite3.Connection) -> None:
+    # only a store that was never written to (version 0) is seeded
+    if _current_version(conn) or not os.path.exists(FAQ_PATH):
+        return
+    try:
+        with open(FAQ_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as exc:
+        LOGGER.warning("⚠️ تعذر قراءة %s لاستيراده: %s", FAQ_PATH, exc)
+        return
+    with conn:
+        _write_all(conn, data)
+    LOGGER.info("📥 تم استيراد %s إلى %s", FAQ_PATH, FAQ_DB_PATH)
+
+
+def _write_all(conn: sqlite3.Connection, data: List[Dict[str, Any]]) -> int:
+    for topic in data:
+        for qa in topic.get("questions", []):
+            if qa.get("question"):
+                _upsert(conn, qa["question"], qa.get("answers", []), topic.get("topic"))
+    return _bump_version(conn)
+
+
+def load_all() -> List[Dict[str, Any]]:
+    """Return the corpus in the faq_data.json layout (topics with their Q&A)."""
+    conn = _connect()
+    try:
+        rows = conn.execute("SELECT topic, question, answers, answer FROM faq ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+    topics: Dict[Optional[str], Dict[str, Any]] = {}
+    for topic, question, answers, answer in rows:
+        entry = topics.setdefault(topic, {"topic": topic, "questions": []})
+        entry["questions"].append({
+            "question": question,
+            "answers": json.loads(answers) if answers is not None else (answer or "").split("\n"),
+        })
+    return list(topics.values())
+
+
+def replace_all(data: List[Dict[str, Any]]) -> int:
+    """Replace the whole corpus (``data`` in the faq_data.json layout)."""
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute("DELETE FROM faq")
+            return _write_all(conn, data)
+    finally:
+        conn.close()
+
+
+def upsert_qa(question: str, answers: Sequence[str], topic: Optional[str] = None) -> int:
+    """Insert ``question`` or replace its answers (and topic, if given)."""
+    conn = _connect()
+    try:
+        with conn:
+            _upsert(conn, question, answers, topic)
+            return _bump_version(conn)
+    finally:
+        conn.close()
+
+
+def upsert_many(rows: Iterable[Tuple[str, Sequence[str], Optional[str]]]) -> int:
+    """upsert_qa() for several ``(question, answers, topic)`` rows in one
+    transaction (and one version bump)."""
+    conn = _connect()
+    try:
+        with conn:
+            for question, answers, topic in rows:
+                _upsert(conn, question, answers, topic)
+            return _bump_version(conn)
+    finally:
+        conn.close()
+
+
+def version() -> int:
+    conn = _connect()
+    try:
+        return _current_version(conn)
+    finally:
+        conn.close()
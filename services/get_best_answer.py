@@ -3,13 +3,14 @@ import re
 import json
 import os
 import logging
-import google.generativeai as genai
+import numpy as np
 import requests
 
 from typing import Any, Dict, List
 
 from .check_text_safety import check_text_safety
 from .normalize_ar import normalize_ar
+from .nlp.text_processing import normalize_many
 from .tokens_from_text import tokens_from_text
 from .filter_answers_by_query import filter_answers_by_query
 from .fetch_services_from_api import (
@@ -17,10 +18,25 @@ from .fetch_services_from_api import (
     fetch_service_by_number,
     is_other_option,
 )
-from .state import QUESTIONS, ANSWERS, TOKEN_SETS, NN_MODEL, EMBEDDER, TOP_K, COMBINED_THRESHOLD
-from .save_or_update_qa import save_or_update_qa
+from .state import (
+    corpus_version,
+    get_index,
+    TOP_K,
+    EMB_WEIGHT,
+    TOKEN_WEIGHT,
+    COMBINED_THRESHOLD,
+    REQUEST_DEADLINE_S,
+)
+from .qa_writer import QA_WRITER
+from .stage_executor import STAGES
+from .deadline import request_deadline
+from .preprocess_message import preprocess_message
+from .llm_gateway import LLM
+from .nlp.greetings import match_small_talk
+from .nlp.langid import identify_language
+from . import response_cache
+from .query_embedding import encode_query
 from keyWords import SERVICSE_KEYWORDS
-from services.load_faq_data import load_faq_data
 from .user_info_manager import (
     collect_user_info,
     update_user_info,
@@ -43,12 +59,37 @@ from .save_fixed_package import (
 )
 
 LOGGER = logging.getLogger(__name__)
+
+# الكلمات المفتاحية بعد التطبيع نفسه المطبق على السؤال (ة -> ه ...)؛ الكلمات
+# الإنجليزية تصبح فارغة بعد التطبيع فتُستبعد حتى لا تطابق أي نص
+SERVICE_KEYWORDS_NORMALIZED = [word for word in dict.fromkeys(normalize_many(SERVICSE_KEYWORDS)) if word]
 if not LOGGER.handlers:
     logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
+# لغة رسالة الرفض حسب لغة المستخدم، والعربية لبقية اللغات
+REFUSAL_LANGUAGES = {"Arabic": "ar", "English": "en", "French": "fr", "Spanish": "es"}
+
 CITY_API = "https://erp.rnr.sa:8005/ar/api/city/ActiveCities"
 CITYDISTRICT_API = "https://erp.rnr.sa:8005/ar/api/city/CityDistricts?cityId"
 def get_best_answer(user_input):
+    # المراحل المستقلة (فحص السلامة والإجابة من الـ FAQ) تعمل بالتوازي، وما لم يُستخدم منها يُلغى عند الخروج.
+    # كل استدعاءات Gemini للطلب تقتطع من مهلة واحدة (REQUEST_DEADLINE_S)
+    with request_deadline(REQUEST_DEADLINE_S), STAGES.run() as stages:
+        return _get_best_answer(user_input, stages)
+
+
+def _may_reach_faq(user_input, user_data, normalized_digits):
+    """False when the form or selection handlers of _get_best_answer will
+    answer the message themselves (mirrors their conditions)."""
+    missing = any(not user_data.get(field) for field in ["name", "phone", "city", "district"])
+    if missing and user_input.strip() and not any(x in user_input for x in ["اسم", "رقم", "مدينة", "حي"]):
+        return False
+    if re.fullmatch(r"\d+(\.\d+)?", normalized_digits):
+        return False
+    return not re.fullmatch(r"\s*([12]|[A-Za-z][12]|[A-Za-z])\s*$", user_input)
+
+
+def _get_best_answer(user_input, stages):
     user_data = load_user_data()
 
     # نطبع نسخة مُطَبَّعة من السؤال مبكراً لاستخدامها في اكتشاف الخدمات
@@ -120,16 +161,27 @@ def get_best_answer(user_input):
         # Fallback generic message if there's no pending query
         return "✅ تم حفظ تفاصيل العنوان بنجاح! يمكنك المتابعة الآن."
 
+    # =====================
+    # التحيات والمجاملات (مرحبا، hello، bonjour، شكراً...) يُرد عليها محلياً دون أي استدعاء خارجي
+    # =====================
+    small_talk = match_small_talk(user_input)
+    if small_talk:
+        return small_talk.reply
+
     # =====================
     # معالجة أسئلة عن الخدمات
      
     # أولاً: إذا المستخدم يسأل عن الخدمات، نتحقق هل لدينا بياناته كاملة
-    service_related = any(word in normalized_q for word in SERVICSE_KEYWORDS)
+    service_related = any(word in normalized_q for word in SERVICE_KEYWORDS_NORMALIZED)
     # إذا السؤال ليس عن الخدمات، جرب الإجابة من faq_data أولا
     if not service_related:
         try:
-            data = load_faq_data()
-            faq_answer = filter_answers_by_query(user_input, data)
+            # الإصدار يُقرأ قبل الحساب: أي تعديل على الـ FAQ أثناءه يجعل الرد المخزن غير قابل للاسترجاع
+            version = corpus_version()
+            hit, faq_answer = response_cache.lookup("faq", user_input)
+            if not hit:
+                faq_answer = filter_answers_by_query(user_input)
+                response_cache.store("faq", user_input, faq_answer, version)
             if faq_answer:
                 return faq_answer
         except Exception as e:
@@ -188,13 +240,32 @@ def get_best_answer(user_input):
     except Exception as e:
         print(f"⚠️ خطأ أثناء معالجة تأكيد الطلب: {e}")
 
-    if not check_text_safety(user_input):
+    # If the user input is just a number (Arabic-Indic or Western numerals), treat it as a selection
+    trans = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
+    normalized_digits = normalized_q.translate(trans).strip()
+    # التعرف على اختيار رقمي أو بصيغة نقطية (مثل 1.2 أو ١.٢)
+    # نحول الأرقام العربية ثم نعوض الفاصل العربي "٫" إلى نقطة
+    normalized_digits = normalized_digits.replace("٫", ".").replace(",", ".").replace(" ", "")
+
+    # فحص السلامة والإجابة من الـ FAQ لا يعتمد أحدهما على الآخر فيعملان معاً. الإجابة تخمينية:
+    # لا تبدأ إذا كانت في ذاكرة الردود أو إذا كانت معالجات الحقول والاختيارات أدناه ستجيب بنفسها
+    answer_hit = None
+    answer_version = corpus_version()
+    if _may_reach_faq(user_input, user_data, normalized_digits):
+        answer_hit = response_cache.lookup("answer", user_input)
+        if not answer_hit[0]:
+            stages.start("answer", _answer_from_faq, user_input)
+
+    # فحص السلامة على خيط الطلب نفسه حتى لا ينتظر في المجمّع خلف إجابات تخمينية لطلبات أخرى
+    if not stages.call("safety", check_text_safety, user_input):
         responses = {
             "ar": "عذراً، هذا أسلوب غير لائق. نرجو التحدث باحترام. شكراً لتفهمك 🚫",
             "en": "Sorry, this language is inappropriate. Please communicate respectfully. Thank you for understanding 🚫",
             "fr": "Désolé, ce langage est inapproprié. Veuillez communiquer respectueusement. Merci de votre compréhension 🚫",
             "es": "Lo siento, este lenguaje es inapropiado. Por favor, comuníquese respetuosamente. Gracias por su comprensión 🚫"
         }
+        language = identify_language(user_input).language
+        return responses.get(REFUSAL_LANGUAGES.get(language, "ar"), responses["ar"])
 
     # إذا المستخدم يرسل بيانات مطلوبة (الاسم، الهاتف، المدينة، الحي) فنسجلها
     # لا نعتبر المرسل يسأل عن الحقل اذا كتب كلمات مثل 'اسم' أو 'رقم' أو 'مدينة' أو 'حي' (سؤال)
@@ -322,13 +393,6 @@ def get_best_answer(user_input):
 
             # إذا كتب المستخدم شيئًا يبدو كسؤال عن الحقل (مثل 'ما اسمك؟')، نتجاهل هذا الجزء من التخزين
 
-    # If the user input is just a number (Arabic-Indic or Western numerals), treat it as a selection
-    trans = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
-    normalized_digits = normalized_q.translate(trans).strip()
-    # التعرف على اختيار رقمي أو بصيغة نقطية (مثل 1.2 أو ١.٢)
-    # نحول الأرقام العربية ثم نعوض الفاصل العربي "٫" إلى نقطة
-    normalized_digits = normalized_digits.replace("٫", ".").replace(",", ".").replace(" ", "")
-
     # التحقق من أن المدخل هو اختيار موعد (مثل A1 أو 1)
     shift_match = re.fullmatch(r"\s*([12]|[A-Za-z][12])\s*$", user_input)
     if shift_match:
@@ -436,133 +500,114 @@ def get_best_answer(user_input):
             LOGGER.warning("⚠️ خطأ أثناء معالجة اختيار الموعد: %s", exc)
             return "⚠️ حدث خطأ أثناء معالجة اختيار الموعد. حاول مرة أخرى لاحقاً."
 
+    # الرد هنا يعتمد على نص الرسالة ومحتوى الـ FAQ فقط، فيُخزَّن مؤقتاً
+    hit, cached = answer_hit or response_cache.lookup("answer", user_input)
+    if hit:
+        reply, learned = cached
+    else:
+        # عادةً بدأت منذ فحص السلامة
+        reply, learned, complete = stages.result("answer") if "answer" in stages else _answer_from_faq(user_input)
+        # الحفظ يتم في الخلفية (services/qa_writer.py)، ولا تُحفظ ردود "لم أجد إجابة"
+        if learned:
+            QA_WRITER.enqueue(*learned)
+        # لا نخزن رداً تعطلت فيه إحدى خطوات Gemini (لغة أو ترجمة ناقصة)
+        if complete:
+            response_cache.store("answer", user_input, (reply, learned), answer_version)
+    if learned:
+        # 🟩 في النهاية، بعد توليد الإجابة، نتحقق من بيانات المستخدم
+        msg, next_field = collect_user_info()
+        if msg:
+            # نضيف سؤال البيانات بعد الإجابة الأصلية
+            return f"{reply}\n\n📋 {msg}"
+    return reply
+
+
+def _answer_from_faq(user_input):
+    """Detect the language, translate, retrieve and translate back.
+
+    Returns ``(reply, learned, complete)``: ``learned`` is the
+    ``(question, answer)`` pair to save back into the FAQ when the reply came
+    from retrieval (None otherwise), ``complete`` is False when a Gemini step
+    failed and the reply should not be cached. Runs as a speculative stage, so
+    it has no side effects: the caller saves ``learned``.
+    """
     original_text = user_input
     answer = ""
+    complete = True
 
     t1 = time.time()
-    model = genai.GenerativeModel("models/gemini-2.5-pro")
+    translated_for_search = user_input
     try:
-        resp = model.generate_content(
-            f"""
-            If the sender asks you for help, reply that you are here to help him.
-            You are a multilingual assistant.
-            Step 1️⃣: Detect the language of this text.
-            Step 2️⃣: If the text is only a greeting (like hello, hi, مرحبا, hola, bonjour, etc.), 
-            then reply in the same detected language with a warm greeting message followed by "How can I help you today?" in that language.
-            Step 3️⃣: Otherwise, just reply with the language name only (Arabic, English, French, etc.).
-            
-            User text:
-            {user_input}
-            """
-        )
-
-        detected_text = resp.text.strip()
-
-        if any(word in detected_text.lower() for word in ["help", "مساعدتك", "aider", "ayudar", "aiutare"]):
-            return detected_text
-
-        detected_lang = detected_text.split()[0].capitalize()
-
+        # استدعاء واحد بمخرجات JSON: اللغة، هل هي تحية، رد التحية، والترجمة إلى العربية
+        pre = preprocess_message(user_input)
+        if pre["is_greeting"]:
+            return pre["greeting_reply"], None, True
+        detected_lang = pre["language"]
+        translated_for_search = pre["arabic_translation"]
     except Exception as e:
         print("⚠️ فشل في تحديد اللغة أو الرد الترحيبي:", e)
         detected_lang = "Arabic"
+        complete = False
 
     t2 = time.time()
-    translated_for_search = user_input
-    if detected_lang.lower() != "arabic":
-        try:
-            model = genai.GenerativeModel("models/gemini-2.5-pro")
-            prompt = (
-                "Translate the following text to Arabic. "
-                "Reply ONLY with the translated Arabic text, no explanations, no notes, no markdown:\n\n"
-                f"{user_input}"
-            )
-            resp = model.generate_content(prompt)
-            translated_for_search = re.sub(
-                r"(?i)(here is the translation|translation|of course|sure|the answer is|:)",
-                "",
-                resp.text.strip(),
-            ).strip()
-        except Exception as e:
-            print("⚠️ خطأ أثناء الترجمة:", e)
-
-    data = load_faq_data()
     normalized_q = normalize_ar(translated_for_search)
 
-    filtered_answers = filter_answers_by_query(translated_for_search, data)
+    filtered_answers = filter_answers_by_query(translated_for_search)
     if filtered_answers:
         if detected_lang.lower() != "arabic":
             try:
-                model = genai.GenerativeModel("models/gemini-2.5-pro")
                 prompt = (
                     f"Translate the following Arabic text to {detected_lang}. "
                     "Reply ONLY with the translated text, no explanations:\n\n"
                     f"{filtered_answers}"
                 )
-                resp = model.generate_content(prompt)
                 clean_text = re.sub(
                     r"(?i)(here is the translation|of course|translation|sure|the answer is|Here is the English|:)",
                     "",
-                    resp.text.strip()
+                    LLM.text("translation", prompt)
                 ).strip()
-                return clean_text
+                return clean_text, None, complete
             except Exception as e:
                 print("⚠️ خطأ أثناء ترجمة الإجابات المفلترة:", e)
-                return filtered_answers
-        return filtered_answers
+                return filtered_answers, None, False
+        return filtered_answers, None, complete
     t3 = time.time()
-    if not QUESTIONS:
+    # لقطة واحدة من الفهرس لكل الطلب حتى لا تتغير الصفوف أثناء البحث
+    index = get_index()
+    if not index.questions:
         answer = "لم أجد إجابة مناسبة حالياً. هل يمكنك توضيح سؤالك أكثر؟ او اذا اردت يمكنك التواصل مع خدمة العملاء لحل المشكلة ومراجعة سؤالك"
     else:
-        keywords = [w.strip("؟,.،") for w in translated_for_search.split() if len(w) > 3]
-        q_vec = EMBEDDER.encode([translated_for_search])
-        k = min(TOP_K, len(QUESTIONS))
-        dist, idxs = NN_MODEL.kneighbors(q_vec, n_neighbors=k)
-
-        candidates = []
-        for rank, idx in enumerate(idxs[0]):
-            emb_sim = 1 - dist[0][rank]
-            keyword_match = any(
-                keyword in QUESTIONS[idx].lower() or keyword in ANSWERS[idx].lower()
-                for keyword in keywords
-            )
-            if keyword_match and emb_sim >= COMBINED_THRESHOLD:
-                candidates.append((emb_sim, ANSWERS[idx]))
+        q_vec = encode_query(translated_for_search)
+        sims, idxs = index.vectors.search(q_vec, TOP_K)
+
+        # دمج تشابه الـ embedding مع BM25 للمرشحين دفعة واحدة
+        token_scores = index.token_scorer.score(tokens_from_text(translated_for_search), idxs[0])
+        combined = EMB_WEIGHT * sims[0] + TOKEN_WEIGHT * token_scores
+        best = int(np.argmax(combined)) if len(combined) else -1
 
-        answer = candidates[0][1] if candidates else "لم أجد إجابة مناسبة حالياً. هل يمكنك توضيح سؤالك أكثر؟ او اذا اردت يمكنك التواصل مع خدمة العملاء لحل المشكلة ومراجعة سؤالك."
+        answer = index.answers[idxs[0][best]] if best >= 0 and combined[best] >= COMBINED_THRESHOLD else "لم أجد إجابة مناسبة حالياً. هل يمكنك توضيح سؤالك أكثر؟ او اذا اردت يمكنك التواصل مع خدمة العملاء لحل المشكلة ومراجعة سؤالك."
 
     t4 = time.time()
     final_answer = answer
     if detected_lang.lower() != "arabic":
         try:
-            model = genai.GenerativeModel("models/gemini-2.5-pro")
             prompt = (
                 f"Translate the following Arabic text to {detected_lang}. "
                 "Reply ONLY with the translated text, no explanations:\n\n"
                 f"{answer}"
             )
-            resp = model.generate_content(prompt)
             clean_text = re.sub(
                 r"(?i)(here is the translation|of course|translation|sure|the answer is|Here is the English|:)",
                 "",
-                resp.text.strip()
+                LLM.text("translation", prompt)
             ).strip()
             final_answer = clean_text
         except Exception as e:
             print("⚠️ خطأ أثناء ترجمة الإجابة:", e)
+            complete = False
 
     t5 = time.time()
-    try:
-        save_or_update_qa(translated_for_search, answer)
-    except Exception as e:
-        print("⚠️ فشل أثناء الحفظ:", e)
-    # 🟩 في النهاية، بعد توليد الإجابة، نتحقق من بيانات المستخدم
-    msg, next_field = collect_user_info()
-    if msg:
-        # نضيف سؤال البيانات بعد الإجابة الأصلية
-        return f"{final_answer}\n\n📋 {msg}"
-    else:
-        return final_answer
+    return final_answer, (translated_for_search, answer), complete
 
 
 
@@ -0,0 +1,214 @@
+"""Immutable snapshots of the in-memory FAQ index.
+
+An IndexSnapshot bundles everything retrieval reads (questions, answers,
+token sets, the vector index, the inverted token index, the BM25 scorer, the
+MinHash LSH used to find near-duplicate questions and a version number), all
+row-aligned. A published snapshot is never changed:
+writers derive a new one and state.publish_index() swaps the single
+reference. Readers call state.get_index() once per request and use that
+object throughout, so they take no lock and never see a half-built index.
+
+The ``with_*`` methods copy on write. Tuples of questions and answers are
+copied (pointers only); the vector, token and LSH indexes are cloned, which
+shares their storage until a live row changes (see VectorIndex.clone and
+InvertedIndex.clone), so adding a row does not copy the embedding matrix.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .nlp.bm25 import BM25Scorer
+from .nlp.inverted_index import InvertedIndex
+from .nlp.minhash import MinHashLSH
+from .nlp.quantized import QuantizedIndex
+from .nlp.similarity import VectorIndex
+from .normalize_ar import normalize_ar
+from .token_overlap_score import token_overlap_score
+from .tokens_from_text import tokens_from_text
+
+
+class IndexSnapshot:
+    """One consistent, read-only version of the FAQ index."""
+
+    __slots__ = ("questions", "answers", "token_sets", "vectors", "token_index", "token_scorer", "duplicates",
+                 "version")
+
+    def __init__(self, questions: Tuple[str, ...], answers: Tuple[str, ...],
+                 token_sets: Tuple[List[str], ...], vectors: VectorIndex,
+                 token_index: InvertedIndex, version: int, token_scorer: Optional[BM25Scorer] = None,
+                 duplicates: Optional[MinHashLSH] = None) -> None:
+        self.questions = questions
+        self.answers = answers
+        self.token_sets = token_sets
+        self.vectors = vectors
+        self.token_index = token_index
+        self.token_scorer = token_scorer or BM25Scorer(token_sets)
+        if duplicates is None:
+            duplicates = MinHashLSH()
+            duplicates.build(token_sets)
+        self.duplicates = duplicates
+        self.version = version
+        if isinstance(vectors, QuantizedIndex):
+            # rerank candidates with the float32 vectors of *these* questions
+            vectors.fetch = self._stored_vectors
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    @classmethod
+    def empty(cls, vectors: VectorIndex) -> "IndexSnapshot":
+        return cls((), (), (), vectors, InvertedIndex(normalize_ar), 0)
+
+    @classmethod
+    def build(cls, questions: Sequence[str], answer_lists: Sequence[List[str]],
+              vectors: VectorIndex, version: int) -> "IndexSnapshot":
+        """Build a snapshot from scratch; ``vectors`` is already built."""
+        token_index = InvertedIndex(normalize_ar)
+        token_index.build(questions, answer_lists)
+        snapshot = cls(
+            tuple(questions),
+            tuple("\n".join(answers) for answers in answer_lists),
+            tuple(tokens_from_text(q) for q in questions),
+            vectors,
+            token_index,
+            version,
+        )
+        snapshot.token_scorer.fit()
+        return snapshot
+
+    def _stored_vectors(self, ids: Sequence[int]) -> np.ndarray:
+        from .embedding_cache import load_question_vectors
+
+        return load_question_vectors([self.questions[i] for i in ids])
+
+    def find(self, question: str) -> Optional[int]:
+        """Return the row of ``question`` or None if it is not indexed."""
+        try:
+            return self.questions.index(question)
+        except ValueError:
+            return None
+
+    def find_similar(self, tokens: List[str], threshold: float = 0.6) -> Optional[int]:
+        """Return the first row whose token_overlap_score with ``tokens`` is
+        at least ``threshold``, checking only the LSH candidates."""
+        for row in self.duplicates.candidates(tokens):
+            if token_overlap_score(tokens, self.token_sets[row]) >= threshold:
+                return row
+        return None
+
+    def duplicate_pairs(self, threshold: float = 0.6) -> List[Tuple[int, int, float]]:
+        """Return ``(row, duplicate_row, score)`` for every LSH candidate pair
+        where ``duplicate_row`` scores at least ``threshold`` against ``row``
+        (token_overlap_score is asymmetric, so both directions are checked)."""
+        pairs = []
+        for r, s in self.duplicates.candidate_pairs():
+            for row, other in ((r, s), (s, r)):
+                score = token_overlap_score(self.token_sets[row], self.token_sets[other])
+                if score >= threshold:
+                    pairs.append((row, other, score))
+        return pairs
+
+    # ------------------------------------------------------------------
+    # Copy-on-write updates: each returns a new snapshot (version + 1)
+    # ------------------------------------------------------------------
+    def with_added(self, question: str, answer: str, vector: np.ndarray) -> "IndexSnapshot":
+        vectors = self.vectors.clone()
+        vectors.add(vector)
+        token_index = self.token_index.clone()
+        token_index.add(question, answer.split("\n"))
+        tokens = tokens_from_text(question)
+        duplicates = self.duplicates.clone()
+        duplicates.add(tokens)
+        return IndexSnapshot(
+            self.questions + (question,),
+            self.answers + (answer,),
+            self.token_sets + (tokens,),
+            vectors,
+            token_index,
+            self.version + 1,
+            duplicates=duplicates,
+        )
+
+    def with_updated(self, idx: int, question: Optional[str] = None, answer: Optional[str] = None,
+                     vector: Optional[np.ndarray] = None) -> "IndexSnapshot":
+        """Replace the question (with its ``vector``) and/or answer of row ``idx``."""
+        questions, token_sets, vectors = self.questions, self.token_sets, self.vectors
+        duplicates = self.duplicates
+        if question is not None:
+            tokens = tokens_from_text(question)
+            questions = questions[:idx] + (question,) + questions[idx + 1:]
+            token_sets = token_sets[:idx] + (tokens,) + token_sets[idx + 1:]
+            vectors = vectors.clone()
+            vectors.update(idx, vector)
+            duplicates = duplicates.clone()
+            duplicates.update(idx, tokens)
+        answers = self.answers
+        if answer is not None:
+            answers = answers[:idx] + (answer,) + answers[idx + 1:]
+        token_index = self.token_index.clone()
+        token_index.update(idx, questions[idx], answers[idx].split("\n"))
+        # an answer-only change keeps the token sets, and so the fitted scorer
+        scorer = self.token_scorer if token_sets is self.token_sets else None
+        return IndexSnapshot(questions, answers, token_sets, vectors, token_index, self.version + 1, scorer, duplicates)
+
+    def with_changes(self, changes: Sequence[Tuple[str, Optional[str], Optional[np.ndarray]]]) -> "IndexSnapshot":
+        """Apply several ``(question, answer, vector)`` changes to one clone.
+
+        A question that is not indexed is added with ``vector``, an indexed
+        one gets the new answer, and an answer of None removes it. The
+        indexes are cloned once for the whole batch, not once per change.
+        Returns ``self`` when nothing changes.
+        """
+        questions, answers, token_sets = list(self.questions), list(self.answers), list(self.token_sets)
+        vectors, token_index, duplicates = self.vectors.clone(), self.token_index.clone(), self.duplicates.clone()
+        changed = tokens_changed = False
+        for question, answer, vector in changes:
+            try:
+                idx = questions.index(question)
+            except ValueError:
+                idx = None
+            if idx is not None and answer is not None:
+                if answer != answers[idx]:
+                    answers[idx] = answer
+                    token_index.update(idx, question, answer.split("\n"))
+                    changed = True
+            elif idx is None and answer is not None:
+                tokens = tokens_from_text(question)
+                questions.append(question)
+                answers.append(answer)
+                token_sets.append(tokens)
+                vectors.add(vector)
+                token_index.add(question, answer.split("\n"))
+                duplicates.add(tokens)
+                changed = tokens_changed = True
+            elif idx is not None:
+                del questions[idx], answers[idx], token_sets[idx]
+                vectors.remove(idx)
+                token_index.remove(idx)
+                duplicates.remove(idx)
+                changed = tokens_changed = True
+        if not changed:
+            return self
+        # answer-only changes keep the token sets, and so the fitted scorer
+        scorer = None if tokens_changed else self.token_scorer
+        token_sets = self.token_sets if not tokens_changed else tuple(token_sets)
+        return IndexSnapshot(tuple(questions), tuple(answers), token_sets, vectors, token_index, self.version + 1,
+                             scorer, duplicates)
+
+    def with_removed(self, idx: int) -> "IndexSnapshot":
+        vectors = self.vectors.clone()
+        vectors.remove(idx)
+        token_index = self.token_index.clone()
+        token_index.remove(idx)
+        duplicates = self.duplicates.clone()
+        duplicates.remove(idx)
+        return IndexSnapshot(
+            self.questions[:idx] + self.questions[idx + 1:],
+            self.answers[:idx] + self.answers[idx + 1:],
+            self.token_sets[:idx] + self.token_sets[idx + 1:],
+            vectors,
+            token_index,
+            self.version + 1,
+            duplicates=duplicates,
+        )
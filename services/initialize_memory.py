@@ -1,29 +1,63 @@
+from . import faq_store
 from .load_faq_data import load_faq_data
-from .state import QUESTIONS, ANSWERS, TOKEN_SETS
-from .tokens_from_text import tokens_from_text
+from .state import get_index, publish_index
 from .build_index_from_memory import build_index_from_memory
+from .faq_index import INDEX_LOCK
+from .index_snapshot import IndexSnapshot
+from .query_embedding import clear_query_cache
+
+
+# faq.db version (faq_store.version()) the live index reflects; None until
+# the first initialize_memory()
+_store_version = None
 
 
 def initialize_memory():
-    global QUESTIONS, ANSWERS, TOKEN_SETS
+    global _store_version
+    # يُقرأ الإصدار قبل البيانات: كتابة أثناء البناء تفرض إعادة تحميل لاحقة
+    version = faq_store.version()
     data = load_faq_data()
 
-    QUESTIONS.clear()
-    ANSWERS.clear()
-    TOKEN_SETS.clear()
-
+    questions, answer_lists = [], []
     for topic in data:
         for qa in topic.get("questions", []):
             question = qa.get("question", "")
             answer_list = qa.get("answers", [])
 
             if question and answer_list:
-                QUESTIONS.append(question)
-                ANSWERS.append("\n".join(answer_list))
-                TOKEN_SETS.append(tokens_from_text(question))
+                questions.append(question)
+                answer_lists.append(answer_list)
 
-    if QUESTIONS:
-        build_index_from_memory()
-        print(f"✅ تم تحميل {len(QUESTIONS)} سؤال وبناء الفهرس بنجاح.")
+    # تُبنى اللقطة الجديدة جانباً ثم تُبدَّل دفعة واحدة؛ الطلبات الجارية تكمل
+    # على اللقطة القديمة ولا ترى قوائم نصف مبنية
+    with INDEX_LOCK:
+        vectors = build_index_from_memory(questions)
+        snapshot = IndexSnapshot.build(questions, answer_lists, vectors, get_index().version + 1)
+        publish_index(snapshot)
+        clear_query_cache()
+        _store_version = version
+
+    if snapshot.questions:
+        print(f"✅ تم تحميل {len(snapshot)} سؤال وبناء الفهرس بنجاح.")
     else:
         print("⚠️ لا توجد أسئلة محفوظة بعد.")
+
+
+def note_store_write(version):
+    """Record that this process applied its faq.db write ``version`` to the index.
+
+    If another process wrote in between, the recorded version stays behind
+    and the next reload_if_store_changed() rebuilds the index.
+    """
+    global _store_version
+    with INDEX_LOCK:
+        if _store_version == version - 1:
+            _store_version = version
+
+
+def reload_if_store_changed():
+    """Rebuild the index if faq.db changed outside this process; returns True if it did."""
+    if _store_version is None or faq_store.version() == _store_version:
+        return False
+    initialize_memory()
+    return True
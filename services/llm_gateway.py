@@ -0,0 +1,193 @@
+"""Single entry point for Gemini calls.
+
+Every call site used to build ``genai.GenerativeModel("models/gemini-2.5-pro")``
+for each request, so the heaviest model answered even "reply SAFE or UNSAFE".
+LLMGateway maps a task (moderation, langid, translation, formatting) to a
+model tier (LLM_TASK_TIERS) and a tier to a model name (LLM_MODEL_TIERS), both
+in services/state.py. One GenerativeModel is built per model name and reused;
+they share the process-wide Gemini client and its connections.
+
+Per task, the gateway records calls, errors, latency and the token counts
+reported in the response's usage metadata; stats() is exposed by /metrics.
+
+Each call is bounded: its timeout is what is left of the request deadline
+(services/deadline.py), at most LLM_CALL_TIMEOUT_S, and it goes through a
+CircuitBreaker (services/circuit_breaker.py). A call refused by the breaker
+or made after the deadline raises LLMUnavailable without reaching Gemini.
+A call is slow when it uses more than LLM_BREAKER_SLOW_RATIO of its own
+timeout. A call that times out because the request deadline cut its timeout
+below LLM_BREAKER_MIN_BUDGET_S is not held against Gemini (it never had a
+fair chance) and is not reported to the breaker; a timeout with a larger
+budget is a failure, so a hanging Gemini opens the breaker from /chat too.
+"""
+
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+import logging
+import threading
+import time
+
+from . import deadline
+from .circuit_breaker import CircuitBreaker
+from .state import (LLM_MODEL_TIERS, LLM_TASK_TIERS, LLM_CALL_TIMEOUT_S, LLM_BREAKER_FAILURES,
+                    LLM_BREAKER_SLOW_RATIO, LLM_BREAKER_MIN_BUDGET_S, LLM_BREAKER_RESET_S)
+
+LOGGER = logging.getLogger(__name__)
+
+
+class LLMUnavailable(RuntimeError):
+    """Raised instead of calling Gemini (breaker open or deadline spent)."""
+
+
+def _generative_model(model_name: str) -> Any:
+    # استيراد Gemini عند الحاجة فقط حتى لا يتحمل بدء التشغيل كلفته
+    import google.generativeai as genai
+
+    return genai.GenerativeModel(model_name)
+
+
+class _TaskStats:
+    __slots__ = ("calls", "errors", "skipped", "latency", "max_latency", "prompt_tokens", "output_tokens")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.skipped = 0
+        self.latency = 0.0
+        self.max_latency = 0.0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+
+    def as_dict(self, model: str) -> Dict[str, Any]:
+        return {
+            "model": model,
+            "calls": self.calls,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "latency_ms_avg": round(self.latency * 1000 / self.calls, 1) if self.calls else 0.0,
+            "latency_ms_max": round(self.max_latency * 1000, 1),
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+
+class LLMGateway:
+    """Task -> tier -> model routing with reused models and per-task stats."""
+
+    def __init__(self, model_tiers: Dict[str, str], task_tiers: Dict[str, str],
+                 model_factory: Callable[[str], Any] = _generative_model,
+                 breaker: Optional[CircuitBreaker] = None, call_timeout: float = 30.0,
+                 min_budget: float = 1.0) -> None:
+        self.model_tiers = dict(model_tiers)
+        self.task_tiers = dict(task_tiers)
+        self.breaker = breaker or CircuitBreaker()
+        self.call_timeout = call_timeout
+        self.min_budget = min_budget
+        self._factory = model_factory
+        self._models: Dict[str, Any] = {}
+        self._stats: Dict[str, _TaskStats] = {}
+        self._lock = threading.Lock()
+
+    def model_name(self, task: str) -> str:
+        """Model used for ``task``; unknown tasks raise KeyError."""
+        return self.model_tiers[self.task_tiers[task]]
+
+    def _model(self, name: str) -> Any:
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    model = self._models[name] = self._factory(name)
+        return model
+
+    def _record(self, task: str, elapsed: float, response: Optional[Any]) -> None:
+        usage = getattr(response, "usage_metadata", None) if response is not None else None
+        with self._lock:
+            stats = self._stats.setdefault(task, _TaskStats())
+            stats.calls += 1
+            stats.latency += elapsed
+            stats.max_latency = max(stats.max_latency, elapsed)
+            if response is None:
+                stats.errors += 1
+            if usage is not None:
+                stats.prompt_tokens += getattr(usage, "prompt_token_count", 0) or 0
+                stats.output_tokens += getattr(usage, "candidates_token_count", 0) or 0
+
+    def _skip(self, task: str, reason: str) -> LLMUnavailable:
+        with self._lock:
+            self._stats.setdefault(task, _TaskStats()).skipped += 1
+        return LLMUnavailable(f"{task}: {reason}")
+
+    def _admit(self, task: str) -> Tuple[Any, float, bool]:
+        """The model of ``task``, the call timeout and whether the request
+        deadline cut that timeout short, or LLMUnavailable."""
+        model = self._model(self.model_name(task))
+        timeout = self.call_timeout
+        left = deadline.remaining()
+        if left is not None:
+            if left <= 0:
+                raise self._skip(task, "request deadline exceeded")
+            timeout = min(timeout, left)
+        if not self.breaker.allow():
+            raise self._skip(task, "circuit breaker open")
+        return model, timeout, timeout < self.call_timeout
+
+    def _settle(self, ok: bool, elapsed: float, timeout: float, cut_short: bool) -> None:
+        # مهلة قصيرة جداً بسبب الموعد النهائي للطلب لا تدل على عطل في Gemini
+        if not ok and cut_short and elapsed >= timeout and timeout < self.min_budget:
+            self.breaker.release()
+        else:
+            self.breaker.record(ok, elapsed, timeout)
+
+    def generate(self, task: str, prompt: Any, **kwargs: Any) -> Any:
+        """``generate_content`` on the model of ``task``; raises on API errors,
+        timeouts and LLMUnavailable."""
+        model, timeout, cut_short = self._admit(task)
+        started = time.monotonic()
+        response = None
+        try:
+            response = model.generate_content(prompt, request_options={"timeout": timeout}, **kwargs)
+            return response
+        finally:
+            elapsed = time.monotonic() - started
+            self._settle(response is not None, elapsed, timeout, cut_short)
+            self._record(task, elapsed, response)
+
+    def stream(self, task: str, prompt: Any, **kwargs: Any) -> Iterator[str]:
+        """generate() with ``stream=True``: yields the text chunks as they arrive.
+
+        The breaker judges the call by its time to first chunk; the token
+        counts come from the last chunk.
+        """
+        model, timeout, cut_short = self._admit(task)
+        started = time.monotonic()
+        first_chunk = None
+        last = None
+        try:
+            for chunk in model.generate_content(prompt, stream=True, request_options={"timeout": timeout}, **kwargs):
+                if first_chunk is None:
+                    first_chunk = time.monotonic() - started
+                last = chunk
+                if chunk.text:
+                    yield chunk.text
+        finally:
+            elapsed = time.monotonic() - started
+            self._settle(last is not None, first_chunk if first_chunk is not None else elapsed, timeout, cut_short)
+            self._record(task, elapsed, last)
+
+    def text(self, task: str, prompt: Any, **kwargs: Any) -> str:
+        """The stripped text of generate()."""
+        return self.generate(task, prompt, **kwargs).text.strip()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {task: stats.as_dict(self.model_name(task)) for task, stats in self._stats.items()}
+
+
+LLM = LLMGateway(
+    LLM_MODEL_TIERS,
+    LLM_TASK_TIERS,
+    breaker=CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_SLOW_RATIO, LLM_BREAKER_RESET_S),
+    call_timeout=LLM_CALL_TIMEOUT_S,
+    min_budget=LLM_BREAKER_MIN_BUDGET_S,
+)
@@ -1,12 +1,9 @@
-import os, json
-from .state import FAQ_PATH
+from .faq_store import load_all
 
 
 def load_faq_data():
-    if not os.path.exists(FAQ_PATH):
-        return []
+    # المصدر الوحيد للأسئلة هو faq.db (services/faq_store.py)
     try:
-        with open(FAQ_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return load_all()
     except Exception:
         return []
@@ -0,0 +1,70 @@
+"""Small thread-safe LRU cache with hit/miss counters and optional TTL."""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import threading
+import time
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry.
+
+    With ``ttl`` (seconds) an entry also expires that long after it was put;
+    an expired entry is dropped on lookup and counts as a miss.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._expires: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            if self.ttl is not None and self._expires[key] <= time.monotonic():
+                del self._data[key], self._expires[key]
+                self.expired += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self.ttl is not None:
+                self._expires[key] = time.monotonic() + self.ttl
+            while len(self._data) > self.maxsize:
+                oldest, _ = self._data.popitem(last=False)
+                self._expires.pop(oldest, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "expired": self.expired,
+        }
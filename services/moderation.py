@@ -0,0 +1,289 @@
+"""Tiered moderation of user messages.
+
+check_text_safety used to send every free-text message to Gemini and
+wait for the answer. moderate() decides in three tiers and only the last
+one is remote:
+
+1. Local rules, in microseconds. Words and phrases of the offensive lexicon
+   in keyWords.py (matched on folded words, also after undoing leetspeak and
+   letter stretching such as "حمااار" or "f*ck" -> "fck") make a message
+   unsafe. A message without letters (numbers, a phone, emoji) is safe.
+2. Verdict cache: an in-process LRU in front of the ``moderation`` table of
+   qa.db, keyed by the NFKC, case-folded text (any script), so repeated
+   messages are decided without a call, across restarts too. After it, a
+   message whose words all occur in the seed FAQ (faq_data.json) is safe.
+3. Gemini, for what is left. The call runs on a small thread pool and the
+   message waits at most MODERATION_BUDGET_MS for it; past the budget the
+   message is let through (as it was when the call failed) and the verdict,
+   when it arrives, is cached for next time.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from keyWords import ARABIC_OFFENSIVE_WORDS, ENGLISH_OFFENSIVE_WORDS
+from .llm_gateway import LLM
+from .lru_cache import LRUCache
+from .nlp.text_processing import fold_words
+from .state import (FAQ_PATH, QA_DB_PATH, MODERATION_CACHE_SIZE, MODERATION_BUDGET_MS,
+                    MODERATION_WORKERS)
+
+LOGGER = logging.getLogger(__name__)
+
+MODERATION_PROMPT = """
+Analyze if this text contains any offensive content like:
+- Insults
+- Hate speech
+- Profanity
+- Threats
+- Inappropriate language
+
+Reply ONLY with "SAFE" or "UNSAFE". Nothing else.
+
+Text to analyze:
+{text}
+"""
+
+_LEET = str.maketrans({"@": "a", "$": "s", "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t",
+                       "!": "i", "*": "", ".": "", "-": "", "_": ""})
+_STRETCH_RE = re.compile(r"(.)\1{2,}")
+
+
+class Verdict(NamedTuple):
+    safe: bool
+    # lexicon, no_letters, corpus, cache, gemini, timeout or error
+    source: str
+
+
+def _words(text: str) -> List[str]:
+    """Folded words with stretched letters ("حمااار", "fuuuck") collapsed."""
+    return fold_words(_STRETCH_RE.sub(r"\1", text))
+
+
+def _compile(words) -> Dict[str, FrozenSet[Tuple[str, ...]]]:
+    """First word -> the lexicon phrases (as word tuples) starting with it."""
+    by_first: Dict[str, set] = {}
+    for word in words:
+        phrase = tuple(_words(word))
+        by_first.setdefault(phrase[0], set()).add(phrase)
+    return {first: frozenset(phrases) for first, phrases in by_first.items()}
+
+
+_LEXICON = _compile(ARABIC_OFFENSIVE_WORDS | ENGLISH_OFFENSIVE_WORDS)
+_LEET_CHARS = frozenset(map(chr, _LEET))
+
+
+def _find(words: List[str]) -> Optional[str]:
+    for i, word in enumerate(words):
+        for phrase in _LEXICON.get(word, ()):
+            if tuple(words[i:i + len(phrase)]) == phrase:
+                return " ".join(phrase)
+    return None
+
+
+def lexicon_hit(text: str) -> Optional[str]:
+    """Return the offensive phrase found in ``text``, if any."""
+    hit = _find(_words(text))
+    if hit is None and not _LEET_CHARS.isdisjoint(text):
+        # "f.u.c.k", "sh1t", "b!tch": same words with leetspeak and separators undone
+        hit = _find(_words(text.lower().translate(_LEET)))
+    return hit
+
+
+_VOCABULARY: Optional[FrozenSet[str]] = None
+
+
+def _corpus_vocabulary() -> FrozenSet[str]:
+    """Folded words of the seed FAQ (faq_data.json).
+
+    Learned rows are left out on purpose: a message let through on a budget
+    timeout can be learned as a question, and its words must not make it
+    "safe" from then on.
+    """
+    global _VOCABULARY
+    if _VOCABULARY is None:
+        words = set()
+        try:
+            with open(FAQ_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as exc:
+            LOGGER.warning("⚠️ تعذر قراءة %s لمفردات فحص السلامة: %s", FAQ_PATH, exc)
+            data = []
+        for topic in data:
+            for qa in topic.get("questions", []):
+                for text in [qa.get("question") or ""] + list(qa.get("answers") or []):
+                    words.update(fold_words(text))
+        _VOCABULARY = frozenset(words)
+    return _VOCABULARY
+
+
+def local_verdict(text: str) -> Optional[Verdict]:
+    """Tier 1: decide the clear cases, or None when the text is ambiguous."""
+    if lexicon_hit(text):
+        return Verdict(False, "lexicon")
+    if not any(ch.isalpha() for ch in text):
+        return Verdict(True, "no_letters")
+    return None
+
+
+def corpus_verdict(text: str) -> Optional[Verdict]:
+    """Safe when every word occurs in the seed FAQ; checked after the cache,
+    so a remote UNSAFE verdict always wins."""
+    vocabulary = _corpus_vocabulary()
+    if all(word in vocabulary or word.isdigit() for word in fold_words(text)):
+        return Verdict(True, "corpus")
+    return None
+
+
+class VerdictStore:
+    """LRU of verdicts backed by the ``moderation`` table of qa.db."""
+
+    def __init__(self, db_path: str, maxsize: int) -> None:
+        self.db_path = db_path
+        self.cache = LRUCache(maxsize)
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        if not self._schema_ready:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS moderation (
+                    key TEXT PRIMARY KEY,
+                    safe INTEGER NOT NULL,
+                    created REAL NOT NULL
+                )
+                """
+            )
+            self._schema_ready = True
+        return conn
+
+    @staticmethod
+    def key(text: str) -> Optional[str]:
+        """Hash of the NFKC, case-folded text with whitespace collapsed, in any
+        script; None (not cached) for text without letters."""
+        if not any(ch.isalpha() for ch in text):
+            return None
+        folded = " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+        return hashlib.sha1(folded.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bool]:
+        safe = self.cache.get(key)
+        if safe is not None:
+            return safe
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT safe FROM moderation WHERE key = ?", (key,)).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as exc:
+            LOGGER.warning("⚠️ تعذر قراءة ذاكرة فحص السلامة: %s", exc)
+            return None
+        if row is None:
+            return None
+        self.cache.put(key, bool(row[0]))
+        return bool(row[0])
+
+    def put(self, key: str, safe: bool) -> None:
+        self.cache.put(key, safe)
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO moderation (key, safe, created) VALUES (?, ?, ?)",
+                        (key, int(safe), time.time()),
+                    )
+            finally:
+                conn.close()
+        except sqlite3.Error as exc:
+            LOGGER.warning("⚠️ تعذر حفظ نتيجة فحص السلامة: %s", exc)
+
+
+def gemini_is_safe(text: str) -> bool:
+    """Ask Gemini for a SAFE/UNSAFE verdict; raises on API errors."""
+    return LLM.text("moderation", MODERATION_PROMPT.format(text=text)).upper() == "SAFE"
+
+
+class Moderator:
+    """The three tiers, with counters per deciding source."""
+
+    def __init__(self, store: VerdictStore, remote=gemini_is_safe, budget_ms: float = MODERATION_BUDGET_MS,
+                 workers: int = MODERATION_WORKERS) -> None:
+        self.store = store
+        self.remote = remote
+        self.budget = budget_ms / 1000.0
+        self.counts: Dict[str, int] = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="moderation")
+        # one remote call per text, however many requests wait for it
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, verdict: Verdict) -> Verdict:
+        with self._lock:
+            self.counts[verdict.source] = self.counts.get(verdict.source, 0) + 1
+        return verdict
+
+    def _remote(self, key: Optional[str], text: str) -> bool:
+        try:
+            safe = self.remote(text)
+            if key is not None:
+                self.store.put(key, safe)
+            return safe
+        finally:
+            with self._lock:
+                self._inflight.pop(key or text, None)
+
+    def moderate(self, text: str) -> Verdict:
+        verdict = local_verdict(text)
+        if verdict is not None:
+            return self._count(verdict)
+
+        key = self.store.key(text)
+        safe = self.store.get(key) if key is not None else None
+        if safe is not None:
+            return self._count(Verdict(safe, "cache"))
+
+        verdict = corpus_verdict(text)
+        if verdict is not None:
+            return self._count(verdict)
+
+        with self._lock:
+            future = self._inflight.get(key or text)
+            if future is None:
+                future = self._inflight[key or text] = self._executor.submit(self._remote, key, text)
+        try:
+            return self._count(Verdict(future.result(timeout=self.budget), "gemini"))
+        except FutureTimeout:
+            LOGGER.info("⏱️ تجاوز فحص السلامة %.0f ms، تم تمرير الرسالة", self.budget * 1000)
+            return self._count(Verdict(True, "timeout"))
+        except Exception as exc:
+            print("⚠️ خطأ في فحص سلامة النص:", exc)
+            return self._count(Verdict(True, "error"))
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        total = sum(counts.values())
+        remote = counts.get("gemini", 0) + counts.get("timeout", 0) + counts.get("error", 0)
+        return {
+            "by_source": counts,
+            "local_rate": round(1 - remote / total, 3) if total else 0.0,
+            "cache": self.store.cache.stats(),
+        }
+
+
+MODERATOR = Moderator(VerdictStore(QA_DB_PATH, MODERATION_CACHE_SIZE))
+
+
+def moderate(text: str) -> Verdict:
+    return MODERATOR.moderate(text)
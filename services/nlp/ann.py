@@ -0,0 +1,180 @@
+"""Approximate nearest-neighbour search for large FAQ corpora.
+
+IVFIndex is an inverted-file index written in NumPy: a spherical k-means
+coarse quantizer splits the normalized vectors into ``nlist`` cells, and a
+query only scores the rows of its ``nprobe`` closest cells. ``nprobe`` is the
+recall/latency knob: probing every cell is exact, probing one is fastest.
+
+It keeps the VectorIndex interface and row-id semantics, so the snapshot's
+vector index can be either class (see make_vector_index and state.INDEX_BACKEND).
+"""
+
+from itertools import chain
+from typing import Callable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .quantized import QuantizedIndex
+from .similarity import VectorIndex, l2_normalize
+
+# Below this many rows per cell the quantizer is not worth training and the
+# index answers with exact search.
+MIN_ROWS_PER_LIST = 32
+# Rows sampled per cell when training the quantizer
+TRAIN_ROWS_PER_LIST = 256
+
+
+class IVFIndex(VectorIndex):
+    """Inverted-file cosine index with a tunable number of probed cells."""
+
+    def __init__(self, nlist: Optional[int] = None, nprobe: int = 8,
+                 train_iters: int = 10, seed: int = 0) -> None:
+        super().__init__()
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iters = train_iters
+        self._rng = np.random.default_rng(seed)
+        self._centroids: Optional[np.ndarray] = None
+        self._assign: List[int] = []
+        self._lists: List[List[int]] = []
+        # cells whose id list this instance may change; None = all of them
+        self._own_cells: Optional[Set[int]] = None
+        self._trained_size = 0
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def clone(self) -> "IVFIndex":
+        """Copy the row -> cell list and share the cells' id lists; the clone
+        copies a cell the first time it changes it."""
+        other = super().clone()
+        other._assign = list(self._assign)
+        other._lists = list(self._lists)
+        other._own_cells = set()
+        return other
+
+    def _cell(self, cell: int) -> List[int]:
+        """Return the id list of ``cell`` for writing (copied if shared)."""
+        if self._own_cells is not None and cell not in self._own_cells:
+            self._own_cells.add(cell)
+            self._lists[cell] = list(self._lists[cell])
+        return self._lists[cell]
+
+    # ------------------------------------------------------------------
+    # Coarse quantizer
+    # ------------------------------------------------------------------
+    def _target_nlist(self) -> int:
+        nlist = self.nlist or int(round(np.sqrt(self._size)))
+        return min(nlist, self._size // MIN_ROWS_PER_LIST)
+
+    def _train(self) -> None:
+        nlist = self._target_nlist()
+        if nlist < 2:
+            self._centroids = None
+            self._assign, self._lists = [], []
+            self._own_cells = None
+            self._trained_size = 0
+            return
+
+        data = self.matrix
+        if self._size > nlist * TRAIN_ROWS_PER_LIST:
+            data = data[self._rng.choice(self._size, nlist * TRAIN_ROWS_PER_LIST, replace=False)]
+        centroids = data[self._rng.choice(len(data), nlist, replace=False)].copy()
+        for _ in range(self.train_iters):
+            nearest = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, nearest, data)
+            counts = np.bincount(nearest, minlength=nlist)
+            empty = counts == 0
+            if empty.any():
+                # re-seed dead cells from random rows instead of dropping them
+                sums[empty] = data[self._rng.choice(len(data), int(empty.sum()))]
+            centroids = l2_normalize(sums)
+
+        self._centroids = centroids
+        self._assign = self._nearest_cells(self.matrix).tolist()
+        order = np.argsort(self._assign, kind="stable")
+        bounds = np.cumsum(np.bincount(self._assign, minlength=nlist))
+        self._lists = [order[start:end].tolist() for start, end in zip(chain([0], bounds), bounds)]
+        self._own_cells = None
+        self._trained_size = self._size
+
+    def _nearest_cells(self, vectors: np.ndarray, chunk: int = 8192) -> np.ndarray:
+        return np.concatenate([
+            np.argmax(vectors[start:start + chunk] @ self._centroids.T, axis=1)
+            for start in range(0, max(len(vectors), 1), chunk)
+        ])
+
+    def _maybe_retrain(self) -> None:
+        # retraining when the corpus doubles keeps inserts amortized O(1)
+        if self._size >= 2 * max(self._trained_size, MIN_ROWS_PER_LIST * 2):
+            self._train()
+
+    # ------------------------------------------------------------------
+    # VectorIndex interface
+    # ------------------------------------------------------------------
+    def build(self, vectors: np.ndarray) -> None:
+        super().build(vectors)
+        self._train()
+
+    def add(self, vector: np.ndarray) -> int:
+        idx = super().add(vector)
+        if self.trained:
+            cell = int(np.argmax(self._centroids @ self._data[idx]))
+            self._assign.append(cell)
+            self._cell(cell).append(idx)
+        self._maybe_retrain()
+        return idx
+
+    def update(self, idx: int, vector: np.ndarray) -> None:
+        super().update(idx, vector)
+        if self.trained:
+            self._cell(self._assign[idx]).remove(idx)
+            cell = int(np.argmax(self._centroids @ self._data[idx]))
+            self._assign[idx] = cell
+            self._cell(cell).append(idx)
+
+    def remove(self, idx: int) -> None:
+        super().remove(idx)
+        if self.trained:
+            self._assign.pop(idx)
+            # keep ids positional: every later row moves down by one, so every
+            # cell is rebuilt (and owned) here
+            self._lists = [[i - 1 if i > idx else i for i in cell if i != idx] for cell in self._lists]
+            self._own_cells = None
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.trained or self.nprobe >= len(self._lists):
+            return super().search(queries, k)
+
+        queries = l2_normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        k = min(k, self._size)
+        probes = np.argpartition(-(queries @ self._centroids.T), self.nprobe - 1, axis=1)[:, :self.nprobe]
+
+        out_sims = np.empty((len(queries), k), dtype=np.float32)
+        out_ids = np.empty((len(queries), k), dtype=np.int64)
+        for row, (query, cells) in enumerate(zip(queries, probes)):
+            candidates = np.fromiter(chain.from_iterable(self._lists[c] for c in cells), dtype=np.int64)
+            if len(candidates) < k:
+                sims, ids = super().search(query, k)
+                out_sims[row], out_ids[row] = sims[0], ids[0]
+                continue
+            sims = self._data[candidates] @ query
+            top = np.argpartition(-sims, k - 1)[:k] if k < len(sims) else np.arange(len(sims))
+            top = top[np.argsort(-sims[top], kind="stable")]
+            out_sims[row], out_ids[row] = sims[top], candidates[top]
+        return out_sims, out_ids
+
+
+def make_vector_index(backend: str = "exact", nlist: Optional[int] = None, nprobe: int = 8,
+                      pca_dim: Optional[int] = None, rerank: int = 4,
+                      fetch: Optional[Callable[[Sequence[int]], np.ndarray]] = None) -> VectorIndex:
+    """Return an empty index for ``backend`` ("exact", "ivf" or "int8")."""
+    if backend == "exact":
+        return VectorIndex()
+    if backend == "ivf":
+        return IVFIndex(nlist=nlist, nprobe=nprobe)
+    if backend == "int8":
+        return QuantizedIndex(pca_dim=pca_dim, rerank=rerank, fetch=fetch)
+    raise ValueError(f"unknown vector index backend: {backend!r}")
@@ -0,0 +1,91 @@
+"""BM25 lexical scoring over the tokenized FAQ questions.
+
+The corpus is a sparse CSR matrix (documents x terms) whose entries are the
+precomputed BM25 term weights, IDF included. Scoring a set of candidate rows
+against a query is then one sparse row/column slice and a row sum.
+"""
+
+from typing import Dict, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+
+class _Fitted(NamedTuple):
+    vocab: Dict[str, int]
+    idf: np.ndarray
+    avgdl: float
+    weights: object
+
+
+class BM25Scorer:
+    """Okapi BM25 over a fixed sequence of token lists (one index snapshot).
+
+    The matrix is fitted by ``fit()`` (faq_index does it before publishing a
+    snapshot) or else on the first ``score()`` call. IDF and average length
+    are corpus-wide, so every index change gets a new scorer; fitting touches
+    every row but neither re-tokenizes nor re-encodes anything. The fitted
+    state is published as one tuple, so concurrent readers never see half of
+    it (at worst two of them both fit).
+    """
+
+    def __init__(self, token_sets: Sequence[Sequence[str]], k1: float = 1.5, b: float = 0.75) -> None:
+        self.token_sets = token_sets
+        self.k1 = k1
+        self.b = b
+        self._fitted: Optional[_Fitted] = None
+
+    @property
+    def fitted(self) -> bool:
+        return self._fitted is not None
+
+    def fit(self) -> _Fitted:
+        # scipy is only needed once there is a corpus to score
+        from scipy.sparse import csr_matrix
+
+        vocab: Dict[str, int] = {}
+        indptr, indices, counts = [0], [], []
+        for tokens in self.token_sets:
+            tf: Dict[int, int] = {}
+            for token in tokens:
+                col = vocab.setdefault(token, len(vocab))
+                tf[col] = tf.get(col, 0) + 1
+            indices.extend(tf.keys())
+            counts.extend(tf.values())
+            indptr.append(len(indices))
+
+        n_docs = len(self.token_sets)
+        indptr = np.asarray(indptr, dtype=np.int64)
+        indices = np.asarray(indices, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.float32)
+        doc_len = np.array([len(tokens) for tokens in self.token_sets], dtype=np.float32)
+        avgdl = float(doc_len.mean()) if n_docs and doc_len.mean() > 0 else 1.0
+
+        df = np.bincount(indices, minlength=len(vocab)).astype(np.float32)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        row_norm = self.k1 * (1 - self.b + self.b * doc_len / avgdl)
+        rows = np.repeat(np.arange(n_docs), np.diff(indptr))
+        data = idf[indices] * counts * (self.k1 + 1) / (counts + row_norm[rows])
+
+        self._fitted = _Fitted(vocab, idf, avgdl, csr_matrix((data, indices, indptr), shape=(n_docs, len(vocab))))
+        return self._fitted
+
+    def score(self, query_tokens: Sequence[str], doc_ids: Sequence[int]) -> np.ndarray:
+        """Return BM25 scores of ``doc_ids`` for the query, scaled to [0, 1].
+
+        Scores are divided by the query's score against itself (a document
+        holding exactly the query terms), so a full lexical match is about 1
+        and the value can be mixed with a cosine similarity.
+        """
+        fitted = self._fitted or self.fit()
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        cols = sorted({fitted.vocab[t] for t in query_tokens if t in fitted.vocab})
+        if not cols or not len(doc_ids):
+            return np.zeros(len(doc_ids), dtype=np.float32)
+
+        raw = np.asarray(fitted.weights[doc_ids][:, cols].sum(axis=1)).ravel()
+        self_norm = self.k1 * (1 - self.b + self.b * len(set(query_tokens)) / fitted.avgdl)
+        ideal = float(fitted.idf[cols].sum()) * (self.k1 + 1) / (1 + self_norm)
+        if ideal <= 0:
+            return np.zeros(len(doc_ids), dtype=np.float32)
+        return np.clip(raw / ideal, 0.0, 1.0).astype(np.float32)
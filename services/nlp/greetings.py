@@ -0,0 +1,124 @@
+"""Local answers to greetings and small talk.
+
+Messages such as "مرحبا", "hello" or "bonjour, ça va ?" used to go all the
+way to Gemini to get back a canned "How can I help you today?". The lexicon
+in data/greetings.json lists, per language, the phrases of each small-talk
+kind (salam, greeting, how_are_you, help, thanks, goodbye), filler words that
+may surround them, and one reply sentence per kind.
+
+The phrases are compiled once into a trie over folded words. A message is
+small talk when the trie covers all of its words (fillers allowed), longest
+phrase first; the reply is then built from the matched kinds in the
+language of the first phrase, followed by the "offer" sentence. Any other
+word (a question about prices, a district name, ...) means no match.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import json
+import os
+import threading
+
+from .text_processing import fold_words
+
+LEXICON_PATH = os.path.join(os.path.dirname(__file__), "data", "greetings.json")
+
+# Order of the reply sentences; "offer" always comes last
+KIND_ORDER = ("salam", "greeting", "how_are_you", "help", "thanks", "goodbye")
+
+_END = ""
+
+
+class SmallTalk(NamedTuple):
+    language: str
+    kinds: Tuple[str, ...]
+    reply: str
+
+
+class GreetingMatcher:
+    """Word trie of the small-talk lexicon."""
+
+    def __init__(self, lexicon: Dict[str, dict]) -> None:
+        self._trie: dict = {}
+        self._replies = {language: entry["replies"] for language, entry in lexicon.items()}
+        for language, entry in lexicon.items():
+            for kind, phrases in entry["phrases"].items():
+                for phrase in phrases:
+                    self._insert(fold_words(phrase), (language, kind))
+            for filler in entry.get("fillers", []):
+                self._insert(fold_words(filler), (language, None))
+
+    def _insert(self, words: List[str], value: Tuple[str, Optional[str]]) -> None:
+        node = self._trie
+        for word in words:
+            node = node.setdefault(word, {})
+        # the first language listing a phrase keeps it
+        node.setdefault(_END, value)
+
+    def _longest(self, words: List[str], start: int) -> Tuple[int, Optional[Tuple[str, Optional[str]]]]:
+        node, end, value = self._trie, start, None
+        for i in range(start, len(words)):
+            node = node.get(words[i])
+            if node is None:
+                break
+            if _END in node:
+                end, value = i + 1, node[_END]
+        return end, value
+
+    def match(self, text: str) -> Optional[SmallTalk]:
+        """Return the reply if ``text`` is only greetings and small talk."""
+        words = fold_words(text)
+        matched: List[Tuple[str, str]] = []
+        i = 0
+        while i < len(words):
+            i, value = self._longest(words, i)
+            if value is None:
+                return None
+            if value[1] is not None:
+                matched.append(value)
+        if not matched:
+            return None
+
+        language = matched[0][0]
+        kinds = tuple(kind for kind in KIND_ORDER if any(k == kind for _, k in matched))
+        replies = self._replies[language]
+        reply = " ".join([replies[kind] for kind in kinds if kind in replies] + [replies["offer"]])
+        return SmallTalk(language, kinds, reply)
+
+
+_MATCHER: Optional[GreetingMatcher] = None
+_MATCHER_LOCK = threading.Lock()
+
+
+def get_matcher() -> GreetingMatcher:
+    global _MATCHER
+    if _MATCHER is None:
+        with _MATCHER_LOCK:
+            if _MATCHER is None:
+                with open(LEXICON_PATH, "r", encoding="utf-8") as f:
+                    _MATCHER = GreetingMatcher(json.load(f))
+    return _MATCHER
+
+
+# Messages checked, messages answered locally, and hits per reply language
+STATS = {"checked": 0, "hits": 0}
+HITS_BY_LANGUAGE: Dict[str, int] = {}
+
+
+def match_small_talk(text: str) -> Optional[SmallTalk]:
+    """GreetingMatcher.match() on the shared matcher, counted in STATS."""
+    result = get_matcher().match(text)
+    STATS["checked"] += 1
+    if result is not None:
+        STATS["hits"] += 1
+        HITS_BY_LANGUAGE[result.language] = HITS_BY_LANGUAGE.get(result.language, 0) + 1
+    return result
+
+
+def stats() -> dict:
+    checked = STATS["checked"]
+    return {
+        "checked": checked,
+        "hits": STATS["hits"],
+        "hit_rate": round(STATS["hits"] / checked, 3) if checked else 0.0,
+        "by_language": dict(HITS_BY_LANGUAGE),
+    }
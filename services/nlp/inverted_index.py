@@ -0,0 +1,192 @@
+"""Normalized inverted index over FAQ questions and answers.
+
+filter_answers_by_query matches a query token when it occurs *inside* a
+normalized question or answer (``tok in text``). Since tokens contain no
+spaces, that is the same as the token being a substring of one word. The
+index posts every character NGRAM-gram of every word (and words shorter than
+NGRAM whole), which is linear in the word length. A token of at least NGRAM
+characters is looked up as the intersection of its n-grams' postings, then
+verified against the normalized text of each candidate; a shorter token is
+inside some key, so it scans the keys instead of the corpus.
+
+Postings hold ``(doc, slot)`` units: slot -1 is the question of a Q&A pair and
+slot ``i >= 0`` its i-th answer. Doc ids are internal and increase with
+insertion, so sorting by them gives corpus order; callers address entries by
+row position, aligned with the snapshot's questions.
+"""
+
+from collections import Counter, defaultdict
+from functools import lru_cache
+from itertools import count
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from .layered import LayeredDict
+
+Unit = Tuple[int, int]
+
+NGRAM = 4
+QUESTION_SLOT = -1
+
+
+@lru_cache(maxsize=1 << 16)
+def _index_keys(word: str) -> FrozenSet[str]:
+    # FAQ vocabularies repeat the same words across rows, so cache per word
+    if len(word) < NGRAM:
+        return frozenset((word,))
+    return frozenset(word[start:start + NGRAM] for start in range(len(word) - NGRAM + 1))
+
+
+class InvertedIndex:
+    """Character n-gram token index with row-positional add/update/remove.
+
+    ``clone()`` shares the key -> posting and doc mappings with its parent
+    (see LayeredDict) and copies only the row -> doc list; the clone copies a
+    posting set the first time it changes it, so a clone costs the rows list
+    plus the postings it actually touches.
+    """
+
+    def __init__(self, normalize: Callable[[str], str]) -> None:
+        self._normalize = normalize
+        self._postings = LayeredDict()  # key -> Set[Unit]
+        self._docs = LayeredDict()  # doc -> (question, answers, normalized texts)
+        self._row_docs: List[int] = []
+        self._next_doc = count()
+        # keys whose posting set this instance may change; None = all of them
+        self._own_keys: Optional[Set[str]] = None
+
+    def __len__(self) -> int:
+        return len(self._row_docs)
+
+    def build(self, questions: Iterable[str], answer_lists: Iterable[List[str]]) -> None:
+        """Replace the contents with the given rows."""
+        # plain dicts while building: no layer or ownership checks per posting
+        postings: Dict[str, Set[Unit]] = defaultdict(set)
+        docs: Dict[int, Tuple[str, List[str], Tuple[str, ...]]] = {}
+        self._row_docs = []
+        for question, answers in zip(questions, answer_lists):
+            doc = next(self._next_doc)
+            texts = self._texts(question, answers)
+            for slot, keys in self._units(texts):
+                unit = (doc, slot)
+                for key in keys:
+                    postings[key].add(unit)
+            docs[doc] = (question, list(answers), texts)
+            self._row_docs.append(doc)
+        self._postings, self._docs = LayeredDict(dict(postings)), LayeredDict(docs)
+        self._own_keys = None
+
+    def clone(self) -> "InvertedIndex":
+        other = InvertedIndex(self._normalize)
+        other._postings = self._postings.clone()
+        other._docs = self._docs.clone()
+        other._row_docs = list(self._row_docs)
+        # the parent no longer changes, so sharing the id counter is safe
+        other._next_doc = self._next_doc
+        other._own_keys = set()
+        return other
+
+    def _posting(self, key: str) -> Set[Unit]:
+        """Return the posting of ``key`` for writing (copied if shared)."""
+        if self._own_keys is None or key in self._own_keys:
+            return self._postings.setdefault(key, set())
+        self._own_keys.add(key)
+        posting = self._postings[key] = set(self._postings.get(key, ()))
+        return posting
+
+    def _texts(self, question: str, answers: List[str]) -> Tuple[str, ...]:
+        """Normalized question, then answers, with single spaces."""
+        return tuple(" ".join(self._normalize(text).split()) for text in [question] + list(answers))
+
+    @staticmethod
+    def _units(texts: Tuple[str, ...]) -> Iterable[Tuple[int, Set[str]]]:
+        # texts[0] is the question (QUESTION_SLOT), texts[i + 1] answer i
+        for slot, text in enumerate(texts, QUESTION_SLOT):
+            yield slot, set().union(*map(_index_keys, set(text.split())))
+
+    def _post(self, doc: int, question: str, answers: List[str]) -> None:
+        texts = self._texts(question, answers)
+        for slot, keys in self._units(texts):
+            for key in keys:
+                self._posting(key).add((doc, slot))
+        self._docs[doc] = (question, list(answers), texts)
+
+    def _unpost(self, doc: int) -> None:
+        for slot, keys in self._units(self._docs.pop(doc)[2]):
+            for key in keys:
+                posting = self._posting(key)
+                posting.discard((doc, slot))
+                if not posting:
+                    del self._postings[key]
+
+    def add(self, question: str, answers: List[str]) -> None:
+        doc = next(self._next_doc)
+        self._post(doc, question, answers)
+        self._row_docs.append(doc)
+
+    def update(self, row: int, question: str, answers: List[str]) -> None:
+        """Re-index row ``row``; it keeps its doc id and so its position."""
+        doc = self._row_docs[row]
+        self._unpost(doc)
+        self._post(doc, question, answers)
+
+    def remove(self, row: int) -> None:
+        self._unpost(self._row_docs.pop(row))
+
+    def _lookup(self, token: str) -> Set[Unit]:
+        if len(token) >= NGRAM:
+            postings = [self._postings.get(gram) for gram in _index_keys(token)]
+            if not all(postings):
+                return set()
+            postings.sort(key=len)
+            candidates = postings[0].intersection(*postings[1:])
+            if len(token) == NGRAM:
+                return candidates
+            # sharing every n-gram does not make the token a substring: verify
+            return {(doc, slot) for doc, slot in candidates if token in self._docs[doc][2][slot + 1]}
+        # a shorter token lies inside some key (a short word or an n-gram)
+        found = set()
+        for key, units in self._postings.items():
+            if token in key:
+                found |= units
+        return found
+
+    def match(self, tokens: List[str]) -> List[str]:
+        """Return the answers matched by ``tokens`` in corpus order.
+
+        Mirrors the corpus scan filter_answers_by_query used to run: an answer
+        matches when it contains every token (counted with repetition). A Q&A
+        pair whose last answer did not match then continues that answer's
+        count over its question, and contributes all of its answers once the
+        combined count reaches the number of tokens.
+        """
+        required = len(tokens)
+        if not required:
+            return []
+
+        answer_hits: Counter = Counter()
+        last_hits: Counter = Counter()
+        question_hits: Counter = Counter()
+        for token in tokens:
+            for doc, slot in self._lookup(token):
+                if slot == QUESTION_SLOT:
+                    question_hits[doc] += 1
+                    continue
+                answer_hits[(doc, slot)] += 1
+                if slot == len(self._docs[doc][1]) - 1:
+                    last_hits[doc] += 1
+
+        hits = [unit for unit, n in answer_hits.items() if n >= required]
+        hits.extend(
+            (doc, QUESTION_SLOT) for doc, n in question_hits.items()
+            if self._docs[doc][1] and last_hits[doc] < required <= last_hits[doc] + n
+        )
+
+        matches = []
+        # within a pair, its matched answers come before the question's answers
+        for doc, slot in sorted(hits, key=lambda u: (u[0], u[1] if u[1] >= 0 else float("inf"))):
+            answers = self._docs[doc][1]
+            if slot == QUESTION_SLOT:
+                matches.extend(answers)
+            else:
+                matches.append(answers[slot])
+        return matches
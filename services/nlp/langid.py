@@ -0,0 +1,201 @@
+"""Local language identification.
+
+identify_language() answers "which language is this message" without a
+model call, in two steps:
+
+1. Script ratios: every letter is classified by Unicode block. A script used
+   by one language only (Cyrillic, Devanagari, Hangul, ...) decides the
+   language outright, with the script's share of the letters as confidence.
+2. For Arabic- and Latin-script text, a character 1-3 gram model scores the
+   languages written in that script (Arabic vs Urdu vs Persian, English vs
+   French vs ...). The confidence is the script ratio times the posterior of
+   the best language under a naive Bayes model. The prior favours the usual
+   language of the script in our traffic (SCRIPT_DEFAULTS) against each other
+   language: a one- or two-word message has too few n-grams to tell Arabic from
+   Persian, or English from Italian, and the prior decides it, while the
+   n-grams of a longer message outweigh it. Arabic-script text that contains
+   a Persian or Urdu letter (NON_ARABIC_LETTERS) gets a uniform prior.
+
+The n-gram model is data/langid_ngrams.json, trained from the sentences in
+data/langid_samples.json. After editing the samples, rebuild it with::
+
+    python -m services.nlp.langid
+"""
+
+from functools import lru_cache
+from itertools import repeat
+from math import exp, log
+from operator import add
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import bisect
+import json
+import os
+import re
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+MODEL_PATH = os.path.join(DATA_DIR, "langid_ngrams.json")
+SAMPLES_PATH = os.path.join(DATA_DIR, "langid_samples.json")
+
+# The n-gram code below is written out for 1- to 3-grams
+MAX_N = 3
+# Additive smoothing of the n-gram counts
+ALPHA = 0.1
+
+# (first code point, last code point, script), sorted by first code point
+_SCRIPT_RANGES = [
+    (0x0041, 0x005A, "latin"), (0x0061, 0x007A, "latin"), (0x00C0, 0x024F, "latin"),
+    (0x0370, 0x03FF, "greek"), (0x0400, 0x04FF, "cyrillic"), (0x0590, 0x05FF, "hebrew"),
+    (0x0600, 0x06FF, "arabic"), (0x0750, 0x077F, "arabic"), (0x08A0, 0x08FF, "arabic"),
+    (0x0900, 0x097F, "devanagari"), (0x0980, 0x09FF, "bengali"), (0x0B80, 0x0BFF, "tamil"),
+    (0x0D00, 0x0D7F, "malayalam"), (0x0D80, 0x0DFF, "sinhala"), (0x0E00, 0x0E7F, "thai"),
+    (0x1100, 0x11FF, "hangul"), (0x1200, 0x137F, "ethiopic"), (0x1E00, 0x1EFF, "latin"),
+    (0x3040, 0x30FF, "kana"), (0x4E00, 0x9FFF, "han"), (0xAC00, 0xD7AF, "hangul"),
+    (0xFB50, 0xFDFF, "arabic"), (0xFE70, 0xFEFF, "arabic"),
+]
+_RANGE_STARTS = [start for start, _, _ in _SCRIPT_RANGES]
+
+# Scripts written (in our traffic) by a single language
+SCRIPT_LANGUAGES = {
+    "greek": "Greek", "cyrillic": "Russian", "hebrew": "Hebrew", "devanagari": "Hindi",
+    "bengali": "Bengali", "tamil": "Tamil", "malayalam": "Malayalam", "sinhala": "Sinhala",
+    "thai": "Thai", "hangul": "Korean", "ethiopic": "Amharic", "kana": "Japanese", "han": "Chinese",
+}
+
+# Usual language of each shared script, and its prior odds against each of
+# the other languages of that script (Persian and Urdu are rare here)
+SCRIPT_DEFAULTS = {"arabic": ("Arabic", 1000.0), "latin": ("English", 100.0)}
+# Persian and Urdu letters that Arabic does not use (پ چ ژ گ ک ی and Urdu's)
+NON_ARABIC_LETTERS = frozenset("پچژگکیۍېٹڈڑںھہۂۃےۓ")
+
+_DIACRITICS_RE = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_NON_LETTERS_RE = re.compile(r"[\W\d_]+")
+
+
+class LanguageGuess(NamedTuple):
+    language: str
+    confidence: float
+
+
+class _ScriptTable(dict):
+    """Code point -> script (or None for non-letters), filled on first lookup."""
+
+    def __missing__(self, cp: int) -> Optional[str]:
+        script = None
+        if chr(cp).isalpha():
+            i = bisect.bisect_right(_RANGE_STARTS, cp) - 1
+            if i >= 0 and cp <= _SCRIPT_RANGES[i][1]:
+                script = _SCRIPT_RANGES[i][2]
+            else:
+                script = "other"
+        self[cp] = script
+        return script
+
+
+_SCRIPTS = _ScriptTable()
+
+
+def script_ratios(text: str) -> Dict[str, float]:
+    """Share of the letters of ``text`` written in each script."""
+    counts: Dict[str, int] = {}
+    for char in text:
+        script = _SCRIPTS[ord(char)]
+        if script:
+            counts[script] = counts.get(script, 0) + 1
+    total = sum(counts.values())
+    return {script: n / total for script, n in counts.items()} if total else {}
+
+
+def ngrams(text: str) -> List[str]:
+    """Character 1..MAX_N grams of the words of ``text``, padded with spaces."""
+    text = _NON_LETTERS_RE.sub(" ", _DIACRITICS_RE.sub("", text.lower()))
+    grams: List[str] = []
+    for word in text.split():
+        padded = f" {word} "
+        grams.extend(word)
+        grams.extend(map(add, padded, padded[1:]))
+        grams.extend(map(add, map(add, padded, padded[1:]), padded[2:]))
+    return grams
+
+
+def train(samples: Dict[str, Iterable[str]]) -> dict:
+    """Return the n-gram model (JSON-serializable) for ``{language: sentences}``."""
+    languages = {}
+    for language, sentences in samples.items():
+        counts: Dict[str, int] = {}
+        for sentence in sentences:
+            for gram in ngrams(sentence):
+                counts[gram] = counts.get(gram, 0) + 1
+        script = max(script_ratios(" ".join(sentences)).items(), key=lambda item: item[1])[0]
+        languages[language] = {"script": script, "total": sum(counts.values()), "grams": counts}
+    return {"max_n": MAX_N, "alpha": ALPHA, "languages": languages}
+
+
+class _Model:
+    """Log-probabilities of the trained n-grams, grouped by script."""
+
+    def __init__(self, data: dict) -> None:
+        alpha = data["alpha"]
+        vocab = len({gram for lang in data["languages"].values() for gram in lang["grams"]})
+        self.by_script: Dict[str, List[Tuple[str, Dict[str, float], float]]] = {}
+        for language, lang in data["languages"].items():
+            denominator = lang["total"] + alpha * vocab
+            logp = {gram: log((count + alpha) / denominator) for gram, count in lang["grams"].items()}
+            self.by_script.setdefault(lang["script"], []).append((language, logp, log(alpha / denominator)))
+
+    def posterior(self, script: str, grams: List[str], favoured: Optional[str] = None,
+                  odds: float = 1.0) -> Optional[LanguageGuess]:
+        candidates = self.by_script.get(script)
+        if not candidates or not grams:
+            return None
+        bonus = log(odds)
+        scores = [
+            (sum(map(logp.get, grams, repeat(unseen))) + (bonus if language == favoured else 0.0), language)
+            for language, logp, unseen in candidates
+        ]
+        best_score, best = max(scores)
+        # softmax of the log-likelihoods, relative to the best one
+        total = sum(exp(score - best_score) for score, _ in scores)
+        return LanguageGuess(best, 1.0 / total)
+
+
+_MODEL: Optional[_Model] = None
+
+
+def _model() -> _Model:
+    global _MODEL
+    if _MODEL is None:
+        with open(MODEL_PATH, "r", encoding="utf-8") as f:
+            _MODEL = _Model(json.load(f))
+    return _MODEL
+
+
+@lru_cache(maxsize=4096)
+def identify_language(text: str) -> LanguageGuess:
+    """Return ``(language, confidence)``; ``("Unknown", 0.0)`` without letters."""
+    ratios = script_ratios(text)
+    if not ratios:
+        return LanguageGuess("Unknown", 0.0)
+    script, ratio = max(ratios.items(), key=lambda item: item[1])
+    if script == "han" and "kana" in ratios:
+        script, ratio = "kana", ratio + ratios["kana"]
+    if script in SCRIPT_LANGUAGES:
+        return LanguageGuess(SCRIPT_LANGUAGES[script], ratio)
+    favoured, odds = SCRIPT_DEFAULTS.get(script, (None, 1.0))
+    if script == "arabic" and not NON_ARABIC_LETTERS.isdisjoint(text):
+        favoured = None
+    guess = _model().posterior(script, ngrams(text), favoured, odds)
+    if guess is None:
+        return LanguageGuess("Unknown", 0.0)
+    return LanguageGuess(guess.language, ratio * guess.confidence)
+
+
+def build_model(samples_path: str = SAMPLES_PATH, model_path: str = MODEL_PATH) -> None:
+    with open(samples_path, "r", encoding="utf-8") as f:
+        samples = json.load(f)
+    with open(model_path, "w", encoding="utf-8") as f:
+        json.dump(train(samples), f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+
+if __name__ == "__main__":
+    build_model()
+    print(f"wrote {MODEL_PATH}")
@@ -0,0 +1,96 @@
+"""Copy-on-write dict for the row indexes of an IndexSnapshot.
+
+Every FAQ write clones the snapshot's indexes (InvertedIndex, MinHashLSH) and
+changes a few rows of the clone. Copying their key maps on each clone made a
+write O(corpus); a LayeredDict clone shares its parent's map and records only
+its own changes on top of it.
+"""
+
+from typing import Any, Dict, Hashable, Iterator, Optional, Tuple
+
+# A clone folds its changes into a fresh base once they reach 1/COMPACT_RATIO
+# of the base, so a chain of clones costs amortized O(changes), not O(size)
+COMPACT_RATIO = 8
+
+_MISSING = object()
+
+
+class LayeredDict:
+    """Dict shared copy-on-write between an index and its clones.
+
+    Reads fall through ``_delta`` (this instance's changes, None = deleted)
+    to ``_base``, which is never changed once another instance shares it.
+    An instance that owns its base and has no delta writes to it directly.
+    """
+
+    __slots__ = ("_base", "_delta", "_owns_base", "_size")
+
+    def __init__(self, base: Optional[Dict[Hashable, Any]] = None) -> None:
+        self._base = {} if base is None else base
+        self._delta: Dict[Hashable, Any] = {}
+        self._owns_base = True
+        self._size = len(self._base)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._delta.get(key, _MISSING)
+        if value is _MISSING:
+            return self._base.get(key, default)
+        return default if value is None else value
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        if self.get(key, _MISSING) is _MISSING:
+            self._size += 1
+        if self._owns_base and not self._delta:
+            self._base[key] = value
+        else:
+            self._delta[key] = value
+
+    def __delitem__(self, key: Hashable) -> None:
+        if self.get(key, _MISSING) is _MISSING:
+            raise KeyError(key)
+        self._size -= 1
+        if self._owns_base and not self._delta:
+            del self._base[key]
+        else:
+            self._delta[key] = None
+
+    def setdefault(self, key: Hashable, default: Any) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            self[key] = value = default
+        return value
+
+    def pop(self, key: Hashable) -> Any:
+        value = self[key]
+        del self[key]
+        return value
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        for key, value in self._base.items():
+            if key not in self._delta:
+                yield key, value
+        for key, value in self._delta.items():
+            if value is not None:
+                yield key, value
+
+    def clone(self) -> "LayeredDict":
+        other = LayeredDict.__new__(LayeredDict)
+        other._size = self._size
+        if len(self._delta) * COMPACT_RATIO > len(self._base):
+            other._base = dict(self.items())
+            other._delta = {}
+            other._owns_base = True
+        else:
+            other._base = self._base
+            other._delta = dict(self._delta)
+            other._owns_base = False
+        return other
@@ -0,0 +1,225 @@
+"""MinHash signatures with LSH banding over question token sets.
+
+save_or_update_qa looks for a stored question whose token_overlap_score with
+the incoming one is at least 0.6. Comparing against every stored token set
+is linear in the corpus; this index returns a short list of candidate rows
+instead, which the caller then verifies with the exact score.
+
+Each token set gets NUM_PERM min-hashes (one per random affine permutation of
+a 32-bit token hash). The signature is cut into BANDS bands of ROWS values;
+two sets become candidates when any band is identical, which for sets of
+Jaccard similarity J happens with probability 1 - (1 - J**ROWS)**BANDS. The
+defaults (32 bands of 2) find pairs with J = 0.3 95% of the time and J = 0.5
+almost always. Short FAQ questions with an overlap score of 0.6 sit well
+above that, but a long query containing a short stored question can have a
+lower Jaccard, so a miss is possible; the verification step keeps false
+positives out.
+
+Each band's ROWS values are folded into one 64-bit integer (exact for the
+default ROWS = 2; wider bands can collide, which only adds candidates that
+the verification step drops). Every band has its own bucket map from that
+integer to the doc holding it, or to a frozenset when several docs share it.
+
+Rows are addressed by position, aligned with the snapshot's token_sets, and
+updated in place like InvertedIndex. The bucket and doc maps are LayeredDicts
+(see layered.py), so ``clone()`` shares them with its parent and copies only
+the row -> doc list; a change writes its buckets into the clone's own layer.
+``build()`` signs the rows in numpy batches and groups each band with a sort.
+"""
+
+from itertools import count
+from typing import Iterable, List, Optional, Sequence, Set, Tuple, Union
+import bisect
+import zlib
+
+import numpy as np
+
+from .layered import LayeredDict
+
+NUM_PERM = 64
+BANDS = 32
+# Rows signed per numpy batch by build()
+SIGN_CHUNK = 4096
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# One doc id, or the frozenset of the docs sharing a band value
+Bucket = Union[int, frozenset]
+
+
+def _permutations(num_perm: int, seed: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _MAX_HASH, num_perm, dtype=np.uint64)
+    b = rng.integers(0, _MAX_HASH, num_perm, dtype=np.uint64)
+    return a, b
+
+
+def token_hashes(tokens: Iterable[str]) -> np.ndarray:
+    # crc32 is stable across processes, unlike hash() on str
+    return np.fromiter((zlib.crc32(t.encode("utf-8")) for t in set(tokens)), dtype=np.uint64)
+
+
+def _members(bucket: Bucket) -> Iterable[int]:
+    return (bucket,) if isinstance(bucket, int) else bucket
+
+
+def _join(bucket: Optional[Bucket], doc: int) -> Bucket:
+    return doc if bucket is None else frozenset(_members(bucket)) | {doc}
+
+
+def _leave(bucket: Bucket, doc: int) -> Optional[Bucket]:
+    if isinstance(bucket, int):
+        return None
+    rest = bucket - {doc}
+    return next(iter(rest)) if len(rest) == 1 else rest
+
+
+class MinHashLSH:
+    """Banded MinHash index with row-positional add/update/remove."""
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._a, self._b = _permutations(num_perm)
+        # per band: folded band value -> Bucket
+        self._buckets: List[LayeredDict] = [LayeredDict() for _ in range(bands)]
+        # doc id -> its band values; docs without tokens have none
+        self._docs = LayeredDict()
+        self._row_docs: List[int] = []
+        self._next_doc = count()
+
+    def __len__(self) -> int:
+        return len(self._row_docs)
+
+    def signature(self, tokens: Iterable[str]) -> Optional[np.ndarray]:
+        """Return the min-hash signature of ``tokens`` (None for no tokens)."""
+        hashes = token_hashes(tokens)
+        if not hashes.size:
+            return None
+        # a < 2**32 and h < 2**32, so a * h + b fits in uint64
+        permuted = (np.outer(hashes, self._a) + self._b) % np.uint64(_PRIME)
+        return (permuted & np.uint64(_MAX_HASH)).min(axis=0).astype(np.uint32)
+
+    def signatures(self, token_sets: Sequence[Iterable[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Signatures of many token sets as an (n, num_perm) uint32 matrix,
+        plus a mask of the rows that have tokens (the others are zero).
+
+        Same values as signature(), computed SIGN_CHUNK rows per numpy call:
+        the token hashes of a chunk are permuted together and reduced per row.
+        """
+        hashes = [token_hashes(tokens) for tokens in token_sets]
+        lengths = np.array([len(h) for h in hashes], dtype=np.int64)
+        out = np.zeros((len(hashes), self.num_perm), dtype=np.uint32)
+        for start in range(0, len(hashes), SIGN_CHUNK):
+            rows = start + np.flatnonzero(lengths[start:start + SIGN_CHUNK])
+            if not len(rows):
+                continue
+            flat = np.concatenate([hashes[row] for row in rows])
+            permuted = (np.outer(flat, self._a) + self._b) % np.uint64(_PRIME)
+            offsets = np.concatenate(([0], np.cumsum(lengths[rows])[:-1]))
+            out[rows] = np.minimum.reduceat(permuted & np.uint64(_MAX_HASH), offsets, axis=0)
+        return out, lengths > 0
+
+    def _band_values(self, signatures: np.ndarray) -> np.ndarray:
+        """Fold each band of ``signatures`` into one uint64: (n, bands)."""
+        values = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        folded = values[:, :, 0]
+        for j in range(1, self.rows):
+            # wraps modulo 2**64 past two values per band
+            folded = folded * np.uint64(1 << 32) + values[:, :, j]
+        return folded
+
+    def _band_keys(self, tokens: Iterable[str]) -> Tuple[int, ...]:
+        signature = self.signature(tokens)
+        if signature is None:
+            return ()
+        return tuple(self._band_values(signature[None, :])[0].tolist())
+
+    def build(self, token_sets: Iterable[Sequence[str]]) -> None:
+        """Replace the contents with the given rows."""
+        signatures, has_tokens = self.signatures(list(token_sets))
+        values = self._band_values(signatures)
+        self._row_docs = [next(self._next_doc) for _ in range(len(values))]
+        self._docs = LayeredDict({
+            doc: tuple(keys) if present else ()
+            for doc, keys, present in zip(self._row_docs, values.tolist(), has_tokens.tolist())
+        })
+
+        present = np.flatnonzero(has_tokens)
+        ids = np.asarray(self._row_docs, dtype=np.int64)[present]
+        self._buckets = []
+        for band in range(self.bands):
+            # sort the band's values so that equal values form runs
+            order = np.argsort(values[present, band], kind="stable")
+            column, members = values[present, band][order], ids[order]
+            starts = np.flatnonzero(np.r_[True, column[1:] != column[:-1]])
+            sizes = np.diff(np.r_[starts, len(column)])
+            single = starts[sizes == 1]
+            buckets = dict(zip(column[single].tolist(), members[single].tolist()))
+            for start, size in zip(starts[sizes > 1].tolist(), sizes[sizes > 1].tolist()):
+                buckets[int(column[start])] = frozenset(members[start:start + size].tolist())
+            self._buckets.append(LayeredDict(buckets))
+
+    def clone(self) -> "MinHashLSH":
+        other = MinHashLSH.__new__(MinHashLSH)
+        other.__dict__.update(self.__dict__)
+        other._buckets = [buckets.clone() for buckets in self._buckets]
+        other._docs = self._docs.clone()
+        other._row_docs = list(self._row_docs)
+        # the parent no longer changes, so sharing the id counter is safe
+        return other
+
+    def _post(self, doc: int, tokens: Sequence[str]) -> None:
+        keys = self._band_keys(tokens)
+        for buckets, key in zip(self._buckets, keys):
+            buckets[key] = _join(buckets.get(key), doc)
+        self._docs[doc] = keys
+
+    def _unpost(self, doc: int) -> None:
+        for buckets, key in zip(self._buckets, self._docs.pop(doc)):
+            rest = _leave(buckets[key], doc)
+            if rest is None:
+                del buckets[key]
+            else:
+                buckets[key] = rest
+
+    def add(self, tokens: Sequence[str]) -> None:
+        doc = next(self._next_doc)
+        self._post(doc, tokens)
+        self._row_docs.append(doc)
+
+    def update(self, row: int, tokens: Sequence[str]) -> None:
+        """Re-index row ``row``; it keeps its doc id and so its position."""
+        doc = self._row_docs[row]
+        self._unpost(doc)
+        self._post(doc, tokens)
+
+    def remove(self, row: int) -> None:
+        self._unpost(self._row_docs.pop(row))
+
+    def _row(self, doc: int) -> int:
+        # doc ids only grow and rows keep their ids, so _row_docs is sorted
+        return bisect.bisect_left(self._row_docs, doc)
+
+    def candidates(self, tokens: Sequence[str]) -> List[int]:
+        """Rows sharing at least one band with ``tokens``, in row order."""
+        docs: Set[int] = set()
+        for buckets, key in zip(self._buckets, self._band_keys(tokens)):
+            bucket = buckets.get(key)
+            if bucket is not None:
+                docs.update(_members(bucket))
+        return sorted(self._row(doc) for doc in docs)
+
+    def candidate_pairs(self) -> List[Tuple[int, int]]:
+        """All row pairs sharing a band, as sorted ``(row, other_row)`` pairs."""
+        pairs = set()
+        for buckets in self._buckets:
+            for _, bucket in buckets.items():
+                if not isinstance(bucket, int):
+                    rows = sorted(self._row(doc) for doc in bucket)
+                    pairs.update((r, s) for i, r in enumerate(rows) for s in rows[i + 1:])
+        return sorted(pairs)
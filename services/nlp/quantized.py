@@ -0,0 +1,192 @@
+"""Compressed question-embedding index: int8 codes, optional PCA, float32 rerank.
+
+QuantizedIndex stores each normalized vector as int8 codes with one float32
+scale per row (``x ~= scale * code``). That is a quarter of the float32
+matrix, and PCA to ``pca_dim`` dimensions fitted on the corpus shrinks it
+further. Search scores every row on the compressed form, keeps the best
+``k * rerank`` candidates and re-scores those with full-precision vectors
+from ``fetch`` (row ids -> float32 vectors), so the float32 matrix never
+has to be held in memory.
+
+Memory per 100k 384-dim questions: float32 153.6 MB, int8 38.8 MB, int8 on
+128 PCA dims 13.4 MB (see benchmarks/bench_quantized_index.py for recall).
+"""
+
+from typing import Callable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .similarity import VectorIndex, l2_normalize
+
+# Rows sampled to fit the PCA projection
+PCA_SAMPLE = 20000
+# Rows dequantized per block while scoring, bounds the float32 scratch space
+SCORE_BLOCK = 4096
+
+
+def _quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class QuantizedIndex(VectorIndex):
+    """Cosine top-k over int8 (optionally PCA-reduced) codes with float32 rerank.
+
+    Row ids are positional like VectorIndex. ``fetch(ids)`` must return the
+    float32 vectors of those rows; without it results are ranked on the
+    compressed scores alone.
+    """
+
+    _buffers = ("_codes", "_scales")
+
+    def __init__(self, pca_dim: Optional[int] = None, rerank: int = 4,
+                 fetch: Optional[Callable[[Sequence[int]], np.ndarray]] = None, seed: int = 0) -> None:
+        super().__init__()
+        self.pca_dim = pca_dim
+        self.rerank = rerank
+        self.fetch = fetch
+        self._rng = np.random.default_rng(seed)
+        self._dim = 0
+        self._codes = np.zeros((0, 0), dtype=np.int8)
+        self._scales = np.zeros(0, dtype=np.float32)
+        self._mean: Optional[np.ndarray] = None
+        self._components: Optional[np.ndarray] = None
+
+    @property
+    def dim(self) -> int:
+        return self._dim
+
+    @property
+    def code_dim(self) -> int:
+        return self._codes.shape[1]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Reconstruction of the normalized vectors from their codes."""
+        return self._decode(slice(0, self._size))
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the live codes, scales and PCA projection."""
+        size = self._codes[:self._size].nbytes + self._scales[:self._size].nbytes
+        if self._components is not None:
+            size += self._components.nbytes + self._mean.nbytes
+        return size
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+    def _fit_pca(self, vectors: np.ndarray) -> None:
+        self._mean, self._components = None, None
+        if not self.pca_dim or self.pca_dim >= vectors.shape[1] or len(vectors) < 2 * self.pca_dim:
+            return
+        sample = vectors
+        if len(vectors) > PCA_SAMPLE:
+            sample = vectors[self._rng.choice(len(vectors), PCA_SAMPLE, replace=False)]
+        mean = sample.mean(axis=0)
+        _, _, vt = np.linalg.svd(sample - mean, full_matrices=False)
+        self._mean = mean.astype(np.float32)
+        self._components = np.ascontiguousarray(vt[:self.pca_dim].T, dtype=np.float32)
+
+    def _project(self, vectors: np.ndarray) -> np.ndarray:
+        if self._components is None:
+            return vectors
+        return (vectors - self._mean) @ self._components
+
+    def _encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return _quantize(self._project(l2_normalize(np.atleast_2d(vectors))))
+
+    def _decode(self, rows) -> np.ndarray:
+        approx = self._codes[rows].astype(np.float32) * self._scales[rows, None]
+        if self._components is None:
+            return approx
+        return approx @ self._components.T + self._mean
+
+    def _reserve(self, size: int, dim: int) -> None:
+        if self._size == 0 and self._dim != dim:
+            self._dim = dim
+            self._codes = np.zeros((0, self.code_dim if self._components is not None else dim), dtype=np.int8)
+            self._scales = np.zeros(0, dtype=np.float32)
+            self._owns_buffers = True
+        if dim != self._dim:
+            raise ValueError(f"vector dim {dim} does not match index dim {self._dim}")
+        if size > len(self._codes):
+            capacity = max(size, 2 * len(self._codes), 16)
+            codes = np.zeros((capacity, self._codes.shape[1]), dtype=np.int8)
+            codes[:self._size] = self._codes[:self._size]
+            scales = np.ones(capacity, dtype=np.float32)
+            scales[:self._size] = self._scales[:self._size]
+            self._codes, self._scales = codes, scales
+            self._owns_buffers = True
+
+    # ------------------------------------------------------------------
+    # VectorIndex interface
+    # ------------------------------------------------------------------
+    def build(self, vectors: np.ndarray) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self._size = 0
+        self._owns_buffers = True
+        if vectors.size == 0:
+            self._dim = 0
+            self._mean, self._components = None, None
+            self._codes, self._scales = np.zeros((0, 0), dtype=np.int8), np.zeros(0, dtype=np.float32)
+            return
+        normalized = l2_normalize(vectors)
+        self._fit_pca(normalized)
+        self._dim = vectors.shape[1]
+        self._codes, self._scales = _quantize(self._project(normalized))
+        self._size = len(vectors)
+
+    def add(self, vector: np.ndarray) -> int:
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        self._reserve(self._size + 1, vector.shape[0])
+        codes, scales = self._encode(vector)
+        self._codes[self._size], self._scales[self._size] = codes[0], scales[0]
+        self._size += 1
+        return self._size - 1
+
+    def update(self, idx: int, vector: np.ndarray) -> None:
+        if not 0 <= idx < self._size:
+            raise IndexError(idx)
+        codes, scales = self._encode(np.asarray(vector, dtype=np.float32).reshape(-1))
+        self._detach()
+        self._codes[idx], self._scales[idx] = codes[0], scales[0]
+
+    def remove(self, idx: int) -> None:
+        if not 0 <= idx < self._size:
+            raise IndexError(idx)
+        self._detach()
+        self._codes[idx:self._size - 1] = self._codes[idx + 1:self._size]
+        self._scales[idx:self._size - 1] = self._scales[idx + 1:self._size]
+        self._size -= 1
+
+    def _compressed_scores(self, query: np.ndarray) -> np.ndarray:
+        projected = query if self._components is None else self._components.T @ query
+        offset = 0.0 if self._mean is None else float(self._mean @ query)
+        scores = np.empty(self._size, dtype=np.float32)
+        for start in range(0, self._size, SCORE_BLOCK):
+            end = min(start + SCORE_BLOCK, self._size)
+            scores[start:end] = self._codes[start:end].astype(np.float32) @ projected
+        return scores * self._scales[:self._size] + offset
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = l2_normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        k = min(k, self._size)
+        out_sims = np.zeros((len(queries), max(k, 0)), dtype=np.float32)
+        out_ids = np.zeros((len(queries), max(k, 0)), dtype=np.int64)
+        if k <= 0:
+            return out_sims, out_ids
+
+        shortlist = min(self._size, k * max(self.rerank, 1) if self.fetch is not None else k)
+        for row, query in enumerate(queries):
+            scores = self._compressed_scores(query)
+            ids = np.argpartition(-scores, shortlist - 1)[:shortlist] if shortlist < self._size \
+                else np.arange(self._size)
+            sims = scores[ids]
+            if self.fetch is not None:
+                sims = l2_normalize(np.asarray(self.fetch(ids.tolist()), dtype=np.float32)) @ query
+            order = np.argsort(-sims, kind="stable")[:k]
+            out_sims[row], out_ids[row] = sims[order], ids[order]
+        return out_sims, out_ids
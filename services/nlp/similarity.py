@@ -0,0 +1,133 @@
+"""Exact cosine-similarity search over question embeddings.
+
+VectorIndex keeps every vector L2-normalized in one contiguous float32 matrix,
+so the cosine similarity of a batch of queries against the whole corpus is a
+single matrix product and top-k selection is an ``argpartition``.
+"""
+
+from typing import Tuple
+import copy
+
+import numpy as np
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    """Return float32 rows scaled to unit length (zero rows stay zero)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class VectorIndex:
+    """Brute-force cosine top-k index with in-place add/update/remove.
+
+    Row ids are positions, so they stay aligned with the snapshot's questions:
+    removing row ``i`` shifts every later row down by one, exactly like
+    ``del list[i]``.
+
+    ``clone()`` returns a copy that shares the storage buffers. Appending to
+    the clone writes past the parent's size, which the parent never reads, so
+    the parent stays valid; any in-place change first gives the clone its own
+    buffers.
+    """
+
+    # array attributes that clones share until they change a live row
+    _buffers: Tuple[str, ...] = ("_data",)
+
+    def __init__(self) -> None:
+        self._data = np.zeros((0, 0), dtype=np.float32)
+        self._size = 0
+        self._owns_buffers = True
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def dim(self) -> int:
+        return self._data.shape[1]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The live (size, dim) matrix of normalized vectors."""
+        return self._data[:self._size]
+
+    def clone(self) -> "VectorIndex":
+        """Return a copy for copy-on-write updates (see the class docstring)."""
+        other = copy.copy(self)
+        other._owns_buffers = False
+        return other
+
+    def _detach(self) -> None:
+        if not self._owns_buffers:
+            for name in self._buffers:
+                setattr(self, name, getattr(self, name).copy())
+            self._owns_buffers = True
+
+    def build(self, vectors: np.ndarray) -> None:
+        """Replace the whole contents with ``vectors`` (shape (n, dim))."""
+        self._owns_buffers = True
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.size == 0:
+            self._data = np.zeros((0, 0), dtype=np.float32)
+            self._size = 0
+            return
+        self._data = np.ascontiguousarray(l2_normalize(vectors))
+        self._size = vectors.shape[0]
+
+    def _reserve(self, size: int, dim: int) -> None:
+        if self._size == 0 and self.dim != dim:
+            self._data = np.zeros((0, dim), dtype=np.float32)
+            self._owns_buffers = True
+        if dim != self.dim:
+            raise ValueError(f"vector dim {dim} does not match index dim {self.dim}")
+        if size > self._data.shape[0]:
+            # grow geometrically so a run of appends costs amortized O(dim) each
+            grown = np.zeros((max(size, 2 * self._data.shape[0], 16), dim), dtype=np.float32)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+            self._owns_buffers = True
+
+    def add(self, vector: np.ndarray) -> int:
+        """Append one vector and return its row id."""
+        vector = l2_normalize(np.asarray(vector, dtype=np.float32).reshape(-1))
+        self._reserve(self._size + 1, vector.shape[0])
+        self._data[self._size] = vector
+        self._size += 1
+        return self._size - 1
+
+    def update(self, idx: int, vector: np.ndarray) -> None:
+        """Overwrite row ``idx``."""
+        if not 0 <= idx < self._size:
+            raise IndexError(idx)
+        self._detach()
+        self._data[idx] = l2_normalize(np.asarray(vector, dtype=np.float32).reshape(-1))
+
+    def remove(self, idx: int) -> None:
+        """Delete row ``idx``; later rows shift down by one."""
+        if not 0 <= idx < self._size:
+            raise IndexError(idx)
+        self._detach()
+        self._data[idx:self._size - 1] = self._data[idx + 1:self._size]
+        self._size -= 1
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(similarities, ids)`` of the ``k`` nearest rows per query.
+
+        ``queries`` is one vector or a (m, dim) batch; both results have shape
+        (m, min(k, len(self))) and are sorted by decreasing cosine similarity.
+        """
+        queries = l2_normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        k = min(k, self._size)
+        if k <= 0:
+            empty = np.zeros((queries.shape[0], 0))
+            return empty.astype(np.float32), empty.astype(np.int64)
+
+        sims = queries @ self.matrix.T
+        if k < self._size:
+            top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(self._size), (queries.shape[0], self._size))
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1, kind="stable")
+        return np.take_along_axis(top_sims, order, axis=1), np.take_along_axis(top, order, axis=1)
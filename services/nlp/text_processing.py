@@ -0,0 +1,140 @@
+"""Arabic text normalization and tokenization.
+
+normalize() does in a single ``str.translate`` pass what normalize_ar used to
+do with four regex substitutions: lower-case, drop diacritics and tatweel,
+fold letter variants, and turn everything that is not Arabic, a digit or a
+decimal point into a space. The translate table is filled lazily per code
+point, so it never holds more than the characters actually seen.
+
+Folding maps the alef forms (أ إ آ ٱ) to ا, ة to ه, ى to ي, ؤ to و and ئ to
+ي, so spelling variants of the same word normalize to the same string.
+
+Results are memoized in a bounded LRU cache: FAQ questions and answers are
+normalized over and over (index builds, duplicate checks, filtering), and user
+messages repeat.
+
+fold_words() is the script-neutral variant used by lexicon matchers
+(greetings, moderation): it keeps Latin and other scripts, drops Latin
+accents and apostrophes, and applies the same Arabic folding.
+"""
+
+from functools import lru_cache
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from keyWords import ARABIC_STOPWORDS
+
+# Distinct texts kept by the normalize/tokenize memo caches
+MEMO_SIZE = 8192
+
+TATWEEL = "ـ"
+FOLDING = {
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ة": "ه",
+    "ى": "ي",
+    "ؤ": "و",
+    "ئ": "ي",
+}
+_DIACRITIC_RANGES = ((0x0610, 0x061A), (0x064B, 0x065F), (0x06D6, 0x06ED))
+_EXTRA_ALLOWED = set("0123456789٠١٢٣٤٥٦٧٨٩.٫")
+
+DIACRITICS = {cp: None for start, end in _DIACRITIC_RANGES for cp in range(start, end + 1)}
+# For diacritics alone one compiled regex is faster than translate
+_DIACRITICS_RE = re.compile("[" + "".join(f"{chr(start)}-{chr(end)}" for start, end in _DIACRITIC_RANGES) + "]")
+
+
+class _NormalizeTable(dict):
+    """``str.translate`` table whose entries are computed on first lookup."""
+
+    def __missing__(self, cp: int) -> Optional[str]:
+        value = self._translate(chr(cp))
+        self[cp] = value
+        return value
+
+    @staticmethod
+    def _translate(char: str) -> Optional[str]:
+        if ord(char) in DIACRITICS or char == TATWEEL:
+            return None
+        lowered = char.lower()
+        if len(lowered) == 1:
+            char = lowered
+        if char in FOLDING:
+            return FOLDING[char]
+        if "؀" <= char <= "ۿ" or char in _EXTRA_ALLOWED or char.isspace():
+            return char
+        return " "
+
+
+_TABLE = _NormalizeTable()
+
+
+def remove_diacritics(text: str) -> str:
+    """Drop Arabic diacritics (harakat and Quranic marks) only."""
+    return _DIACRITICS_RE.sub("", text)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def normalize(text: str) -> str:
+    """Return the folded, diacritic-free, space-collapsed form of ``text``."""
+    return " ".join(text.translate(_TABLE).split())
+
+
+STOPWORDS = frozenset(filter(None, (normalize(word) for word in ARABIC_STOPWORDS)))
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _tokenize(text: str) -> Tuple[str, ...]:
+    return tuple(word for word in normalize(text).split() if word not in STOPWORDS)
+
+
+def tokenize(text: str) -> List[str]:
+    """Return the normalized non-stopword tokens of ``text`` (a fresh list)."""
+    return list(_tokenize(text))
+
+
+class _FoldTable(dict):
+    """``str.translate`` table of fold_words(), filled on first lookup."""
+
+    def __missing__(self, cp: int) -> Optional[str]:
+        char = chr(cp)
+        if cp in DIACRITICS or char == TATWEEL or char in "'’`":
+            value = None
+        elif char in FOLDING:
+            value = FOLDING[char]
+        elif char == "ı":
+            value = "i"
+        elif 0x00C0 <= cp <= 0x024F or 0x1E00 <= cp <= 0x1EFF:
+            value = "".join(c for c in unicodedata.normalize("NFKD", char) if not unicodedata.combining(c))
+        else:
+            value = char
+        self[cp] = value
+        return value
+
+
+_FOLD_TABLE = _FoldTable()
+_WORD_RE = re.compile(r"\w+")
+
+
+def fold_words(text: str) -> List[str]:
+    """Lower-cased, folded words of ``text`` in any script (no stopword removal)."""
+    return _WORD_RE.findall(text.lower().translate(_FOLD_TABLE))
+
+
+def normalize_many(texts: Iterable[str]) -> List[str]:
+    """normalize() over a batch, sharing the memo cache."""
+    return list(map(normalize, texts))
+
+
+def tokenize_many(texts: Iterable[str]) -> List[List[str]]:
+    """tokenize() over a batch, sharing the memo cache."""
+    return [list(tokens) for tokens in map(_tokenize, texts)]
+
+
+def cache_info() -> Dict[str, object]:
+    return {"normalize": normalize.cache_info()._asdict(), "tokenize": _tokenize.cache_info()._asdict()}
+
+
+def clear_caches() -> None:
+    normalize.cache_clear()
+    _tokenize.cache_clear()
@@ -0,0 +1,108 @@
+"""One structured Gemini call that prepares a user message for retrieval.
+
+get_best_answer used to ask Gemini for the language (or a greeting reply) in
+free text, guess which of the two it got by looking for words like "help",
+and then make a second call to translate a non-Arabic message to Arabic.
+preprocess_message() does both in one call whose output is constrained by
+PREPROCESS_SCHEMA, so the reply is parsed as JSON instead of guessed at.
+
+Most messages are Arabic and need neither translation nor a language name
+from Gemini: when the local identifier (nlp/langid.py) is confident the text
+is Arabic, the call is skipped (greetings never get here, get_best_answer
+answers them with nlp/greetings.py). STATS counts both outcomes.
+"""
+
+from typing import Any, Dict
+import json
+
+from .llm_gateway import LLM
+from .nlp.langid import identify_language
+from .state import LANGID_MIN_CONFIDENCE
+
+PREPROCESS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "language": {"type": "string"},
+        "is_greeting": {"type": "boolean"},
+        "greeting_reply": {"type": "string"},
+        "arabic_translation": {"type": "string"},
+    },
+    "required": ["language", "is_greeting", "greeting_reply", "arabic_translation"],
+}
+
+# "local": answered by the language identifier (Gemini call avoided),
+# "gemini": sent to Gemini
+STATS = {"local": 0, "gemini": 0}
+
+PREPROCESS_PROMPT = """You are a multilingual assistant preparing a customer message for an Arabic FAQ search.
+Fill the JSON fields:
+- language: the English name of the message language (Arabic, English, French, ...).
+- is_greeting: true if the message is only a greeting (hello, hi, مرحبا, hola, bonjour, ...) or only asks
+  whether you can help, without a concrete question.
+- greeting_reply: when is_greeting is true, a warm greeting in the message language followed by
+  "How can I help you today?" in that language (if they asked for help, say you are here to help them);
+  otherwise an empty string.
+- arabic_translation: the message translated to Arabic, text only; the message unchanged if it is Arabic.
+
+Message:
+{text}
+"""
+
+
+def parse_preprocess_response(raw: str, user_input: str) -> Dict[str, Any]:
+    """Validate the JSON returned by Gemini; raises ValueError if unusable."""
+    data = json.loads(raw)
+    if not isinstance(data, dict):
+        raise ValueError("preprocess response is not an object")
+    language = str(data.get("language") or "").strip()
+    if not language:
+        raise ValueError("preprocess response has no language")
+    language = language.split()[0].capitalize()
+    is_greeting = bool(data.get("is_greeting"))
+    greeting_reply = str(data.get("greeting_reply") or "").strip()
+    translation = str(data.get("arabic_translation") or "").strip()
+    if language.lower() == "arabic" or not translation:
+        translation = user_input
+    return {
+        "language": language,
+        "is_greeting": is_greeting and bool(greeting_reply),
+        "greeting_reply": greeting_reply,
+        "arabic_translation": translation,
+    }
+
+
+def local_preprocess(user_input: str):
+    """Return the pre-processing result for confidently Arabic text, or None
+    when Gemini has to look at the message."""
+    guess = identify_language(user_input)
+    if guess.language != "Arabic" or guess.confidence < LANGID_MIN_CONFIDENCE:
+        return None
+    return {"language": "Arabic", "is_greeting": False, "greeting_reply": "", "arabic_translation": user_input}
+
+
+def preprocess_message(user_input: str) -> Dict[str, Any]:
+    """Return ``{language, is_greeting, greeting_reply, arabic_translation}``.
+
+    Raises on API or parsing errors; the caller falls back to Arabic.
+    """
+    local = local_preprocess(user_input)
+    if local is not None:
+        STATS["local"] += 1
+        return local
+    STATS["gemini"] += 1
+
+    resp = LLM.generate(
+        "langid",
+        PREPROCESS_PROMPT.format(text=user_input),
+        generation_config={"response_mime_type": "application/json", "response_schema": PREPROCESS_SCHEMA},
+    )
+    return parse_preprocess_response(resp.text, user_input)
+
+
+def stats() -> Dict[str, Any]:
+    total = STATS["local"] + STATS["gemini"]
+    return {
+        "gemini_calls_avoided": STATS["local"],
+        "gemini_calls": STATS["gemini"],
+        "avoided_rate": round(STATS["local"] / total, 3) if total else 0.0,
+    }
@@ -0,0 +1,144 @@
+"""Write-behind queue for Q&A pairs learned by get_best_answer.
+
+The reply path used to call save_or_update_qa before answering, paying a
+faq.db write and an index update (plus an embedding of the new question) on
+every fallback reply. QAWriter.enqueue() only filters the pair and puts it on
+a bounded queue; one worker thread waits ``debounce_ms`` for more pairs to
+arrive, keeps the last answer per normalized question, and applies the batch
+through save_or_update_qa_batch (one store transaction, one published index
+snapshot). When the queue is full the pair is dropped and counted: learning
+is best effort and never slows a reply down.
+
+should_learn() keeps fallback texts out of the FAQ: the "not found" reply,
+warnings and error messages would otherwise be learned as answers.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from .embedding_cache import normalized_key
+from .normalize_ar import normalize_ar
+from .save_or_update_qa import save_or_update_qa_batch
+from .state import QA_WRITER_QUEUE_SIZE, QA_WRITER_DEBOUNCE_MS, QA_WRITER_MAX_BATCH
+
+LOGGER = logging.getLogger(__name__)
+
+# Replies that must never be stored as answers (matched after normalization)
+NOT_LEARNED_MARKERS = ("لم أجد إجابة", "لم أجد الإجابة")
+NOT_LEARNED_PREFIXES = ("⚠️", "❌")
+_MARKERS = tuple(normalize_ar(marker) for marker in NOT_LEARNED_MARKERS)
+
+
+def should_learn(question: str, answer: str) -> bool:
+    """False for empty pairs and for fallback, warning or error replies."""
+    if not question or not question.strip() or not isinstance(answer, str) or not answer.strip():
+        return False
+    if answer.lstrip().startswith(NOT_LEARNED_PREFIXES):
+        return False
+    normalized = normalize_ar(answer)
+    return not any(marker in normalized for marker in _MARKERS)
+
+
+class QAWriter:
+    """Bounded, debounced background writer of learned Q&A pairs."""
+
+    def __init__(self, apply_fn: Callable[[List[Tuple[str, str]]], None], max_pending: int = 256,
+                 debounce_ms: float = 500.0, max_batch: int = 64) -> None:
+        self.apply_fn = apply_fn
+        self.debounce = debounce_ms / 1000.0
+        self.max_batch = max_batch
+        self.enqueued = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.batches = 0
+        self.written = 0
+        self.errors = 0
+        self._queue: "queue.Queue[Tuple[str, str]]" = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="qa-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def enqueue(self, question: str, answer: str) -> bool:
+        """Queue a pair for learning; returns False if it was filtered or dropped."""
+        if not should_learn(question, answer):
+            self.rejected += 1
+            return False
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((question, answer))
+        except queue.Full:
+            self.dropped += 1
+            LOGGER.warning("⚠️ قائمة حفظ الأسئلة ممتلئة، تم تجاهل: %s", question)
+            return False
+        self.enqueued += 1
+        return True
+
+    def _collect(self) -> List[Tuple[str, str]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.debounce
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            # the same question asked again within the window: keep the last answer
+            latest: Dict[str, Tuple[str, str]] = {}
+            for question, answer in batch:
+                latest.pop(normalized_key(question), None)
+                latest[normalized_key(question)] = (question, answer)
+            try:
+                self.apply_fn(list(latest.values()))
+                self.batches += 1
+                self.written += len(latest)
+            except Exception as exc:
+                self.errors += 1
+                LOGGER.warning("⚠️ فشل حفظ %s سؤال: %s", len(latest), exc, exc_info=True)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued pair is applied; False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "written": self.written,
+            "errors": self.errors,
+        }
+
+
+QA_WRITER = QAWriter(
+    save_or_update_qa_batch,
+    max_pending=QA_WRITER_QUEUE_SIZE,
+    debounce_ms=QA_WRITER_DEBOUNCE_MS,
+    max_batch=QA_WRITER_MAX_BATCH,
+)
@@ -0,0 +1,38 @@
+"""Cached encoding of user queries.
+
+Traffic repeats the same few questions (services, prices, greetings), so query
+vectors are kept in a bounded LRU keyed by the normalized query text. A hit
+skips the embedder entirely. initialize_memory() clears the cache whenever
+the FAQ index is rebuilt. Misses go through EMBED_BATCHER, which merges
+concurrent requests into one batched model call.
+"""
+
+import numpy as np
+
+from .embedding_batcher import EmbeddingBatcher
+from .embedding_cache import EMPTY_KEY, normalized_key
+from .lru_cache import LRUCache
+from .state import get_embedder, QUERY_CACHE_SIZE, EMBED_BATCH_MAX, EMBED_BATCH_WAIT_MS
+
+QUERY_CACHE = LRUCache(QUERY_CACHE_SIZE)
+EMBED_BATCHER = EmbeddingBatcher(
+    lambda texts: get_embedder().encode(texts, show_progress_bar=False, batch_size=EMBED_BATCH_MAX),
+    max_batch=EMBED_BATCH_MAX,
+    max_wait_ms=EMBED_BATCH_WAIT_MS,
+)
+
+
+def encode_query(text: str) -> np.ndarray:
+    """Return the float32 embedding of ``text`` (read-only, may be shared)."""
+    key = normalized_key(text)
+    vector = QUERY_CACHE.get(key) if key != EMPTY_KEY else None
+    if vector is None:
+        vector = EMBED_BATCHER.encode([text])[0].copy()
+        vector.setflags(write=False)
+        if key != EMPTY_KEY:
+            QUERY_CACHE.put(key, vector)
+    return vector
+
+
+def clear_query_cache() -> None:
+    QUERY_CACHE.clear()
@@ -1,4 +1,5 @@
-import re
+from .nlp.text_processing import remove_diacritics as _remove_diacritics
+
 
 def remove_diacritics(text):
-    return re.sub(r'[\u0610-\u061A\u064B-\u065F\u06D6-\u06ED]', '', text)
+    return _remove_diacritics(text)
@@ -0,0 +1,72 @@
+"""Incremental delivery of a reply while get_best_answer is still running.
+
+Some replies take seconds to build (a shift selection calls the packages API,
+then Gemini to format the packages). stream_reply() runs the reply function
+in a worker thread with a sink installed in a context variable; code on the
+reply path calls emit() with the parts that are ready (the confirmation
+line, then the Gemini text as it streams in) and still returns the full
+reply as before. Outside stream_reply() emit() does nothing, so /chat is
+unchanged.
+
+stream_reply() yields ``("delta", text)`` for each emitted part, then any
+part of the returned reply that was not emitted, and finally
+``("done", reply)`` with the full reply, which the client should keep (it
+may differ from the deltas if a streamed step failed and fell back).
+"""
+
+from typing import Any, Callable, Iterator, Optional, Tuple
+import contextvars
+import queue
+import threading
+
+_SINK: "contextvars.ContextVar[Optional[Callable[[str], None]]]" = contextvars.ContextVar("reply_sink", default=None)
+_DONE = object()
+
+
+def streaming() -> bool:
+    """True when the current reply is being streamed to the client."""
+    return _SINK.get() is not None
+
+
+def emit(text: str) -> None:
+    """Send ``text`` to the client now, if the reply is streamed."""
+    sink = _SINK.get()
+    if sink is not None and text:
+        sink(text)
+
+
+def stream_reply(fn: Callable[..., str], *args: Any) -> Iterator[Tuple[str, str]]:
+    """Run ``fn(*args)`` and yield its emitted parts, then ``("done", reply)``.
+
+    Errors raised by ``fn`` are raised by the iterator after the parts
+    emitted before them.
+    """
+    parts: "queue.Queue[Any]" = queue.Queue()
+    outcome = {}
+
+    def run() -> None:
+        _SINK.set(parts.put)
+        try:
+            outcome["reply"] = fn(*args)
+        except Exception as exc:
+            outcome["error"] = exc
+        finally:
+            parts.put(_DONE)
+
+    threading.Thread(target=run, name="reply-stream", daemon=True).start()
+
+    sent = []
+    while True:
+        part = parts.get()
+        if part is _DONE:
+            break
+        sent.append(part)
+        yield "delta", part
+
+    if "error" in outcome:
+        raise outcome["error"]
+    reply = outcome["reply"]
+    streamed = "".join(sent)
+    if reply.startswith(streamed) and len(reply) > len(streamed):
+        yield "delta", reply[len(streamed):]
+    yield "done", reply
@@ -0,0 +1,69 @@
+"""Cache of replies that depend only on the message text and the FAQ corpus.
+
+get_best_answer() has two such stages:
+
+* ``"faq"``: the direct FAQ filter for messages that are not about services;
+* ``"answer"``: the general path (language detection, translation, retrieval
+  and translation back), which otherwise costs several Gemini calls.
+
+Entries are keyed by ``(stage, normalized text, corpus version)``; messages
+without letters or digits (normalized_key() == EMPTY_KEY) are not cached. Every write
+to the indexed FAQ bumps the version (faq_index.py, initialize_memory), and a
+reply is stored under the version read *before* it was computed, so a write
+that lands meanwhile files it under an old version: stale replies are never
+served and simply age out of the LRU. The TTL bounds how long a reply built
+from Gemini output is reused.
+"""
+
+from collections import Counter
+from typing import Any, Dict, Tuple
+
+from .embedding_cache import EMPTY_KEY, normalized_key
+from .lru_cache import LRUCache
+from .state import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, corpus_version
+
+RESPONSE_CACHE = LRUCache(RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+STAGE_HITS: Counter = Counter()
+STAGE_MISSES: Counter = Counter()
+
+_MISSING = object()
+
+
+def lookup(stage: str, text: str) -> Tuple[bool, Any]:
+    """Return ``(hit, value)`` for ``text`` at ``stage`` in the current corpus."""
+    key = normalized_key(text)
+    # a message of emoji or punctuation only has no usable key
+    value = RESPONSE_CACHE.get((stage, key, corpus_version()), _MISSING) if key != EMPTY_KEY else _MISSING
+    if value is _MISSING:
+        STAGE_MISSES[stage] += 1
+        return False, None
+    STAGE_HITS[stage] += 1
+    return True, value
+
+
+def store(stage: str, text: str, value: Any, version: int) -> None:
+    """Cache ``value``, computed against corpus ``version``.
+
+    Callers read ``version`` (corpus_version()) before computing ``value``.
+    If the index changed in between, the entry is filed under the old version
+    and is never found. The pair learned by the "answer" stage is written later by QA_WRITER
+    (qa_writer.py). When it adds or changes a row, that write bumps the
+    version and this entry is no longer found. The next identical message
+    computes the reply again; its learned pair is then already stored, so
+    nothing is written and that second entry stays valid.
+    """
+    key = normalized_key(text)
+    if key != EMPTY_KEY:
+        RESPONSE_CACHE.put((stage, key, version), value)
+
+
+def stats() -> Dict[str, Any]:
+    stages = {}
+    for stage in sorted(set(STAGE_HITS) | set(STAGE_MISSES)):
+        hits, misses = STAGE_HITS[stage], STAGE_MISSES[stage]
+        stages[stage] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        }
+    return {**RESPONSE_CACHE.stats(), "ttl": RESPONSE_CACHE.ttl, "corpus_version": corpus_version(), "stages": stages}
@@ -13,6 +13,8 @@ import requests
 import logging
 
 from config import FIXED_PACKAGE_API, FIXED_PACKAGE_PATH, RESOURCEGROUPS_API
+from .llm_gateway import LLM
+from .reply_stream import emit, streaming
 
 LOGGER = logging.getLogger(__name__)
 LOG_FMT = "%(levelname)s: %(message)s"
@@ -342,7 +344,6 @@ def call_fixed_package_api() -> Optional[List[Dict[str, Any]]]:
         return None
 
 
-import google.generativeai as genai
 from typing import List, Dict, Any
 
 def _pick_package_fields(pkg: Dict[str, Any]) -> Dict[str, Any]:
@@ -362,9 +363,6 @@ def _pick_package_fields(pkg: Dict[str, Any]) -> Dict[str, Any]:
 
 def format_packages_message(packages: List[Dict[str, Any]]) -> str:
     """جعل الذكاء الاصطناعي يقوم بتنسيق وعرض الباقات بدون أي تدخل"""
-
-    model = genai.GenerativeModel(model_name="models/gemini-2.5-pro")
-
     if not packages:
         return "⚠️ عذراً، لم يتم العثور على باقات متاحة."
 
@@ -393,8 +391,42 @@ def format_packages_message(packages: List[Dict[str, Any]]) -> str:
 
     prompt += str(cleaned_packages)
 
-    response = model.generate_content(prompt)
-    return response.text.strip()
+    try:
+        if not streaming():
+            return LLM.text("formatting", prompt)
+        # في /chat/stream يصل نص الباقات للعميل أولاً بأول
+        parts = []
+        for part in LLM.stream("formatting", prompt):
+            parts.append(part)
+            emit(part)
+        return "".join(parts).strip()
+    except Exception as exc:
+        # Gemini متوقف أو انتهت مهلة الطلب: نعرض الباقات بنفس الصيغة محلياً
+        LOGGER.warning("⚠️ تعذر تنسيق الباقات عبر Gemini، سيتم العرض المحلي: %s", exc)
+        return format_packages_locally(cleaned_packages)
+
+
+# عناوين الحقول بالترتيب المطلوب في عرض الباقات
+PACKAGE_FIELD_LABELS = [
+    ("packagePrice", "السعر"),
+    ("employeeNumberName", "عدد الموظفين"),
+    ("contractDurationName", "مدة العقد"),
+    ("resourceGroupName", "الجنسية"),
+    ("weeklyVisitName", "عدد الزيارات الأسبوعية"),
+    ("visitShiftName", "فترة الزيارة"),
+    ("timeSlotDisplayName", "الموعد"),
+    ("promotionCodeDescription", "العرض"),
+]
+
+
+def format_packages_locally(packages: List[Dict[str, Any]]) -> str:
+    """عرض الباقات بصيغة ثابتة دون Gemini: (1) اسم الباقة ثم الحقول المتوفرة سطراً سطراً"""
+    blocks = []
+    for i, pkg in enumerate(packages, start=1):
+        lines = [f"({i}) {pkg.get('displayName') or 'باقة'}"]
+        lines += [f"{label}: {pkg[key]}" for key, label in PACKAGE_FIELD_LABELS if pkg.get(key) not in (None, "")]
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
 def handle_shift_selection(choice: str, shifts: List[Dict[str, Any]]) -> str:
     """معالجة اختيار الموعد وحفظه - يقبل الإدخال بشكل رقم فقط أو حرف+رقم مثل A1"""
     try:
@@ -429,6 +461,8 @@ def handle_shift_selection(choice: str, shifts: List[Dict[str, Any]]) -> str:
         shift_value = selected_shift.get("value")
 
         if save_shift_to_package(shift_key, shift_value):
+            # سطر التأكيد يصل فوراً في /chat/stream قبل جلب الباقات وتنسيقها
+            emit(f"✅ تم اختيار الموعد: {shift_value}\n\n")
             # بعد حفظ الموعد: استدعاء API FixedPackage لجلب الباقات ثم طباعة النتيجة
             try:
                 # محاولة استدعاء API الباقات
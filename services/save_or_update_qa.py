@@ -1,45 +1,50 @@
-import json
-from .load_faq_data import load_faq_data
 from .tokens_from_text import tokens_from_text
 from .token_overlap_score import token_overlap_score
-from .initialize_memory import initialize_memory
+from .faq_index import apply_qa_batch
+from .faq_store import upsert_many
+from .initialize_memory import note_store_write
 from .extract_topic import extract_topic
-from .state import FAQ_PATH
+from .state import get_index
 
 
 def save_or_update_qa(question, answer):
-    data = load_faq_data()
-    q_tokens = tokens_from_text(question)
-    found_idx = None
-    found_topic = None
-
-    for topic in data:
-        for qa in topic.get("questions", []):
-            if token_overlap_score(q_tokens, tokens_from_text(qa["question"])) >= 0.6:
-                found_topic = topic
-                found_idx = data.index(topic)
-                break
-        if found_topic:
-            break
-
-    answer_list = answer.split("\n") if isinstance(answer, str) else answer
-
-    if found_topic:
-        for qa in found_topic["questions"]:
-            if token_overlap_score(q_tokens, tokens_from_text(qa["question"])) >= 0.6:
-                qa["answers"] = answer_list
-                break
-    else:
-        new_topic = {
-            "topic": extract_topic(question),
-            "questions": [{
-                "question": question,
-                "answers": answer_list
-            }]
-        }
-        data.append(new_topic)
-
-    with open(FAQ_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-    initialize_memory()
+    save_or_update_qa_batch([(question, answer)])
+
+
+def save_or_update_qa_batch(pairs):
+    """Learn several (question, answer) pairs with one faq.db transaction and
+    one published index snapshot. Later pairs win over earlier ones."""
+    index = get_index()
+    rows = {}
+    added = []
+    for question, answer in pairs:
+        q_tokens = tokens_from_text(question)
+        found_question = None
+
+        # فهرس MinHash/LSH في اللقطة يعطي أسئلة مرشحة فقط، ثم يُتحقق منها بـ token_overlap_score >= 0.6
+        row = index.find_similar(q_tokens, threshold=0.6)
+        if row is not None:
+            found_question = index.questions[row]
+        else:
+            # أسئلة جديدة من نفس الدفعة ليست في الفهرس بعد
+            found_question = next((q for q, tokens in added if token_overlap_score(q_tokens, tokens) >= 0.6), None)
+
+        answer_list = answer.split("\n") if isinstance(answer, str) else list(answer)
+        if found_question:
+            rows[found_question] = (answer_list, rows.get(found_question, (None, None))[1])
+        else:
+            rows[question] = (answer_list, extract_topic(question))
+            added.append((question, q_tokens))
+
+    # لا داعي للكتابة إذا كانت الإجابة المخزنة مطابقة
+    for question in list(rows):
+        idx = index.find(question)
+        if idx is not None and index.answers[idx] == "\n".join(rows[question][0]):
+            del rows[question]
+    if not rows:
+        return
+
+    # كتابة الصفوف في faq.db ضمن معاملة واحدة، ثم تحديث الفهرس في الذاكرة مرة واحدة
+    version = upsert_many((question, answers, topic) for question, (answers, topic) in rows.items())
+    apply_qa_batch([(question, answers) for question, (answers, _) in rows.items()])
+    note_store_write(version)
@@ -0,0 +1,187 @@
+"""Concurrent stages of one get_best_answer request.
+
+The safety check (possibly a Gemini call) and the FAQ answer (language
+pre-processing, retrieval, translation back) do not depend on each other,
+but used to run one after the other, so a request paid the sum of their
+round trips. A StageRun starts the speculative stage on a shared thread pool,
+runs the stage every request needs on the request thread meanwhile, and
+waits only for the results it needs:
+
+    with STAGES.run() as stages:
+        stages.start("answer", _answer_from_faq, text)
+        if not stages.call("safety", check_text_safety, text):
+            return refusal          # "answer" is cancelled or ignored
+
+The safety check runs inline on purpose: the pool is process-wide, and a
+pooled safety check could queue behind other requests' speculative answers
+that are about to be discarded. Only the answer stage competes for the
+STAGE_WORKERS threads; when they are all busy it starts late, and the
+request still gets its safety verdict without waiting for the pool. If the
+request asks for a stage that is still queued by then, result() cancels it
+and runs it on the request thread instead of waiting for a free thread.
+
+Stages whose result was never asked for are speculative work made useless
+by a cheaper stage (an unsafe message, a reply given by the form handlers):
+when the run closes they are cancelled if they have not started yet, and
+ignored otherwise. The run logs the time the overlap saved, i.e. the sum of
+the used stages' durations minus the wall time they took together.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+import contextvars
+import logging
+import threading
+import time
+
+from .state import STAGE_WORKERS
+
+LOGGER = logging.getLogger(__name__)
+
+
+class _Stage:
+    __slots__ = ("future", "task", "started", "finished", "used")
+
+    def __init__(self) -> None:
+        self.future: Optional[Future] = None
+        # the queued callable of a started stage, to run it inline instead
+        self.task: Optional[Callable[[], Any]] = None
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.used = False
+
+
+class StageRun:
+    """The stages started for one request."""
+
+    def __init__(self, executor: "StageExecutor") -> None:
+        self._executor = executor
+        self._stages: Dict[str, _Stage] = {}
+        self._inlined = 0
+
+    def start(self, name: str, fn: Callable[..., Any], *args: Any) -> None:
+        """Run ``fn(*args)`` in the background as stage ``name``."""
+        stage = _Stage()
+
+        def timed() -> Any:
+            stage.started = time.monotonic()
+            try:
+                return fn(*args)
+            finally:
+                stage.finished = time.monotonic()
+
+        # the stage sees the request's context variables
+        stage.task = partial(contextvars.copy_context().run, timed)
+        stage.future = self._executor.submit(stage.task)
+        self._stages[name] = stage
+
+    def call(self, name: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` on the calling thread as stage ``name`` and return
+        its result (or raise its error), while the started stages run."""
+        stage = _Stage()
+        stage.used = True
+        self._stages[name] = stage
+        stage.started = time.monotonic()
+        try:
+            return self._run_inline(stage, partial(fn, *args))
+        finally:
+            stage.finished = time.monotonic()
+
+    @staticmethod
+    def _run_inline(stage: _Stage, task: Callable[[], Any]) -> Any:
+        stage.future = Future()
+        try:
+            result = task()
+        except BaseException as exc:
+            stage.future.set_exception(exc)
+            raise
+        stage.future.set_result(result)
+        return result
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._stages
+
+    def result(self, name: str) -> Any:
+        """Wait for stage ``name`` and return its result (or raise its error)."""
+        stage = self._stages[name]
+        stage.used = True
+        # still queued behind other requests' stages: run it here instead
+        if stage.task is not None and stage.future.cancel():
+            self._inlined += 1
+            return self._run_inline(stage, stage.task)
+        return stage.future.result()
+
+    def close(self) -> None:
+        if not self._stages:
+            return
+        cancelled = ignored = 0
+        for stage in self._stages.values():
+            if not stage.used:
+                if stage.future.cancel():
+                    cancelled += 1
+                else:
+                    ignored += 1
+        used = [s for s in self._stages.values() if s.used and s.finished is not None]
+        saved = 0.0
+        if len(used) > 1:
+            sequential = sum(s.finished - s.started for s in used)
+            overlapped = max(s.finished for s in used) - min(s.started for s in used)
+            saved = max(sequential - overlapped, 0.0)
+            LOGGER.info(
+                "⏱️ مراحل متوازية: %s، وفّرت %.0f ms",
+                ", ".join(f"{name}={(s.finished - s.started) * 1000:.0f}ms"
+                          for name, s in self._stages.items() if s in used),
+                saved * 1000,
+            )
+        self._executor._record(len(self._stages), cancelled, ignored, self._inlined, saved)
+
+    def __enter__(self) -> "StageRun":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class StageExecutor:
+    """Thread pool shared by the StageRuns, with their counters."""
+
+    def __init__(self, workers: int) -> None:
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stage")
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.started = 0
+        self.cancelled = 0
+        self.ignored = 0
+        self.inlined = 0
+        self.saved_seconds = 0.0
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        return self._pool.submit(fn, *args)
+
+    def run(self) -> StageRun:
+        return StageRun(self)
+
+    def _record(self, started: int, cancelled: int, ignored: int, inlined: int, saved: float) -> None:
+        with self._lock:
+            self.runs += 1
+            self.started += started
+            self.cancelled += cancelled
+            self.ignored += ignored
+            self.inlined += inlined
+            self.saved_seconds += saved
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "stages_started": self.started,
+                "cancelled": self.cancelled,
+                "ignored": self.ignored,
+                "ran_inline": self.inlined,
+                "saved_ms_total": round(self.saved_seconds * 1000, 1),
+                "saved_ms_avg": round(self.saved_seconds * 1000 / self.runs, 1) if self.runs else 0.0,
+            }
+
+
+STAGES = StageExecutor(STAGE_WORKERS)
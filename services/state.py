@@ -1,23 +1,172 @@
 import os
-from sentence_transformers import SentenceTransformer
-from sklearn.neighbors import NearestNeighbors
 import json
+import threading
+
+from .index_snapshot import IndexSnapshot
+from .nlp.ann import make_vector_index
 
 # Simple per-workspace user-state storage (single default user)
 USER_STATE_PATH = os.path.join(os.path.dirname(__file__), "..", "user_state.json")
 SUBMISSIONS_PATH = os.path.join(os.path.dirname(__file__), "..", "user_submissions.json")
 
-QUESTIONS = []
-ANSWERS = []
-TOKEN_SETS = []
-NN_MODEL = NearestNeighbors(n_neighbors=1, metric="cosine")
-EMBEDDER = SentenceTransformer("all-MiniLM-L6-v2")
+EMBEDDER_MODEL_NAME = "all-MiniLM-L6-v2"
+# CPU inference backend for the same model: "torch" (float32), "onnx"
+# (ONNX Runtime, needs optimum[onnxruntime]) or "torch-int8" (PyTorch dynamic
+# int8 quantization of the Linear layers). Parity and speed are measured by
+# benchmarks/bench_embedder_backends.py.
+EMBEDDER_BACKEND = "torch"
+# Cache key of stored embeddings: vectors from different backends differ
+# slightly, so they are not mixed in qa.db.
+EMBEDDER_MODEL_KEY = EMBEDDER_MODEL_NAME if EMBEDDER_BACKEND == "torch" else f"{EMBEDDER_MODEL_NAME}:{EMBEDDER_BACKEND}"
+# Loaded on first use (see get_embedder) so importing services stays cheap;
+# warmup.py loads it on a background thread at app start.
+_EMBEDDER = None
+_EMBEDDER_LOCK = threading.Lock()
 
+# The FAQ corpus lives in faq.db (see faq_store.py); faq_data.json only
+# seeds an empty database.
+FAQ_DB_PATH = os.path.join(os.path.dirname(__file__), "..", "faq.db")
 FAQ_PATH = os.path.join(os.path.dirname(__file__), "..", "faq_data.json")
+# After warm-up, faq.db's version is checked every FAQ_SYNC_INTERVAL_S seconds
+# and the index rebuilt when another process changed it (warmup.py); 0 = off.
+FAQ_SYNC_INTERVAL_S = 5
+# Persistent cache of question embeddings (table "qa"), see embedding_cache.py
+QA_DB_PATH = os.path.join(os.path.dirname(__file__), "..", "qa.db")
 TOP_K = 5
+# Nearest-neighbour backend: "exact" brute force, or "ivf" (approximate) for
+# very large corpora. IVF_NLIST cells (None = sqrt of corpus size) are built
+# at index time; each query scores IVF_NPROBE of them, so a larger value
+# gives higher recall at higher latency (see benchmarks/bench_ann.py).
+INDEX_BACKEND = "exact"
+IVF_NLIST = None
+IVF_NPROBE = 8
+# "int8" stores the question vectors as int8 codes (a quarter of float32),
+# optionally reduced to INDEX_PCA_DIM dimensions by PCA fitted on the corpus.
+# The best TOP_K * INDEX_RERANK rows are re-scored with the float32 vectors
+# read back from qa.db (see benchmarks/bench_quantized_index.py).
+INDEX_PCA_DIM = None
+INDEX_RERANK = 4
 EMB_WEIGHT = 0.7
 TOKEN_WEIGHT = 0.3
 COMBINED_THRESHOLD = 0.60
+# Max number of query embeddings kept by query_embedding.encode_query
+QUERY_CACHE_SIZE = 2048
+# Replies answered from the FAQ are cached per (normalized text, corpus
+# version) for RESPONSE_CACHE_TTL seconds, see response_cache.py.
+RESPONSE_CACHE_SIZE = 4096
+RESPONSE_CACHE_TTL = 3600
+# Concurrent query encodes are merged into one model call of at most
+# EMBED_BATCH_MAX texts, waiting up to EMBED_BATCH_WAIT_MS for company.
+EMBED_BATCH_MAX = 32
+EMBED_BATCH_WAIT_MS = 5
+# Learned Q&A pairs are written behind the reply (qa_writer.py): at most
+# QA_WRITER_QUEUE_SIZE pending, applied in batches of up to QA_WRITER_MAX_BATCH
+# after waiting QA_WRITER_DEBOUNCE_MS for more to arrive.
+QA_WRITER_QUEUE_SIZE = 256
+QA_WRITER_MAX_BATCH = 64
+QA_WRITER_DEBOUNCE_MS = 500
+# Arabic messages identified locally (services/nlp/langid.py) with at least
+# this confidence skip the Gemini pre-processing call
+LANGID_MIN_CONFIDENCE = 0.9
+# Safety verdicts (services/moderation.py): MODERATION_CACHE_SIZE kept in memory
+# in front of qa.db; a Gemini check waits at most MODERATION_BUDGET_MS, on a
+# pool of MODERATION_WORKERS threads.
+MODERATION_CACHE_SIZE = 4096
+MODERATION_BUDGET_MS = 800
+MODERATION_WORKERS = 4
+# Threads running the speculative FAQ answer stage of get_best_answer while
+# the safety check runs on the request thread (services/stage_executor.py).
+STAGE_WORKERS = 8
+# Gemini models by tier, and the tier used for each task (services/llm_gateway.py)
+LLM_MODEL_TIERS = {
+    "pro": "models/gemini-2.5-pro",
+    "flash": "models/gemini-2.5-flash",
+    "lite": "models/gemini-2.5-flash-lite",
+}
+LLM_TASK_TIERS = {
+    "moderation": "lite",
+    "langid": "flash",
+    "translation": "flash",
+    "formatting": "flash",
+}
+# Remote calls of one /chat request share a REQUEST_DEADLINE_S budget; a single
+# Gemini call never waits longer than LLM_CALL_TIMEOUT_S. The breaker opens
+# after LLM_BREAKER_FAILURES consecutive errors, timeouts or slow calls, and
+# lets a probe through after LLM_BREAKER_RESET_S. A call is slow when it uses
+# more than LLM_BREAKER_SLOW_RATIO of its own timeout (the request budget
+# left, or LLM_CALL_TIMEOUT_S). A timeout whose budget the request deadline
+# had cut below LLM_BREAKER_MIN_BUDGET_S is not counted.
+REQUEST_DEADLINE_S = 3.0
+LLM_CALL_TIMEOUT_S = 10.0
+LLM_BREAKER_FAILURES = 5
+LLM_BREAKER_SLOW_RATIO = 0.9
+LLM_BREAKER_MIN_BUDGET_S = 1.0
+LLM_BREAKER_RESET_S = 30
+
+
+def new_vector_index():
+	"""Return an empty vector index for the configured INDEX_BACKEND."""
+	return make_vector_index(
+		INDEX_BACKEND, nlist=IVF_NLIST, nprobe=IVF_NPROBE, pca_dim=INDEX_PCA_DIM, rerank=INDEX_RERANK,
+	)
+
+
+# The live FAQ index: questions, answers, token sets, vector index, token
+# index and BM25 scorer, row-aligned, with a version. It is never modified;
+# writers build a new snapshot and swap it in with publish_index(), so
+# readers take get_index() once per request and need no lock.
+_INDEX = IndexSnapshot.empty(new_vector_index())
+
+
+def get_index():
+	return _INDEX
+
+
+def publish_index(snapshot):
+	"""Make ``snapshot`` the live index (callers hold faq_index.INDEX_LOCK)."""
+	global _INDEX
+	_INDEX = snapshot
+
+
+def corpus_version():
+	"""Version of the live index; cached replies are keyed by it."""
+	return _INDEX.version
+
+
+
+def load_embedder(model_name=EMBEDDER_MODEL_NAME, backend=EMBEDDER_BACKEND):
+	"""Create a SentenceTransformer for ``model_name`` on the given backend."""
+	from sentence_transformers import SentenceTransformer
+
+	if backend == "torch":
+		# sentence-transformers يختار الجهاز بنفسه (GPU إن وُجد)
+		return SentenceTransformer(model_name)
+	# المحركان التاليان للمعالج فقط: ONNX Runtime هنا بدون CUDA، والتكميم الديناميكي int8 لا يعمل على GPU
+	if backend == "onnx":
+		# backend="onnx" يتطلب sentence-transformers >= 3.2
+		return SentenceTransformer(model_name, device="cpu", backend="onnx")
+	if backend == "torch-int8":
+		import torch
+
+		model = SentenceTransformer(model_name, device="cpu")
+		torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+		return model
+	raise ValueError(f"unknown embedder backend: {backend!r}")
+
+
+def get_embedder():
+	"""Return the shared SentenceTransformer, loading it on first use."""
+	global _EMBEDDER
+	if _EMBEDDER is None:
+		with _EMBEDDER_LOCK:
+			if _EMBEDDER is None:
+				_EMBEDDER = load_embedder()
+	return _EMBEDDER
+
+
+def embedder_loaded():
+	return _EMBEDDER is not None
+
 
 # Session history handling.
 # By default we persist session history to a file so the chat remains
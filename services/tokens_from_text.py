@@ -1,7 +1,6 @@
-from .normalize_ar import normalize_ar
-from keyWords import ARABIC_STOPWORDS
+from .nlp.text_processing import tokenize
 
 
 def tokens_from_text(text):
-    t = normalize_ar(text)
-    return [w for w in t.split() if w and w not in ARABIC_STOPWORDS]
+    # التوكنز بعد التطبيع وحذف كلمات الوقف (ARABIC_STOPWORDS مطبّعة بنفس الطريقة)
+    return tokenize(text)
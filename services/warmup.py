@@ -0,0 +1,75 @@
+"""Background warm-up of the embedder and the FAQ index.
+
+create_app() starts warm-up on a daemon thread instead of loading the model
+and building the index before serving. /ready reports when both are done so
+an orchestrator only routes traffic to warm workers. Requests that arrive
+earlier still work: retrieval sees an empty index until warm-up finishes.
+
+Once warm, the same thread checks faq.db every FAQ_SYNC_INTERVAL_S seconds
+and rebuilds the index when another process wrote to it
+(initialize_memory.reload_if_store_changed).
+"""
+
+from typing import Any, Dict, Optional
+import logging
+import threading
+import time
+
+from .initialize_memory import initialize_memory, reload_if_store_changed
+from .state import FAQ_SYNC_INTERVAL_S, get_embedder, embedder_loaded, get_index
+
+LOGGER = logging.getLogger(__name__)
+
+READY = threading.Event()
+_STATUS: Dict[str, Any] = {"started_at": None, "finished_at": None, "error": None}
+_thread: Optional[threading.Thread] = None
+
+
+def warm_up() -> None:
+    """Load the embedder and build the index; sets READY on success."""
+    _STATUS["started_at"] = time.time()
+    try:
+        get_embedder()
+        initialize_memory()
+        READY.set()
+        LOGGER.info("✅ اكتمل تجهيز النموذج والفهرس خلال %.1f ثانية", time.time() - _STATUS["started_at"])
+    except Exception as exc:
+        _STATUS["error"] = str(exc)
+        LOGGER.error("❌ فشل تجهيز النموذج أو الفهرس: %s", exc, exc_info=True)
+    finally:
+        _STATUS["finished_at"] = time.time()
+
+
+def sync_with_store(interval: float = FAQ_SYNC_INTERVAL_S, stop: Optional[threading.Event] = None) -> None:
+    """Reload the index whenever faq.db changes, checking every ``interval`` s."""
+    stop = stop or threading.Event()
+    while not stop.wait(interval):
+        try:
+            if reload_if_store_changed():
+                LOGGER.info("🔄 أُعيد بناء الفهرس بعد تغيّر faq.db من عملية أخرى")
+        except Exception as exc:
+            LOGGER.warning("⚠️ تعذر التحقق من إصدار faq.db: %s", exc)
+
+
+def _run() -> None:
+    warm_up()
+    if READY.is_set() and FAQ_SYNC_INTERVAL_S:
+        sync_with_store()
+
+
+def start_warmup() -> threading.Thread:
+    """Start warm-up on a background thread (once per process)."""
+    global _thread
+    if _thread is None:
+        _thread = threading.Thread(target=_run, name="warmup", daemon=True)
+        _thread.start()
+    return _thread
+
+
+def readiness() -> Dict[str, Any]:
+    return {
+        "ready": READY.is_set(),
+        "model_loaded": embedder_loaded(),
+        "questions": len(get_index()),
+        "error": _STATUS["error"],
+    }
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import numpy as np
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services.nlp.bm25 import BM25Scorer
+
+DOCS = [
+    ["سعر", "باقه", "التنظيف"],
+    ["سعر", "باقه", "التنظيف", "الشهريه", "للعامله", "الفلبينيه", "مع", "السكن"],
+    ["سعر", "الزياره"],
+    ["ساعات", "العمل"],
+    ["سعر", "العقد"],
+]
+
+
+def test_scores_order_by_matched_terms_rarity_and_length():
+    scorer = BM25Scorer(DOCS)
+    assert not scorer.fitted
+    scores = scorer.score(["سعر", "باقه", "التنظيف"], range(len(DOCS)))
+    assert scorer.fitted
+
+    # كل الكلمات في وثيقة قصيرة > الكلمات نفسها في وثيقة طويلة > كلمة شائعة واحدة > لا تطابق
+    assert scores[0] > scores[1] > scores[2] > scores[3] == 0
+    # "سعر" في أغلب الوثائق فوزنها أقل من كلمة نادرة
+    assert scorer.score(["العقد"], [4])[0] > scorer.score(["سعر"], [4])[0]
+
+
+def test_scores_are_scaled_to_the_query_matching_itself():
+    scorer = BM25Scorer(DOCS)
+    scores = scorer.score(["سعر", "باقه", "التنظيف"], [0, 1, 2, 3, 4])
+    assert np.all((scores >= 0) & (scores <= 1))
+    assert abs(scores[0] - 1.0) < 0.05
+    # الترتيب يتبع doc_ids المطلوبة
+    np.testing.assert_allclose(scorer.score(["سعر", "باقه", "التنظيف"], [2, 0]), scores[[2, 0]])
+
+    assert scorer.score(["غير", "موجود"], [0, 1]).tolist() == [0.0, 0.0]
+    assert scorer.score(["سعر"], []).shape == (0,)
+    assert BM25Scorer([]).score(["سعر"], []).shape == (0,)
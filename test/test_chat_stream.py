@@ -0,0 +1,105 @@
+import json
+import logging
+import os
+import sys
+
+from flask import Flask
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from app_pkg import routes
+from app_pkg.errors import register_error_handlers
+from services import save_fixed_package
+from services.reply_stream import emit, stream_reply
+
+PACKAGES = [
+    {"displayName": "باقة شهرية", "packagePrice": 1500, "contractDurationName": "شهر"},
+    {"displayName": "باقة سنوية", "packagePrice": 15000, "resourceGroupName": "فلبينية"},
+]
+
+
+def _client(monkeypatch, get_best_answer):
+    logged = []
+    monkeypatch.setattr(routes, "logger", logging.getLogger("test.routes"))
+    monkeypatch.setattr(routes, "get_best_answer", get_best_answer)
+    monkeypatch.setattr(routes, "pretty_log_question_answer", lambda question, reply: logged.append((question, reply)))
+    app = Flask(__name__)
+    app.register_blueprint(routes.bp)
+    register_error_handlers(app)
+    return app.test_client(), logged
+
+
+def _events(response):
+    events = []
+    for block in response.get_data(as_text=True).split("\n\n"):
+        if block:
+            event, data = block.split("\n")
+            assert event.startswith("event: ") and data.startswith("data: ")
+            events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_stream_sends_deltas_then_the_full_reply(monkeypatch):
+    def get_best_answer(message):
+        emit("✅ تم اختيار الموعد: صباحي\n\n")
+        return "✅ تم اختيار الموعد: صباحي\n\n(1) باقة شهرية"
+
+    client, logged = _client(monkeypatch, get_best_answer)
+    response = client.post("/chat/stream", json={"message": "1"})
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert _events(response) == [
+        ("delta", {"text": "✅ تم اختيار الموعد: صباحي\n\n"}),
+        ("delta", {"text": "(1) باقة شهرية"}),
+        ("done", {"reply": "✅ تم اختيار الموعد: صباحي\n\n(1) باقة شهرية"}),
+    ]
+    assert logged == [("1", "✅ تم اختيار الموعد: صباحي\n\n(1) باقة شهرية")]
+
+
+def test_failures_end_the_stream_with_an_error_event(monkeypatch):
+    def get_best_answer(message):
+        emit("جزء أول")
+        raise RuntimeError("api down")
+
+    client, logged = _client(monkeypatch, get_best_answer)
+    events = _events(client.post("/chat/stream", json={"message": "1"}))
+
+    assert [event for event, _ in events] == ["delta", "error"]
+    assert events[1][1] == {"error": "حدث خطأ أثناء معالجة الرسالة."}
+    assert logged == []
+
+
+def test_bad_input_is_rejected_before_streaming(monkeypatch):
+    client, _ = _client(monkeypatch, lambda message: "لا يصل")
+    for kwargs in ({"json": {"message": "  "}}, {"json": {"text": "مرحبا"}}, {"data": "مرحبا"}):
+        response = client.post("/chat/stream", **kwargs)
+        assert response.status_code == 400 and response.is_json
+
+
+class BrokenStream:
+    """Gemini streaming two parts of the formatted packages, then failing."""
+
+    def stream(self, task, prompt):
+        yield "(1) الباقة "
+        yield "الشهرية\n"
+        raise TimeoutError("request deadline")
+
+    def text(self, task, prompt):
+        raise TimeoutError("request deadline")
+
+
+def test_packages_fall_back_to_local_formatting_when_the_stream_breaks(monkeypatch):
+    monkeypatch.setattr(save_fixed_package, "LLM", BrokenStream())
+    local = save_fixed_package.format_packages_locally(
+        [save_fixed_package._pick_package_fields(p) for p in PACKAGES])
+    assert local.startswith("(1) باقة شهرية\nالسعر: 1500")
+
+    events = list(stream_reply(save_fixed_package.format_packages_message, PACKAGES))
+    # ما وصل من Gemini لا يطابق العرض المحلي، فيحمل "done" العرض الكامل ليستبدله العميل
+    assert events == [("delta", "(1) الباقة "), ("delta", "الشهرية\n"), ("done", local)]
+    # وفي /chat بلا بث يُستخدم العرض المحلي مباشرة
+    assert save_fixed_package.format_packages_message(PACKAGES) == local
@@ -0,0 +1,91 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services.embedding_batcher import EmbeddingBatcher
+
+
+class FakeEncoder:
+    """Encodes a text as [its length, its number]; the first call blocks until
+    released so that later callers pile up in the queue."""
+
+    def __init__(self):
+        self.calls = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        self.entered.set()
+        self.release.wait(5)
+        if any(text == "boom" for text in texts):
+            raise RuntimeError("encoder failed")
+        return np.array([[len(text), int(text.split()[-1])] for text in texts], dtype=np.float32)
+
+
+def _wait_for_queue(batcher, size):
+    deadline = time.monotonic() + 5
+    while batcher._queue.qsize() < size and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert batcher._queue.qsize() == size
+
+
+def test_concurrent_callers_share_a_batch_and_get_their_own_rows():
+    encoder = FakeEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch=32)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first = pool.submit(batcher.encode, ["نص 0"])
+        encoder.entered.wait(5)
+        others = [pool.submit(batcher.encode, [f"نص {i}", f"نص طويل {i + 10}"]) for i in range(1, 4)]
+        _wait_for_queue(batcher, 3)
+        encoder.release.set()
+
+        assert first.result().tolist() == [[4, 0]]
+        for i, future in enumerate(others, 1):
+            assert future.result().tolist() == [[4, i], [len(f"نص طويل {i + 10}"), i + 10]]
+
+    assert len(encoder.calls) == 2 and len(encoder.calls[1]) == 6
+    assert batcher.stats() == {"batches": 2, "items": 7, "avg_batch": 3.5}
+
+
+def test_max_batch_splits_the_queue():
+    encoder = FakeEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch=2)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first = pool.submit(batcher.encode, ["نص 0"])
+        encoder.entered.wait(5)
+        others = [pool.submit(batcher.encode, [f"نص {i}"]) for i in range(1, 4)]
+        _wait_for_queue(batcher, 3)
+        encoder.release.set()
+        assert [f.result().tolist() for f in [first] + others] == [[[4, i]] for i in range(4)]
+
+    assert [len(call) for call in encoder.calls] == [1, 2, 1]
+
+
+def test_encoder_errors_reach_every_caller_of_the_batch():
+    encoder = FakeEncoder()
+    batcher = EmbeddingBatcher(encoder)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first = pool.submit(batcher.encode, ["نص 0"])
+        encoder.entered.wait(5)
+        failing = [pool.submit(batcher.encode, ["boom"]), pool.submit(batcher.encode, ["نص 2"])]
+        _wait_for_queue(batcher, 2)
+        encoder.release.set()
+
+        assert first.result().tolist() == [[4, 0]]
+        for future in failing:
+            with pytest.raises(RuntimeError, match="encoder failed"):
+                future.result()
+
+    # the worker survives a failed batch
+    assert batcher.encode(["نص 5"]).tolist() == [[4, 5]]
+    assert batcher.stats()["batches"] == 2
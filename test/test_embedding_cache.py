@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import sys
+
+import numpy as np
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services import embedding_cache
+
+
+class FakeEmbedder:
+    """Encodes a text as its length and position, and records what it encoded."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, show_progress_bar=False):
+        self.encoded.append(list(texts))
+        return np.stack([np.full(4, len(t) * 10 + i, dtype=np.float32) for i, t in enumerate(texts)])
+
+
+def _cache(tmp_path, monkeypatch):
+    embedder = FakeEmbedder()
+    monkeypatch.setattr(embedding_cache, "QA_DB_PATH", str(tmp_path / "qa.db"))
+    monkeypatch.setattr(embedding_cache, "get_embedder", lambda: embedder)
+    return embedder
+
+
+def test_reranks_reuse_one_read_connection_per_thread(tmp_path, monkeypatch):
+    _cache(tmp_path, monkeypatch)
+    questions = ["كم السعر؟", "ما المدة؟"]
+    stored = embedding_cache.encode_questions(questions)
+
+    connects = []
+    connect = sqlite3.connect
+    monkeypatch.setattr(embedding_cache.sqlite3, "connect", lambda *a, **k: connects.append(a) or connect(*a, **k))
+    for _ in range(5):
+        np.testing.assert_array_equal(embedding_cache.load_question_vectors(questions[::-1]), stored[::-1])
+    assert len(connects) == 1
+
+
+def test_rebuilds_encode_only_new_and_changed_questions(tmp_path, monkeypatch):
+    embedder = _cache(tmp_path, monkeypatch)
+    first = embedding_cache.encode_questions(["كم السعر؟", "ما المدة؟", "كم السعر؟"])
+    # السؤال المكرر يُرمَّز مرة واحدة
+    assert embedder.encoded == [["كم السعر؟", "ما المدة؟"]]
+    np.testing.assert_array_equal(first[0], first[2])
+
+    # التشكيل والمسافات الزائدة لا تغيّر البصمة، والسؤال المعدّل فقط يُرمَّز
+    second = embedding_cache.encode_questions(["كَم  السِّعر؟", "ما المدة بالضبط؟", "ما المدة؟"])
+    assert embedder.encoded[1:] == [["ما المدة بالضبط؟"]]
+    np.testing.assert_array_equal(second[0], first[0])
+    np.testing.assert_array_equal(second[2], first[1])
+
+    embedding_cache.encode_questions(["ما المدة بالضبط؟", "كم السعر؟"])
+    assert len(embedder.encoded) == 2
+
+
+def test_rows_are_kept_per_model_and_backend(tmp_path, monkeypatch):
+    embedder = _cache(tmp_path, monkeypatch)
+    embedding_cache.encode_questions(["كم السعر؟"])
+    monkeypatch.setattr(embedding_cache, "EMBEDDER_MODEL_KEY", "all-MiniLM-L6-v2:onnx")
+    embedding_cache.encode_questions(["كم السعر؟"])
+    embedding_cache.encode_questions(["كم السعر؟"])
+    assert embedder.encoded == [["كم السعر؟"], ["كم السعر؟"]]
+
+    with sqlite3.connect(tmp_path / "qa.db") as conn:
+        models = sorted(row[0] for row in conn.execute("SELECT model FROM qa"))
+    assert models == ["all-MiniLM-L6-v2", "all-MiniLM-L6-v2:onnx"]
+
+
+def test_an_old_schema_qa_db_is_migrated(tmp_path, monkeypatch):
+    embedder = _cache(tmp_path, monkeypatch)
+    with sqlite3.connect(tmp_path / "qa.db") as conn:
+        conn.execute("CREATE TABLE qa (id INTEGER PRIMARY KEY AUTOINCREMENT, question TEXT, embedding BLOB, answer TEXT)")
+        conn.execute("INSERT INTO qa (question, embedding, answer) VALUES (?, ?, ?)",
+                     ("كم السعر؟", np.ones(4, dtype=np.float32).tobytes(), "١٠٠ ريال"))
+
+    vectors = embedding_cache.encode_questions(["كم السعر؟"])
+    # الصفوف القديمة بلا بصمة لا تُستخدم: يُعاد الترميز وتُحفظ بالأعمدة الجديدة
+    assert embedder.encoded == [["كم السعر؟"]]
+    assert embedding_cache.load_question_vectors(["كم السعر؟"]).tolist() == vectors.tolist()
+
+    with sqlite3.connect(tmp_path / "qa.db") as conn:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(qa)")}
+        rows = conn.execute("SELECT answer, q_hash IS NULL FROM qa ORDER BY id").fetchall()
+    assert {"q_hash", "model", "dim"} <= columns
+    assert rows == [("١٠٠ ريال", 1), (None, 0)]
@@ -0,0 +1,65 @@
+import logging
+import os
+import sys
+
+import numpy as np
+from flask import Flask
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from app_pkg import routes
+from app_pkg.errors import register_error_handlers
+from services import state
+from services.faq_duplicates import faq_duplicates
+from services.index_snapshot import IndexSnapshot
+from services.nlp.similarity import VectorIndex
+
+QUESTIONS = [
+    "كم سعر باقة التنظيف الشهرية",
+    "كم سعر باقة التنظيف الشهرية للمنزل",
+    "ما هي ساعات العمل",
+    "هل تتوفر عاملة فلبينية",
+]
+
+
+def _live_index(monkeypatch):
+    vectors = VectorIndex()
+    vectors.build(np.eye(len(QUESTIONS), 8, dtype=np.float32))
+    snapshot = IndexSnapshot.build(QUESTIONS, [[f"إجابة {i}"] for i in range(len(QUESTIONS))], vectors, version=1)
+    monkeypatch.setattr(state, "_INDEX", snapshot)
+    return snapshot
+
+
+def _client(monkeypatch):
+    # لا نكتب في logs/chatbot.log أثناء الاختبارات
+    monkeypatch.setattr(routes, "logger", logging.getLogger("test.routes"))
+    app = Flask(__name__)
+    app.register_blueprint(routes.bp)
+    register_error_handlers(app)
+    return app.test_client()
+
+
+def test_report_names_the_near_duplicate_pair(monkeypatch):
+    _live_index(monkeypatch)
+    report = faq_duplicates()
+    # token_overlap_score غير متماثل، فيُفحص الاتجاهان
+    assert {(r["question"], r["duplicate_of"]) for r in report} == {(QUESTIONS[0], QUESTIONS[1]),
+                                                                    (QUESTIONS[1], QUESTIONS[0])}
+    assert all(r["score"] >= 0.6 for r in report)
+    # العتبة الأعلى من النتيجة تستبعد الزوج
+    assert faq_duplicates(threshold=1.01) == []
+
+
+def test_duplicates_route(monkeypatch):
+    _live_index(monkeypatch)
+    client = _client(monkeypatch)
+
+    response = client.get("/faq_duplicates")
+    assert response.status_code == 200
+    assert len(response.json) == 2 and response.json == faq_duplicates()
+
+    assert client.get("/faq_duplicates?threshold=1.01").json == []
+    response = client.get("/faq_duplicates?threshold=abc")
+    assert response.status_code == 400 and "error" in response.json
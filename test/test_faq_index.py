@@ -0,0 +1,68 @@
+import os
+import sys
+
+import numpy as np
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services import faq_index, state
+from services.index_snapshot import IndexSnapshot
+from services.nlp.similarity import VectorIndex
+
+
+def _fake_encode(questions):
+    return np.stack([np.full(8, len(q) + i, dtype=np.float32) for i, q in enumerate(questions)])
+
+
+def _live_index(monkeypatch, rows=3):
+    vectors = VectorIndex()
+    vectors.build(np.eye(rows, 8, dtype=np.float32))
+    snapshot = IndexSnapshot.build([f"سؤال رقم {i}" for i in range(rows)],
+                                   [[f"إجابة {i}"] for i in range(rows)], vectors, version=1)
+    monkeypatch.setattr(state, "_INDEX", snapshot)
+    monkeypatch.setattr(faq_index, "encode_questions", _fake_encode)
+    return snapshot
+
+
+def test_writers_publish_a_fitted_scorer(monkeypatch):
+    _live_index(monkeypatch)
+
+    faq_index.add_qa("سؤال عن الأسعار", "إجابة الأسعار")
+    assert state.get_index().token_scorer.fitted
+    faq_index.remove_qa(0)
+    assert state.get_index().token_scorer.fitted
+    assert state.get_index().version == 3
+
+
+def test_batch_clones_the_index_once_and_publishes_one_version(monkeypatch):
+    old = _live_index(monkeypatch)
+    clones = []
+    clone = type(old.token_index).clone
+    monkeypatch.setattr(type(old.token_index), "clone", lambda self: clones.append(1) or clone(self))
+
+    faq_index.apply_qa_batch([
+        ("سؤال جديد", ["إجابة جديدة"]),
+        ("سؤال رقم 0", []),
+        ("سؤال رقم 1", ["إجابة معدلة"]),
+        # حذف ثم إضافة السؤال نفسه في الدفعة ذاتها
+        ("سؤال رقم 2", []),
+        ("سؤال رقم 2", ["إجابة عائدة"]),
+    ])
+
+    index = state.get_index()
+    assert len(clones) == 1 and index.version == 2
+    assert index.questions == ("سؤال رقم 1", "سؤال جديد", "سؤال رقم 2")
+    assert index.answers == ("إجابة معدلة", "إجابة جديدة", "إجابة عائدة")
+    assert len(index.vectors) == 3 and index.token_scorer.fitted
+    assert index.token_index.match(["عايده"]) == ["إجابة عائدة"]
+    assert old.questions == ("سؤال رقم 0", "سؤال رقم 1", "سؤال رقم 2")
+
+
+def test_answer_only_batch_keeps_the_fitted_scorer(monkeypatch):
+    old = _live_index(monkeypatch)
+    faq_index.apply_qa_batch([("سؤال رقم 1", ["إجابة معدلة"]), ("سؤال غير موجود", [])])
+    assert state.get_index().token_scorer is old.token_scorer
+    faq_index.apply_qa_batch([("سؤال رقم 1", ["إجابة معدلة"])])
+    assert state.get_index().version == 2
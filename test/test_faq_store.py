@@ -0,0 +1,49 @@
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services import faq_store
+
+
+def test_seed_import_and_single_row_upserts(tmp_path, monkeypatch):
+    seed = [{"topic": "الأسعار", "questions": [{"question": "كم السعر؟", "answers": ["١٠٠ ريال"]}]}]
+    seed_path = tmp_path / "faq_data.json"
+    seed_path.write_text(json.dumps(seed, ensure_ascii=False), encoding="utf-8")
+    monkeypatch.setattr(faq_store, "FAQ_PATH", str(seed_path))
+    monkeypatch.setattr(faq_store, "FAQ_DB_PATH", str(tmp_path / "faq.db"))
+
+    assert faq_store.load_all() == seed
+    assert faq_store.version() == 1
+
+    faq_store.upsert_qa("كم السعر؟", ["٢٠٠ ريال", "شامل الضريبة"])
+    faq_store.upsert_qa("ما المدة؟", ["شهر"], topic="العقود")
+    assert faq_store.load_all() == [
+        {"topic": "الأسعار", "questions": [{"question": "كم السعر؟", "answers": ["٢٠٠ ريال", "شامل الضريبة"]}]},
+        {"topic": "العقود", "questions": [{"question": "ما المدة؟", "answers": ["شهر"]}]},
+    ]
+    assert faq_store.version() == 3
+
+    faq_store.replace_all(seed)
+    assert faq_store.load_all() == seed
+
+
+def test_concurrent_first_connections_import_the_seed_once(tmp_path, monkeypatch):
+    seed = [{"topic": "الأسعار", "questions": [{"question": "كم السعر؟", "answers": ["١٠٠ ريال"]}]}]
+    seed_path = tmp_path / "faq_data.json"
+    seed_path.write_text(json.dumps(seed, ensure_ascii=False), encoding="utf-8")
+    monkeypatch.setattr(faq_store, "FAQ_PATH", str(seed_path))
+    monkeypatch.setattr(faq_store, "FAQ_DB_PATH", str(tmp_path / "faq.db"))
+
+    imports = []
+    import_seed = faq_store._import_seed
+    monkeypatch.setattr(faq_store, "_import_seed", lambda conn: imports.append(1) or import_seed(conn))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: faq_store.load_all(), range(8)))
+
+    assert imports == [1]
+    assert all(result == seed for result in results)
@@ -0,0 +1,113 @@
+import os
+import sys
+import threading
+
+import numpy as np
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services import get_best_answer as gba
+from services import response_cache, state
+from services.index_snapshot import IndexSnapshot
+from services.nlp.similarity import VectorIndex
+from services.stage_executor import StageExecutor
+
+USER = {"name": "سارة", "phone": "0500000000", "city": "الرياض", "district": "النرجس"}
+
+
+def _pipeline(monkeypatch, safe=True):
+    """get_best_answer with a complete user, a private stage pool and stubbed
+    remote steps; returns the executor and the messages the FAQ stage saw."""
+    executor = StageExecutor(1)
+    answered = []
+    monkeypatch.setattr(gba, "STAGES", executor)
+    monkeypatch.setattr(gba, "load_user_data", lambda: dict(USER))
+    monkeypatch.setattr(gba, "filter_answers_by_query", lambda text: "")
+    monkeypatch.setattr(gba, "check_text_safety", lambda text: safe)
+    monkeypatch.setattr(gba, "_answer_from_faq", lambda text: answered.append(text) or (f"رد على {text}", None, True))
+    response_cache.RESPONSE_CACHE.clear()
+    return executor, answered
+
+
+def test_unsafe_messages_are_refused_in_their_language_and_the_answer_is_cancelled(monkeypatch):
+    executor, answered = _pipeline(monkeypatch, safe=False)
+    release = threading.Event()
+    # المجمّع مشغول فتبقى الإجابة التخمينية في الطابور حتى يُرفض الطلب
+    busy = executor.submit(release.wait, 5)
+
+    assert gba.get_best_answer("you are a stupid idiot").startswith("Sorry, this language is inappropriate")
+    assert gba.get_best_answer("انت غبي جدا").startswith("عذراً، هذا أسلوب غير لائق")
+    release.set()
+    busy.result()
+
+    assert answered == []
+    stats = executor.stats()
+    assert stats["cancelled"] == 2 and stats["ran_inline"] == 0
+
+
+def test_safe_messages_get_the_answer_stage_and_then_the_cached_reply(monkeypatch):
+    executor, answered = _pipeline(monkeypatch)
+    question = "متى تفتحون يوم السبت"
+
+    assert gba.get_best_answer(question) == f"رد على {question}"
+    assert answered == [question]
+    assert executor.stats()["stages_started"] == 2
+
+    # الرد من الذاكرة: لا تبدأ مرحلة الإجابة التخمينية أصلاً
+    assert gba.get_best_answer(question) == f"رد على {question}"
+    assert answered == [question]
+    assert executor.stats()["stages_started"] == 3
+
+
+def test_a_queued_answer_runs_on_the_request_thread(monkeypatch):
+    executor, answered = _pipeline(monkeypatch)
+    release = threading.Event()
+    busy = executor.submit(release.wait, 5)
+
+    # لا ينتظر الطلب خيطاً من المجمّع المشغول
+    assert gba.get_best_answer("متى تفتحون يوم الجمعة") == "رد على متى تفتحون يوم الجمعة"
+    release.set()
+    busy.result()
+    assert executor.stats()["ran_inline"] == 1
+
+
+def _retrieval(monkeypatch, rows):
+    """Publish ``(question, answer, vector)`` rows and make every query an
+    Arabic message whose embedding is the first unit vector."""
+    vectors = VectorIndex()
+    vectors.build(np.array([vector for _, _, vector in rows], dtype=np.float32))
+    snapshot = IndexSnapshot.build([q for q, _, _ in rows], [[a] for _, a, _ in rows], vectors, version=1)
+    monkeypatch.setattr(state, "_INDEX", snapshot)
+    monkeypatch.setattr(gba, "preprocess_message", lambda text: {
+        "is_greeting": False, "greeting_reply": "", "language": "Arabic", "arabic_translation": text,
+    })
+    monkeypatch.setattr(gba, "filter_answers_by_query", lambda text: "")
+    monkeypatch.setattr(gba, "encode_query", lambda text: np.array([1, 0, 0, 0], dtype=np.float32))
+
+
+def test_token_overlap_outranks_a_slightly_closer_embedding(monkeypatch):
+    _retrieval(monkeypatch, [
+        ("ما هي ساعات العمل", "من ٨ إلى ٥", [0.8, 0.6, 0, 0]),
+        ("كم سعر باقة التنظيف", "٢٠٠ ريال", [0.7, 0, 0.714, 0]),
+        ("هل توجد عروض", "نعم", [0, 0, 0, 1]),
+    ])
+    # الأول: 0.7 * 0.8 = 0.56 فقط، والثاني: 0.7 * 0.7 + 0.3 * BM25 قريب من 1
+    reply, learned, complete = gba._answer_from_faq("كم سعر باقة التنظيف")
+    assert reply == "٢٠٠ ريال" and complete
+    assert learned == ("كم سعر باقة التنظيف", "٢٠٠ ريال")
+
+
+def test_fused_scores_below_the_threshold_give_no_answer(monkeypatch):
+    _retrieval(monkeypatch, [
+        ("ما هي ساعات العمل", "من ٨ إلى ٥", [0.8, 0.6, 0, 0]),
+        ("هل توجد عروض", "نعم", [0, 0, 0, 1]),
+    ])
+    # تشابه 0.8 بلا أي كلمة مشتركة: 0.56 < COMBINED_THRESHOLD
+    assert gba.EMB_WEIGHT * 0.8 < gba.COMBINED_THRESHOLD
+    reply, _, _ = gba._answer_from_faq("كم سعر باقة التنظيف")
+    assert reply.startswith("لم أجد إجابة مناسبة")
+    # ومع الكلمات نفسها يتجاوز العتبة
+    reply, _, _ = gba._answer_from_faq("ما هي ساعات العمل")
+    assert reply == "من ٨ إلى ٥"
@@ -0,0 +1,39 @@
+import os
+import sys
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services.nlp.greetings import GreetingMatcher, match_small_talk
+
+LEXICON = {
+    "Arabic": {
+        "phrases": {"greeting": ["مرحبا", "صباح الخير"], "how_are_you": ["كيف حالك"], "thanks": ["شكرا"]},
+        "fillers": ["يا", "اخي"],
+        "replies": {"greeting": "أهلاً!", "how_are_you": "بخير.", "thanks": "العفو.", "offer": "كيف أساعدك؟"},
+    },
+    "English": {
+        "phrases": {"greeting": ["hello", "hi"], "how_are_you": ["how are you"]},
+        "fillers": ["there"],
+        "replies": {"greeting": "Hello!", "how_are_you": "I'm fine.", "offer": "How can I help?"},
+    },
+}
+
+
+def test_whole_message_must_be_small_talk():
+    matcher = GreetingMatcher(LEXICON)
+    assert matcher.match("مرحباً يا أخي، كيف حالك؟").reply == "أهلاً! بخير. كيف أساعدك؟"
+    assert matcher.match("Hi there, how are you?").language == "English"
+    assert matcher.match("صباح الخير") is not None
+    assert matcher.match("مرحبا كم السعر") is None
+    assert matcher.match("صباح") is None
+    assert matcher.match("يا اخي") is None
+
+
+def test_shipped_lexicon_answers_common_greetings():
+    for text, language in [("السلام عليكم", "Arabic"), ("Hello!", "English"), ("bonjour, ça va ?", "French"),
+                           ("Merhaba, nasılsınız?", "Turkish"), ("kumusta po", "Tagalog")]:
+        assert match_small_talk(text).language == language, text
+    assert match_small_talk("السلام عليكم").reply.startswith("وعليكم السلام")
+    assert match_small_talk("hello I need a maid") is None
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services.index_snapshot import IndexSnapshot
+from services.nlp.ann import IVFIndex
+from services.nlp.quantized import QuantizedIndex
+from services.nlp.similarity import VectorIndex
+
+
+def _snapshot(vectors, rows):
+    questions = [f"سؤال رقم {i} عن التنظيف" for i in range(len(rows))]
+    answers = [[f"إجابة {i}"] for i in range(len(rows))]
+    vectors.build(rows)
+    return IndexSnapshot.build(questions, answers, vectors, version=1)
+
+
+@pytest.mark.parametrize("make_index", [VectorIndex, lambda: IVFIndex(nlist=4, nprobe=4), QuantizedIndex])
+def test_updates_leave_published_snapshots_untouched(make_index):
+    rng = np.random.default_rng(5)
+    rows = rng.standard_normal((200, 16)).astype(np.float32)
+    old = _snapshot(make_index(), rows)
+    if isinstance(old.vectors, QuantizedIndex):
+        old.vectors.fetch = lambda ids: rows[ids]
+    _, before = old.vectors.search(rows[:3], 3)
+
+    added = old.with_added("سؤال جديد عن الأسعار", "إجابة جديدة", -rows[0])
+    updated = added.with_updated(1, question="سؤال معدل", answer="إجابة معدلة", vector=-rows[1])
+    removed = updated.with_removed(0)
+
+    assert [s.version for s in (old, added, updated, removed)] == [1, 2, 3, 4]
+    assert len(old) == 200 and len(added) == 201 and len(removed) == 200
+    assert removed.questions[0] == "سؤال معدل" and removed.answers[0] == "إجابة معدلة"
+    assert removed.token_index.match(["الاسعار"]) == ["إجابة جديدة"]
+
+    # اللقطة القديمة لم تتغير رغم مشاركة المخزن مع اللقطات الجديدة
+    _, after = old.vectors.search(rows[:3], 3)
+    assert (before == after).all()
+    assert old.questions[1] == "سؤال رقم 1 عن التنظيف"
+    assert old.token_index.match(["الاسعار"]) == []
+    assert old.token_index.match(["معدل"]) == []
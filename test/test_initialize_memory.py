@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services import faq_store, initialize_memory, state
+from services.index_snapshot import IndexSnapshot
+from services.nlp.similarity import VectorIndex
+
+
+def _fake_build(questions):
+    vectors = VectorIndex()
+    vectors.build(np.ones((len(questions), 8), dtype=np.float32))
+    return vectors
+
+
+def _store(tmp_path, monkeypatch):
+    seed = [{"topic": "الأسعار", "questions": [{"question": "كم السعر؟", "answers": ["١٠٠ ريال"]}]}]
+    seed_path = tmp_path / "faq_data.json"
+    seed_path.write_text(json.dumps(seed, ensure_ascii=False), encoding="utf-8")
+    monkeypatch.setattr(faq_store, "FAQ_PATH", str(seed_path))
+    monkeypatch.setattr(faq_store, "FAQ_DB_PATH", str(tmp_path / "faq.db"))
+    monkeypatch.setattr(initialize_memory, "build_index_from_memory", _fake_build)
+    monkeypatch.setattr(initialize_memory, "_store_version", None)
+    monkeypatch.setattr(state, "_INDEX", IndexSnapshot.empty(VectorIndex()))
+
+
+def test_writes_from_another_process_reload_the_index(tmp_path, monkeypatch):
+    _store(tmp_path, monkeypatch)
+    # لا شيء لمقارنته قبل أول تحميل
+    assert not initialize_memory.reload_if_store_changed()
+
+    initialize_memory.initialize_memory()
+    assert state.get_index().questions == ("كم السعر؟",)
+    assert not initialize_memory.reload_if_store_changed()
+
+    # كتابة من هذه العملية طبّقت على الفهرس وسجّلت إصدارها
+    initialize_memory.note_store_write(faq_store.upsert_qa("ما المدة؟", ["شهر"]))
+    assert not initialize_memory.reload_if_store_changed()
+
+    # كتابة من عملية أخرى لا تمر بـ note_store_write
+    faq_store.upsert_qa("هل يوجد خصم؟", ["نعم"])
+    version = state.corpus_version()
+    assert initialize_memory.reload_if_store_changed()
+    assert state.get_index().questions == ("كم السعر؟", "ما المدة؟", "هل يوجد خصم؟")
+    assert state.corpus_version() > version
+    assert not initialize_memory.reload_if_store_changed()
+
+
+def test_a_write_interleaved_with_a_local_one_is_not_skipped(tmp_path, monkeypatch):
+    _store(tmp_path, monkeypatch)
+    initialize_memory.initialize_memory()
+
+    faq_store.upsert_qa("هل يوجد خصم؟", ["نعم"])  # عملية أخرى
+    initialize_memory.note_store_write(faq_store.upsert_qa("ما المدة؟", ["شهر"]))
+
+    assert initialize_memory.reload_if_store_changed()
+    assert "هل يوجد خصم؟" in state.get_index().questions
@@ -0,0 +1,85 @@
+import os
+import sys
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services.nlp.inverted_index import InvertedIndex
+from services.normalize_ar import normalize_ar
+
+
+def test_tokens_match_inside_words_like_the_substring_scan():
+    index = InvertedIndex(normalize_ar)
+    index.add("ما هي ساعات العمل؟", ["نعمل من الأحد إلى الخميس"])
+    index.add("كيف أطلب خدمة التنظيف", ["اختر الخدمة ثم العنوان", "ادفع بعد التنظيف"])
+
+    # "خدمة" ليست كلمة في الإجابة لكنها جزء من "الخدمة" (التوكنز تأتي مطبّعة)
+    assert index.match(normalize_ar("خدمة العنوان").split()) == ["اختر الخدمة ثم العنوان"]
+    # تطابق السؤال يعيد كل إجابات الزوج
+    assert index.match(["ساعات"]) == ["نعمل من الأحد إلى الخميس"]
+    assert index.match(["غير موجود"]) == []
+
+
+def test_update_and_remove_keep_corpus_order():
+    index = InvertedIndex(normalize_ar)
+    index.add("سؤال التنظيف الأول", ["إجابة أولى"])
+    index.add("سؤال التنظيف الثاني", ["إجابة ثانية"])
+    index.add("سؤال الأسعار", ["إجابة ثالثة"])
+
+    index.update(0, "سؤال التنظيف المعدل", ["إجابة معدلة"])
+    assert index.match(["التنظيف"]) == ["إجابة معدلة", "إجابة ثانية"]
+
+    index.remove(0)
+    assert len(index) == 2
+    assert index.match(["التنظيف"]) == ["إجابة ثانية"]
+
+
+def test_clone_shares_untouched_postings_and_leaves_the_parent_intact():
+    parent = InvertedIndex(normalize_ar)
+    for i in range(50):
+        parent.add(f"سؤال رقم {i} عن التنظيف", [f"إجابة {i}"])
+
+    clone = parent.clone()
+    # النسخة تشارك القاموس نفسه ولا تنسخ إلا ما تغيّر
+    assert clone._postings._base is parent._postings._base
+    clone.add("سؤال عن الأسعار", ["إجابة الأسعار"])
+    clone.remove(0)
+
+    assert clone._postings._base is parent._postings._base
+    assert len(parent) == 50 and len(clone) == 50
+    assert parent.match(["الاسعار"]) == []
+    assert clone.match(["الاسعار"]) == ["إجابة الأسعار"]
+    assert parent.match(["التنظيف"])[0] == "إجابة 0"
+    assert clone.match(["التنظيف"])[0] == "إجابة 1"
+
+    # سلسلة طويلة من النسخ تدمج التغييرات في أساس جديد وتبقى صحيحة
+    for i in range(200):
+        clone = clone.clone()
+        clone.update(i % 50, f"سؤال معدل {i}", [f"إجابة معدلة {i}"])
+    assert clone.match(["معدله"]) and parent.match(["معدله"]) == []
+
+
+def test_long_tokens_are_verified_against_the_text():
+    index = InvertedIndex(normalize_ar)
+    # كل رباعيات "تنظيفات" موجودة لكن في كلمتين مختلفتين
+    index.add("سؤال", ["تنظيف نظيفات"])
+    index.add("سؤال آخر", ["خدمة التنظيفات"])
+
+    assert index.match(["تنظيفات"]) == ["خدمة التنظيفات"]
+    # التوكنز الأقصر من الرباعية تُطابق داخل المفاتيح
+    assert index.match(["نظ"]) == ["تنظيف نظيفات", "خدمة التنظيفات"]
+
+
+def test_build_matches_incremental_adds():
+    rows = [(f"سؤال {i} عن التنظيف والأسعار", [f"إجابة {i} للمنطقة الشمالية", "راجعنا"]) for i in range(30)]
+    built = InvertedIndex(normalize_ar)
+    built.build([q for q, _ in rows], [a for _, a in rows])
+    added = InvertedIndex(normalize_ar)
+    for question, answers in rows:
+        added.add(question, answers)
+
+    for tokens in (["التنظيف"], ["الشماليه", "1"], ["راج"], ["سعار"]):
+        assert built.match(tokens) == added.match(tokens)
+    built.update(3, "سؤال معدل", ["جديد"])
+    assert built.match(["معدل"]) == ["جديد"]
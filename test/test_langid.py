@@ -0,0 +1,49 @@
+import os
+import sys
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services.nlp.langid import identify_language
+from services.preprocess_message import local_preprocess
+
+
+def test_identifies_arabic_script_and_latin_languages():
+    for text, language in [
+        ("كم سعر الباقة الشهرية؟", "Arabic"),
+        ("ابغى عاملة بكرة الصبح", "Arabic"),
+        ("مجھے ملازمہ چاہیے", "Urdu"),
+        ("قیمت چند است", "Persian"),
+        ("where is my order", "English"),
+        ("je veux une femme de ménage demain", "French"),
+        ("magkano po", "Tagalog"),
+        ("नमस्ते", "Hindi"),
+    ]:
+        assert identify_language(text).language == language, text
+    assert identify_language("كم سعر الباقة الشهرية؟").confidence > 0.9
+    assert identify_language("12345 !!") == ("Unknown", 0.0)
+
+
+def test_only_confident_arabic_skips_gemini():
+    assert local_preprocess("كم سعر الباقة الشهرية؟")["arabic_translation"] == "كم سعر الباقة الشهرية؟"
+    assert local_preprocess("How much is the monthly package?") is None
+    assert local_preprocess("قیمت چند است") is None
+
+
+def test_short_faq_messages_use_the_script_default():
+    # كلمة أو كلمتان لا تكفي للتمييز بين العربية والفارسية أو الإنجليزية والإيطالية
+    for text, language in [
+        ("خدمات", "Arabic"),
+        ("سلام", "Arabic"),
+        ("من انا", "Arabic"),
+        ("price", "English"),
+        ("book", "English"),
+        # حرف فارسي (ی) يلغي تفضيل العربية، والنص الأطول يتغلب عليه
+        ("قیمت", "Persian"),
+        ("ممنون", "Persian"),
+        ("hola", "Spanish"),
+        ("merci", "French"),
+    ]:
+        assert identify_language(text).language == language, text
+    assert local_preprocess("سلام")["arabic_translation"] == "سلام"
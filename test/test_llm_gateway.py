@@ -0,0 +1,149 @@
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services.circuit_breaker import CircuitBreaker
+from services.deadline import request_deadline
+from services.llm_gateway import LLMGateway, LLMUnavailable
+
+TIERS = {"pro": "big-model", "lite": "small-model"}
+TASKS = {"moderation": "lite", "translation": "pro"}
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+
+    def generate_content(self, prompt, **kwargs):
+        if prompt == "boom":
+            raise RuntimeError("api down")
+        usage = SimpleNamespace(prompt_token_count=len(prompt), candidates_token_count=2)
+        return SimpleNamespace(text=f" {self.name} ", usage_metadata=usage)
+
+
+def test_tasks_are_routed_to_their_tier_and_models_reused():
+    built = []
+
+    def factory(name):
+        built.append(name)
+        return FakeModel(name)
+
+    gateway = LLMGateway(TIERS, TASKS, model_factory=factory)
+    assert gateway.text("moderation", "abc") == "small-model"
+    assert gateway.text("moderation", "abcd") == "small-model"
+    assert gateway.text("translation", "x") == "big-model"
+    assert built == ["small-model", "big-model"]
+
+
+def test_stats_per_task():
+    gateway = LLMGateway(TIERS, TASKS, model_factory=FakeModel)
+    gateway.text("moderation", "abc")
+    try:
+        gateway.text("moderation", "boom")
+    except RuntimeError:
+        pass
+    stats = gateway.stats()["moderation"]
+    assert stats["model"] == "small-model"
+    assert stats["calls"] == 2 and stats["errors"] == 1
+    assert stats["prompt_tokens"] == 3 and stats["output_tokens"] == 2
+
+
+def test_breaker_opens_after_failures_and_probes_after_reset():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.05)
+    gateway = LLMGateway(TIERS, TASKS, model_factory=FakeModel, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            gateway.text("moderation", "boom")
+    assert breaker.stats()["state"] == "open"
+    with pytest.raises(LLMUnavailable):
+        gateway.text("moderation", "abc")
+    time.sleep(0.06)
+    assert gateway.text("moderation", "abc") == "small-model"
+    assert breaker.stats()["state"] == "closed"
+    assert gateway.stats()["moderation"]["skipped"] == 1
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker(failure_threshold=1, slow_call_ratio=0.9, reset_seconds=60)
+    breaker.record(True, 2.5, timeout=3.0)
+    assert breaker.allow() is True
+    # البطء يُقاس بمهلة الاستدعاء نفسه لا بعتبة ثابتة
+    breaker.record(True, 0.95, timeout=1.0)
+    assert breaker.allow() is False
+
+
+def test_calls_get_the_remaining_request_deadline():
+    timeouts = []
+
+    class TimedModel(FakeModel):
+        def generate_content(self, prompt, request_options=None, **kwargs):
+            timeouts.append(request_options["timeout"])
+            return super().generate_content(prompt)
+
+    gateway = LLMGateway(TIERS, TASKS, model_factory=TimedModel, call_timeout=30)
+    gateway.text("translation", "x")
+    with request_deadline(0.5):
+        gateway.text("translation", "x")
+    with request_deadline(0):
+        with pytest.raises(LLMUnavailable):
+            gateway.text("translation", "x")
+    assert timeouts[0] == 30 and 0 < timeouts[1] <= 0.5 and len(timeouts) == 2
+
+
+def test_stream_yields_chunks_and_records_usage():
+    class StreamingModel(FakeModel):
+        def generate_content(self, prompt, stream=False, request_options=None, **kwargs):
+            assert stream
+            usage = SimpleNamespace(prompt_token_count=4, candidates_token_count=3)
+            return iter([SimpleNamespace(text="(1) ", usage_metadata=None),
+                         SimpleNamespace(text="باقة", usage_metadata=usage)])
+
+    gateway = LLMGateway(TIERS, TASKS, model_factory=StreamingModel)
+    assert list(gateway.stream("translation", "x")) == ["(1) ", "باقة"]
+    stats = gateway.stats()["translation"]
+    assert stats["calls"] == 1 and stats["errors"] == 0 and stats["output_tokens"] == 3
+
+
+class HangingModel(FakeModel):
+    def generate_content(self, prompt, request_options=None, **kwargs):
+        if prompt == "hang":
+            time.sleep(request_options["timeout"])
+            raise TimeoutError("deadline exceeded")
+        return super().generate_content(prompt)
+
+
+def test_timeouts_with_a_tiny_remaining_budget_do_not_trip_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    gateway = LLMGateway(TIERS, TASKS, model_factory=HangingModel, breaker=breaker, call_timeout=30,
+                         min_budget=0.05)
+    with request_deadline(0.02):
+        with pytest.raises(TimeoutError):
+            gateway.text("translation", "hang")
+    assert breaker.stats()["state"] == "closed"
+    # خطأ حقيقي ضمن المهلة ما زال يُحسب
+    with request_deadline(1):
+        with pytest.raises(RuntimeError):
+            gateway.text("translation", "boom")
+    assert breaker.stats()["state"] == "open"
+
+
+def test_repeated_deadline_bounded_timeouts_open_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=60)
+    gateway = LLMGateway(TIERS, TASKS, model_factory=HangingModel, breaker=breaker, call_timeout=30,
+                         min_budget=0.01)
+    for _ in range(3):
+        # كل طلب يملك مهلة كافية لكن Gemini معلّق
+        with request_deadline(0.03):
+            with pytest.raises(TimeoutError):
+                gateway.text("translation", "hang")
+    assert breaker.stats()["state"] == "open"
+    with request_deadline(0.03):
+        with pytest.raises(LLMUnavailable):
+            gateway.text("translation", "hang")
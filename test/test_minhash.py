@@ -0,0 +1,79 @@
+import os
+import random
+import sys
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services.nlp.minhash import MinHashLSH
+from services.token_overlap_score import token_overlap_score
+
+
+def _corpus(n, seed=3):
+    rng = random.Random(seed)
+    words = [f"كلمة{i}" for i in range(300)]
+    return [rng.sample(words, rng.randint(3, 7)) for _ in range(n)]
+
+
+def test_candidates_find_what_the_linear_scan_finds():
+    corpus = _corpus(500)
+    lsh = MinHashLSH()
+    lsh.build(corpus)
+
+    rng = random.Random(7)
+    found = expected = 0
+    for tokens in rng.sample(corpus, 100):
+        # نسخة قريبة: حذف كلمة وإضافة أخرى
+        query = tokens[1:] + ["كلمة_جديدة"]
+        scan = [i for i, c in enumerate(corpus) if token_overlap_score(query, c) >= 0.6]
+        verified = [i for i in lsh.candidates(query) if token_overlap_score(query, corpus[i]) >= 0.6]
+        assert set(verified) <= set(scan)
+        expected += len(scan)
+        found += len(verified)
+    assert found / expected >= 0.9
+    # المرشحون جزء صغير من الفهرس
+    assert len(lsh.candidates(corpus[0])) < len(corpus) / 5
+
+
+def test_clone_updates_rows_without_touching_the_parent():
+    lsh = MinHashLSH()
+    lsh.build([["تنظيف", "منزل"], ["سعر", "باقة"], ["عاملة", "فلبينية"]])
+    other = lsh.clone()
+    other.remove(0)
+    other.update(0, ["تنظيف", "منزل"])
+    other.add(["سعر", "باقة"])
+
+    assert lsh.candidates(["سعر", "باقة"]) == [1]
+    assert other.candidates(["تنظيف", "منزل"]) == [0]
+    assert other.candidates(["سعر", "باقة"]) == [2]
+    assert lsh.candidate_pairs() == []
+    other.add(["منزل", "تنظيف"])
+    assert other.candidate_pairs() == [(0, 3)]
+    assert lsh.candidates([]) == []
+
+
+def test_batch_build_matches_rows_added_one_by_one():
+    corpus = _corpus(300) + [[]]
+    for bands in (32, 16):
+        built, added = MinHashLSH(bands=bands), MinHashLSH(bands=bands)
+        built.build(corpus)
+        for tokens in corpus:
+            added.add(tokens)
+        signatures, has_tokens = built.signatures([corpus[0], []])
+        assert (signatures[0] == built.signature(corpus[0])).all()
+        assert has_tokens.tolist() == [True, False]
+        assert built.candidate_pairs() == added.candidate_pairs()
+        assert all(built.candidates(t) == added.candidates(t) for t in corpus[:50])
+
+
+def test_clone_shares_the_parent_buckets():
+    lsh = MinHashLSH()
+    lsh.build(_corpus(200))
+    other = lsh.clone()
+    other.add(["سؤال", "جديد", "تماماً"])
+    other.remove(0)
+    assert all(mine._base is theirs._base for mine, theirs in zip(other._buckets, lsh._buckets))
+    assert len(lsh) == 200 and len(other) == 200
+    assert lsh.candidates(["سؤال", "جديد", "تماماً"]) == []
+    assert other.candidates(["سؤال", "جديد", "تماماً"]) == [199]
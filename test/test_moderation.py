@@ -0,0 +1,72 @@
+import os
+import sys
+import threading
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services import moderation
+from services.moderation import Moderator, VerdictStore, lexicon_hit
+
+
+def test_lexicon_catches_variants_but_not_ordinary_words():
+    assert lexicon_hit("يا حماااار") == "يا حمار"
+    assert lexicon_hit("سأقتلك") is not None
+    assert lexicon_hit("F.u.c.k you") is not None
+    assert lexicon_hit("you are a b!tch") == "bitch"
+    # "كلب" alone is a pet, not an insult
+    assert lexicon_hit("هل يمكن اصطحاب كلب للشقة؟") is None
+    assert lexicon_hit("كم سعر الباقة الشهرية") is None
+
+
+def test_remote_verdicts_are_cached_and_persisted(tmp_path):
+    calls = []
+
+    def remote(text):
+        calls.append(text)
+        return "unsafe" not in text
+
+    db_path = str(tmp_path / "qa.db")
+    moderator = Moderator(VerdictStore(db_path, 16), remote=remote, budget_ms=1000, workers=1)
+    assert moderator.moderate("some unsafe words").source == "gemini"
+    assert moderator.moderate("some  unsafe words").safe is False
+    assert moderator.moderate("Some unsafe words").source == "cache"
+    assert moderator.moderate("يا كلب").source == "lexicon"
+    assert calls == ["some unsafe words"]
+
+    # a new process reads the verdict back from qa.db
+    restarted = Moderator(VerdictStore(db_path, 16), remote=remote, budget_ms=1000, workers=1)
+    assert restarted.moderate("some unsafe words") == (False, "cache")
+    assert len(calls) == 1
+
+
+def test_slow_remote_lets_message_through_and_caches_late_verdict(tmp_path):
+    release = threading.Event()
+
+    def remote(text):
+        release.wait(5)
+        return False
+
+    moderator = Moderator(VerdictStore(str(tmp_path / "qa.db"), 16), remote=remote, budget_ms=20, workers=1)
+    assert moderator.moderate("slow message") == (True, "timeout")
+    release.set()
+    moderator._executor.shutdown(wait=True)
+    assert moderator.moderate("slow message") == (False, "cache")
+    assert moderator.stats()["by_source"] == {"timeout": 1, "cache": 1}
+
+
+def test_keys_differ_across_scripts_and_skip_text_without_letters():
+    texts = ["Ты идиот", "Привет, сколько стоит?", "你好", "नमस्ते, कीमत क्या है", "Σκατά"]
+    assert len({VerdictStore.key(text) for text in texts}) == len(texts)
+    assert VerdictStore.key("Ты  ИДИОТ") == VerdictStore.key("ты идиот")
+    assert VerdictStore.key("0551234567 😀") is None
+
+
+def test_cached_unsafe_verdict_wins_over_faq_vocabulary(tmp_path, monkeypatch):
+    monkeypatch.setattr(moderation, "_VOCABULARY", frozenset(["you", "are", "rude"]))
+    store = VerdictStore(str(tmp_path / "qa.db"), 16)
+    moderator = Moderator(store, remote=lambda text: True, budget_ms=1000, workers=1)
+    assert moderator.moderate("you are rude") == (True, "corpus")
+    store.put(store.key("you are rude"), False)
+    assert moderator.moderate("you are rude") == (False, "cache")
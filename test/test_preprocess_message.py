@@ -0,0 +1,34 @@
+import json
+import os
+import sys
+
+import pytest
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services.preprocess_message import parse_preprocess_response
+
+
+def test_parse_translation_and_greeting():
+    raw = json.dumps({"language": "english", "is_greeting": False, "greeting_reply": "",
+                      "arabic_translation": "كم سعر الباقة؟"})
+    assert parse_preprocess_response(raw, "How much is the package?") == {
+        "language": "English", "is_greeting": False, "greeting_reply": "", "arabic_translation": "كم سعر الباقة؟",
+    }
+
+    raw = json.dumps({"language": "French", "is_greeting": True,
+                      "greeting_reply": "Bonjour ! Comment puis-je vous aider ?", "arabic_translation": "مرحبا"})
+    assert parse_preprocess_response(raw, "Bonjour")["is_greeting"]
+
+
+def test_arabic_messages_are_searched_as_typed():
+    raw = json.dumps({"language": "Arabic", "is_greeting": False, "greeting_reply": "",
+                      "arabic_translation": "ما هو سعر الباقة"})
+    assert parse_preprocess_response(raw, "كم سعر الباقة")["arabic_translation"] == "كم سعر الباقة"
+    # تحية بدون نص رد لا تُعامل كتحية
+    raw = json.dumps({"language": "Arabic", "is_greeting": True, "greeting_reply": "", "arabic_translation": ""})
+    assert not parse_preprocess_response(raw, "مرحبا")["is_greeting"]
+    with pytest.raises(ValueError):
+        parse_preprocess_response("not json", "مرحبا")
@@ -0,0 +1,43 @@
+import os
+import sys
+import threading
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services.qa_writer import QAWriter, should_learn
+
+
+def test_fallback_replies_are_not_learned():
+    assert should_learn("كم السعر؟", "١٠٠ ريال شهرياً")
+    assert not should_learn("كم السعر؟", "لم أجد إجابة مناسبة حالياً. هل يمكنك توضيح سؤالك أكثر؟")
+    assert not should_learn("كم السعر؟", "لم اجد اجابة مناسبة")
+    assert not should_learn("كم السعر؟", "⚠️ حدث خطأ أثناء جلب الأسعار")
+    assert not should_learn("", "١٠٠ ريال")
+    assert not should_learn("كم السعر؟", "  ")
+
+
+def test_batches_keep_the_last_answer_per_question():
+    applied = []
+    writer = QAWriter(applied.append, debounce_ms=50)
+
+    assert writer.enqueue("كم السعر؟", "١٠٠ ريال")
+    assert writer.enqueue("ما ساعات العمل؟", "من ٨ إلى ٥")
+    assert writer.enqueue("كم  السعرِ؟", "٢٠٠ ريال")
+    assert not writer.enqueue("كم السعر؟", "لم أجد إجابة مناسبة حالياً")
+    assert writer.flush()
+
+    assert applied == [[("ما ساعات العمل؟", "من ٨ إلى ٥"), ("كم  السعرِ؟", "٢٠٠ ريال")]]
+    assert writer.stats()["rejected"] == 1
+    assert writer.stats()["written"] == 2
+
+
+def test_full_queue_drops_instead_of_blocking():
+    release = threading.Event()
+    writer = QAWriter(lambda pairs: release.wait(), max_pending=2, debounce_ms=0, max_batch=1)
+
+    results = [writer.enqueue(f"سؤال {i}", "إجابة") for i in range(5)]
+    release.set()
+    assert writer.flush()
+    assert results.count(False) == writer.stats()["dropped"] >= 2
@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services.reply_stream import emit, stream_reply, streaming
+
+
+def build_reply(fail=False):
+    emit("✅ تم اختيار الموعد: صباحي\n\n")
+    emit("(1) باقة ")
+    if fail:
+        raise RuntimeError("api down")
+    return "✅ تم اختيار الموعد: صباحي\n\n(1) باقة شهرية"
+
+
+def test_emitted_parts_then_rest_then_done():
+    events = list(stream_reply(build_reply))
+    assert events == [
+        ("delta", "✅ تم اختيار الموعد: صباحي\n\n"),
+        ("delta", "(1) باقة "),
+        ("delta", "شهرية"),
+        ("done", "✅ تم اختيار الموعد: صباحي\n\n(1) باقة شهرية"),
+    ]
+
+
+def test_emit_is_a_no_op_outside_a_stream():
+    assert not streaming()
+    assert build_reply().endswith("شهرية")
+    assert list(stream_reply(lambda: "plain reply")) == [("delta", "plain reply"), ("done", "plain reply")]
+
+
+def test_errors_follow_the_parts_already_sent():
+    events = stream_reply(build_reply, True)
+    assert next(events)[0] == "delta"
+    assert next(events)[0] == "delta"
+    with pytest.raises(RuntimeError):
+        next(events)
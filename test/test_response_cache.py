@@ -0,0 +1,55 @@
+import os
+import sys
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services import response_cache, state
+from services.embedding_cache import EMPTY_KEY, normalized_key
+from services.index_snapshot import IndexSnapshot
+from services.nlp.similarity import VectorIndex
+from services.state import corpus_version
+
+
+def test_non_latin_messages_do_not_share_an_entry():
+    response_cache.RESPONSE_CACHE.clear()
+    response_cache.store("answer", "Привет, сколько стоит?", "reply in Russian", corpus_version())
+    assert response_cache.lookup("answer", "Ты идиот") == (False, None)
+    assert response_cache.lookup("answer", "你好") == (False, None)
+    assert response_cache.lookup("answer", "привет  сколько стоит") == (True, "reply in Russian")
+
+
+def test_keys_keep_accents_and_skip_symbol_only_messages():
+    assert normalized_key("¿Cuánto cuesta?") == "\x1fcuánto cuesta"
+    assert normalized_key("नमस्ते") != normalized_key("नमस")
+    assert normalized_key("😀 !!") == EMPTY_KEY
+    response_cache.RESPONSE_CACHE.clear()
+    response_cache.store("faq", "😀", "reply", corpus_version())
+    assert response_cache.lookup("faq", "👍") == (False, None)
+
+
+def _publish_version(monkeypatch, version):
+    snapshot = IndexSnapshot.empty(VectorIndex())
+    snapshot.version = version
+    monkeypatch.setattr(state, "_INDEX", snapshot)
+
+
+def test_faq_writes_invalidate_cached_replies(monkeypatch):
+    response_cache.RESPONSE_CACHE.clear()
+    _publish_version(monkeypatch, 5)
+    response_cache.store("answer", "كم السعر؟", "١٠٠ ريال", corpus_version())
+    assert response_cache.lookup("answer", "كم السعر؟") == (True, "١٠٠ ريال")
+
+    _publish_version(monkeypatch, 6)
+    assert response_cache.lookup("answer", "كم السعر؟") == (False, None)
+
+
+def test_a_reply_computed_across_a_write_is_never_served(monkeypatch):
+    response_cache.RESPONSE_CACHE.clear()
+    _publish_version(monkeypatch, 5)
+    version = corpus_version()
+    # تعديل على الـ FAQ يصل أثناء حساب الرد
+    _publish_version(monkeypatch, 6)
+    response_cache.store("answer", "كم السعر؟", "رد مبني على الإصدار 5", version)
+    assert response_cache.lookup("answer", "كم السعر؟") == (False, None)
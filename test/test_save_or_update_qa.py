@@ -0,0 +1,53 @@
+import os
+import sys
+
+import numpy as np
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services import save_or_update_qa, state
+from services.index_snapshot import IndexSnapshot
+from services.nlp.similarity import VectorIndex
+
+
+def _live_index(monkeypatch):
+    questions = ["ما هي ساعات العمل", "كم سعر التنظيف الشامل", "هل تعملون يوم الجمعة"]
+    vectors = VectorIndex()
+    vectors.build(np.eye(len(questions), 8, dtype=np.float32))
+    snapshot = IndexSnapshot.build(questions, [[f"إجابة {i}"] for i in range(len(questions))], vectors, version=1)
+    monkeypatch.setattr(state, "_INDEX", snapshot)
+    return snapshot
+
+
+def test_batch_makes_one_store_write_and_one_index_update(monkeypatch):
+    _live_index(monkeypatch)
+    calls = {"upsert_many": [], "apply_qa_batch": [], "note_store_write": []}
+    monkeypatch.setattr(save_or_update_qa, "upsert_many", lambda rows: calls["upsert_many"].append(list(rows)) or 7)
+    monkeypatch.setattr(save_or_update_qa, "apply_qa_batch", lambda changes: calls["apply_qa_batch"].append(changes))
+    monkeypatch.setattr(save_or_update_qa, "note_store_write", lambda version: calls["note_store_write"].append(version))
+
+    save_or_update_qa.save_or_update_qa_batch([
+        ("كم سعر التنظيف الشامل؟", "٢٠٠ ريال"),   # سؤال موجود: تحديث إجابته
+        ("هل تعملون يوم الجمعة", "إجابة 2"),       # الإجابة نفسها: لا كتابة
+        ("ما هي مدة العقد", "شهر\nقابل للتجديد"),  # سؤال جديد
+        ("ما هي مدة العقد", "شهران"),              # الدفعة نفسها: الأحدث يفوز
+    ])
+
+    assert calls["upsert_many"] == [[
+        ("كم سعر التنظيف الشامل", ["٢٠٠ ريال"], None),
+        ("ما هي مدة العقد", ["شهران"], "مدة العقد"),
+    ]]
+    assert calls["apply_qa_batch"] == [[("كم سعر التنظيف الشامل", ["٢٠٠ ريال"]), ("ما هي مدة العقد", ["شهران"])]]
+    assert calls["note_store_write"] == [7]
+
+
+def test_batch_without_changes_writes_nothing(monkeypatch):
+    _live_index(monkeypatch)
+    calls = []
+    monkeypatch.setattr(save_or_update_qa, "upsert_many", lambda rows: calls.append(rows))
+    monkeypatch.setattr(save_or_update_qa, "apply_qa_batch", lambda changes: calls.append(changes))
+
+    save_or_update_qa.save_or_update_qa_batch([("ما هي ساعات العمل", "إجابة 0")])
+    assert calls == []
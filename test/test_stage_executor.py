@@ -0,0 +1,85 @@
+import os
+import sys
+import threading
+import time
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services.stage_executor import StageExecutor
+
+
+def test_stages_overlap_and_saved_time_is_counted():
+    executor = StageExecutor(4)
+    started = time.monotonic()
+    with executor.run() as stages:
+        stages.start("safety", time.sleep, 0.1)
+        stages.start("answer", lambda: time.sleep(0.1) or "reply")
+        stages.result("safety")
+        assert stages.result("answer") == "reply"
+    assert time.monotonic() - started < 0.18
+    stats = executor.stats()
+    assert stats["runs"] == 1 and stats["stages_started"] == 2
+    assert stats["saved_ms_total"] > 50
+
+
+def test_unused_stages_are_cancelled_or_ignored():
+    executor = StageExecutor(1)
+    running, release = threading.Event(), threading.Event()
+
+    def answer():
+        running.set()
+        release.wait(5)
+
+    with executor.run() as stages:
+        stages.start("answer", answer)
+        stages.start("translation", lambda: "never needed")
+        running.wait(5)
+    release.set()
+    stats = executor.stats()
+    assert stats["cancelled"] == 1 and stats["ignored"] == 1
+
+
+def test_stage_errors_reach_the_caller():
+    executor = StageExecutor(1)
+    with executor.run() as stages:
+        stages.start("answer", lambda: 1 / 0)
+        try:
+            stages.result("answer")
+        except ZeroDivisionError:
+            pass
+        else:
+            raise AssertionError("expected the stage error")
+
+
+def test_inline_stage_runs_on_the_request_thread_while_the_pool_is_busy():
+    executor = StageExecutor(1)
+    release = threading.Event()
+    # مجمّع مشغول بالكامل بعمل تخميني لطلب آخر
+    busy = executor.submit(release.wait, 5)
+
+    with executor.run() as stages:
+        stages.start("answer", lambda: "reply")
+        assert stages.call("safety", threading.get_ident) == threading.get_ident()
+        assert stages.result("safety") == threading.get_ident()
+        release.set()
+        assert stages.result("answer") == "reply"
+    busy.result()
+    assert executor.stats()["stages_started"] == 2
+
+
+def test_a_queued_stage_runs_inline_when_its_result_is_needed():
+    executor = StageExecutor(1)
+    release = threading.Event()
+    busy = executor.submit(release.wait, 5)
+
+    with executor.run() as stages:
+        stages.start("answer", threading.get_ident)
+        # المجمّع ما زال مشغولاً: لا ننتظر خيطاً، تعمل المرحلة على خيط الطلب
+        assert stages.result("answer") == threading.get_ident()
+        assert stages.result("answer") == threading.get_ident()
+    release.set()
+    busy.result()
+    stats = executor.stats()
+    assert stats["ran_inline"] == 1 and stats["cancelled"] == 0
@@ -0,0 +1,31 @@
+import os
+import sys
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services.nlp.text_processing import normalize, normalize_many, tokenize, tokenize_many
+from services.remove_diacritics import remove_diacritics
+
+
+def test_normalize_folds_letter_variants_and_strips_marks():
+    assert normalize("أإآٱ ة ى ؤ ئ") == "اااا ه ي و ي"
+    assert normalize("مَرْحَبـــاً  بِكَ") == "مرحبا بك"
+    # الحروف اللاتينية والرموز تصبح فراغات، والأرقام والفواصل العشرية تبقى
+    assert normalize("Price: ١٢٫٥ or 3.5 SAR!") == "١٢٫٥ 3.5"
+    # حذف التشكيل وحده لا يوحّد الحروف
+    assert remove_diacritics("إِلَى") == "إلى"
+
+
+def test_tokenize_drops_folded_stopwords_and_returns_fresh_lists():
+    assert tokenize("متى تصل العاملة إلى المنزل") == ["متي", "تصل", "العامله", "المنزل"]
+    first = tokenize("أين الموقع")
+    first.append("x")
+    assert tokenize("أين الموقع") == ["الموقع"]
+
+
+def test_batch_api_matches_single_calls():
+    texts = ["ما هي الخدمات المتاحة؟", "الخدمة", "ما هي الخدمات المتاحة؟", ""]
+    assert normalize_many(texts) == [normalize(t) for t in texts]
+    assert tokenize_many(texts) == [tokenize(t) for t in texts]
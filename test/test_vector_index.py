@@ -0,0 +1,118 @@
+import os
+import sys
+
+import numpy as np
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from services.nlp.similarity import VectorIndex, l2_normalize
+from services.nlp.ann import IVFIndex
+from services.nlp.quantized import QuantizedIndex
+
+
+def _brute_force(corpus, query, k):
+    sims = l2_normalize(corpus) @ l2_normalize(query)
+    return list(np.argsort(-sims)[:k])
+
+
+def test_search_matches_brute_force():
+    rng = np.random.default_rng(1)
+    corpus = rng.standard_normal((300, 16)).astype(np.float32)
+    queries = rng.standard_normal((4, 16)).astype(np.float32)
+    index = VectorIndex()
+    index.build(corpus)
+
+    sims, ids = index.search(queries, 5)
+    assert ids.shape == (4, 5)
+    for q, row in zip(queries, ids):
+        assert list(row) == _brute_force(corpus, q, 5)
+    # النتائج مرتبة تنازلياً حسب التشابه
+    assert np.all(np.diff(sims, axis=1) <= 0)
+
+
+def test_add_update_remove_keep_rows_aligned():
+    rng = np.random.default_rng(2)
+    rows = [rng.standard_normal(8).astype(np.float32) for _ in range(3)]
+    index = VectorIndex()
+    for row in rows:
+        index.add(row)
+
+    index.update(1, -rows[1])
+    _, ids = index.search(-rows[1], 1)
+    assert ids[0][0] == 1
+
+    index.remove(0)
+    assert len(index) == 2
+    # الصف 2 أصبح 1 بعد الحذف كما في del list[0]
+    _, ids = index.search(rows[2], 1)
+    assert ids[0][0] == 1
+
+    _, ids = index.search(rows[2], 10)
+    assert ids.shape == (1, 2)
+
+
+def test_ivf_probing_every_cell_is_exact_and_tracks_removals():
+    rng = np.random.default_rng(3)
+    corpus = rng.standard_normal((400, 16)).astype(np.float32)
+    index = IVFIndex(nlist=8, nprobe=8)
+    index.build(corpus)
+    assert index.trained
+
+    query = corpus[7] + 0.01
+    _, ids = index.search(query, 5)
+    assert list(ids[0]) == _brute_force(corpus, query, 5)
+
+    index.nprobe = 2
+    index.remove(0)
+    new_id = index.add(-corpus[7])
+    _, ids = index.search(-corpus[7], 1)
+    assert ids[0][0] == new_id == 399
+    # corpus[7] صار في الصف 6 بعد حذف الصف 0
+    _, ids = index.search(corpus[7], 1)
+    assert ids[0][0] == 6
+
+
+def test_quantized_index_reranks_to_exact_order():
+    rng = np.random.default_rng(4)
+    # يقع المتن قرب فضاء جزئي من 12 بعداً كما في تضمينات الأسئلة الحقيقية
+    basis = rng.standard_normal((12, 32))
+    corpus = (rng.standard_normal((500, 12)) @ basis + 0.05 * rng.standard_normal((500, 32))).astype(np.float32)
+    rows = list(corpus)
+    index = QuantizedIndex(pca_dim=16, rerank=8, fetch=lambda ids: np.stack([rows[i] for i in ids]))
+    index.build(corpus)
+    assert index.code_dim == 16
+    assert index.nbytes < l2_normalize(corpus).nbytes / 4
+
+    query = corpus[11] + 0.05
+    sims, ids = index.search(query, 5)
+    assert list(ids[0]) == _brute_force(corpus, query, 5)
+    np.testing.assert_allclose(sims[0], np.sort(l2_normalize(corpus) @ l2_normalize(query))[::-1][:5], rtol=1e-5)
+
+    del rows[0]
+    index.remove(0)
+    rows.append(-corpus[11])
+    assert index.add(-corpus[11]) == 499
+    _, ids = index.search(-corpus[11], 1)
+    assert ids[0][0] == 499
+
+
+def test_ivf_clone_copies_only_the_cells_it_changes():
+    rng = np.random.default_rng(6)
+    corpus = rng.standard_normal((400, 16)).astype(np.float32)
+    parent = IVFIndex(nlist=8, nprobe=8)
+    parent.build(corpus)
+
+    clone = parent.clone()
+    clone.add(corpus[3])
+    changed = clone._assign[-1]
+    assert clone._lists[changed] is not parent._lists[changed]
+    assert all(clone._lists[c] is parent._lists[c] for c in range(8) if c != changed)
+    assert 400 in clone._lists[changed] and 400 not in parent._lists[changed]
+
+    clone.update(5, -corpus[5])
+    _, ids = clone.search(-corpus[5], 1)
+    assert ids[0][0] == 5
+    _, ids = parent.search(corpus[5], 1)
+    assert ids[0][0] == 5
@@ -0,0 +1,69 @@
+import logging
+import os
+import sys
+import threading
+
+from flask import Flask
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from app_pkg import routes
+from app_pkg.errors import register_error_handlers
+from services import state, warmup
+
+
+def _load_embedder():
+    # monkeypatch يعيد _EMBEDDER الأصلي بعد الاختبار
+    state._EMBEDDER = object()
+
+
+def _client(monkeypatch, initialize_memory):
+    # حالة تجهيز جديدة لكل اختبار، ونموذج وهمي بدل تحميل sentence-transformers
+    monkeypatch.setattr(warmup, "READY", threading.Event())
+    monkeypatch.setattr(warmup, "_STATUS", {"started_at": None, "finished_at": None, "error": None})
+    monkeypatch.setattr(state, "_EMBEDDER", None)
+    monkeypatch.setattr(warmup, "get_embedder", _load_embedder)
+    monkeypatch.setattr(warmup, "initialize_memory", initialize_memory)
+    monkeypatch.setattr(routes, "logger", logging.getLogger("test.routes"))
+    app = Flask(__name__)
+    app.register_blueprint(routes.bp)
+    register_error_handlers(app)
+    return app.test_client()
+
+
+def test_ready_turns_200_once_warm_up_finishes(monkeypatch):
+    building, release = threading.Event(), threading.Event()
+    client = _client(monkeypatch, lambda: building.set() or release.wait(5))
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.get_json()["ready"] is False and response.get_json()["model_loaded"] is False
+
+    thread = threading.Thread(target=warmup.warm_up)
+    thread.start()
+    building.wait(5)
+    # النموذج جاهز والفهرس ما زال يُبنى
+    response = client.get("/ready")
+    assert response.status_code == 503 and response.get_json()["model_loaded"] is True
+
+    release.set()
+    thread.join(5)
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.get_json()["ready"] is True and response.get_json()["error"] is None
+
+
+def test_ready_reports_a_failed_index_build(monkeypatch):
+    def initialize_memory():
+        raise RuntimeError("faq.db is locked")
+
+    client = _client(monkeypatch, initialize_memory)
+    monkeypatch.setattr(warmup, "LOGGER", logging.getLogger("test.warmup"))
+    warmup.warm_up()
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.get_json()["error"] == "faq.db is locked"
+    assert warmup._STATUS["finished_at"] is not None